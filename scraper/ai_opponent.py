@@ -0,0 +1,344 @@
+"""
+Computer opponent for the player/attribute chain game.
+
+Given an online game state (usedPlayerIds, lastSubmittedAttributeMove,
+nextInputType, lastPlayerId, history), returns a legal move within a latency
+budget. Rules follow calculateSubmitAnswerUpdate in gameUtils.js:
+
+    - a player must be unused and share the last submitted attribute
+      (values compared case-insensitively; any player on the first move)
+    - an attribute must belong to the last player and may not repeat the
+      last submitted attribute
+    - the move that brings the game to TURN_LIMIT moves loses
+
+Candidate generation is indexed: PlayerIndex bitmaps count the players left
+for any attribute in one AND + popcount, and each attribute keeps its players
+pre-sorted by how many attributes they have, so the strongest player replies
+are found without scanning the whole roster. Search is iterative-deepening
+negamax with alpha-beta over the best `beam` moves per node, preferring moves
+that leave the opponent the fewest options; it stops when the time budget is
+spent and plays the best move from the deepest completed iteration.
+
+Usage:
+    python ai_opponent.py --benchmark
+    python ai_opponent.py --benchmark --difficulty hard --games 20
+    python ai_opponent.py --state game.json --difficulty medium
+"""
+
+import argparse
+import json
+import math
+import random
+import time
+from pathlib import Path
+
+from player_index import ATTRIBUTE_FIELDS, PlayerIndex, popcount
+from utils import load_json
+
+DEFAULT_PLAYERS_PATH = Path("../ballknower/public/backend/players_new.json")
+
+TURN_LIMIT = 30
+WIN = 1000.0
+
+# Search depth (plies), time budget (seconds), moves considered per node, and
+# chance of playing a random legal move instead of the searched one
+DIFFICULTIES = {
+    'easy': {'depth': 1, 'budget': 0.05, 'beam': 6, 'blunder': 0.3},
+    'medium': {'depth': 3, 'budget': 0.25, 'beam': 12, 'blunder': 0.05},
+    'hard': {'depth': 6, 'budget': 1.0, 'beam': 24, 'blunder': 0.0},
+}
+
+class _Timeout(Exception):
+    pass
+
+class AIOpponent:
+    """
+    Move search over a player database.
+
+    Attributes:
+        index: PlayerIndex over the players (bit position = player order)
+        attr_bitmaps: (type, lowercased value) -> bitmap of players with it
+        attr_members: (type, lowercased value) -> positions, fewest attributes first
+        player_attrs: position -> [(type, lowercased value)]
+        display_values: (type, lowercased value) -> value as stored in the data
+    """
+
+    def __init__(self, players, difficulty='medium', seed=None):
+        if difficulty not in DIFFICULTIES:
+            raise ValueError(f"Difficulty must be one of {', '.join(DIFFICULTIES)}")
+        self.settings = DIFFICULTIES[difficulty]
+        self.rng = random.Random(seed)
+        self.index = PlayerIndex.from_players(players)
+        self.last_search = {}
+
+        # Merge bitmaps whose values differ only in case, since the game
+        # compares attribute values case-insensitively
+        self.attr_bitmaps = {}
+        self.display_values = {}
+        for (attr_type, value), bitmap in self.index.bitmaps.items():
+            if attr_type not in ATTRIBUTE_FIELDS:
+                continue
+            key = (attr_type, str(value).lower())
+            self.attr_bitmaps[key] = self.attr_bitmaps.get(key, 0) | bitmap
+            self.display_values.setdefault(key, str(value))
+
+        self.player_attrs = []
+        for pid in self.index.ids:
+            record = players[pid]
+            attrs = []
+            for attr_type, field in ATTRIBUTE_FIELDS.items():
+                for value in record.get(field) or []:
+                    key = (attr_type, str(value).lower())
+                    if key not in attrs:
+                        attrs.append(key)
+            self.player_attrs.append(attrs)
+
+        # A player with few attributes is a strong reply: the opponent has few
+        # attributes to continue from
+        self.attr_members = {key: [] for key in self.attr_bitmaps}
+        for pos, attrs in enumerate(self.player_attrs):
+            for key in attrs:
+                self.attr_members[key].append(pos)
+        for members in self.attr_members.values():
+            members.sort(key=lambda pos: len(self.player_attrs[pos]))
+        self.opening_order = sorted(range(len(self.index.ids)), key=lambda pos: len(self.player_attrs[pos]))
+
+    @classmethod
+    def from_file(cls, path, difficulty='medium', seed=None):
+        return cls(load_json(path), difficulty, seed)
+
+    # --- Game state -----------------------------------------------------
+
+    def state_from_game(self, game):
+        """
+        Convert a game document to an internal search state.
+
+        Returns:
+            (kind, attr, pos, used, moves) tuple, or None if the game references
+            players that are not in the data
+        """
+        used_ids = game.get('usedPlayerIds') or []
+        used = self.index.player_bitmap(used_ids)
+        history = game.get('history')
+        if history is not None:
+            moves = sum(1 for h in history if h.get('type') in ('player', 'number', 'team', 'college'))
+        else:
+            moves = len(used_ids) * 2 - (1 if game.get('nextInputType') == 'attribute' else 0)
+
+        last = game.get('lastSubmittedAttributeMove') or {}
+        attr = (last['type'], str(last.get('value', '')).lower()) if last.get('type') else None
+
+        if game.get('nextInputType') == 'attribute':
+            pos = self.index.positions.get(game.get('lastPlayerId'))
+            if pos is None:
+                return None
+            return ('attribute', attr, pos, used, moves)
+        return ('player', attr, None, used, moves)
+
+    def legal_moves(self, state, limit=None):
+        """
+        Legal moves for the side to move, best-first by the move-ordering heuristic.
+
+        Player moves are positions; attribute moves are (type, value) keys.
+        """
+        kind, attr, pos, used, _ = state
+        if kind == 'attribute':
+            options = [key for key in self.player_attrs[pos] if key != attr]
+            options.sort(key=lambda key: popcount(self.attr_bitmaps[key] & ~used))
+            return options[:limit] if limit else options
+
+        members = self.attr_members.get(attr, []) if attr else self.opening_order
+        moves = []
+        for candidate in members:
+            if not (used >> candidate) & 1:
+                moves.append(candidate)
+                if limit and len(moves) >= limit:
+                    break
+        return moves
+
+    def mobility(self, state):
+        """Number of legal moves for the side to move."""
+        kind, attr, pos, used, _ = state
+        if kind == 'attribute':
+            return sum(1 for key in self.player_attrs[pos] if key != attr)
+        if attr is None:
+            return len(self.index.ids) - popcount(used)
+        return popcount(self.attr_bitmaps.get(attr, 0) & ~used)
+
+    def apply(self, state, move):
+        kind, attr, pos, used, moves = state
+        if kind == 'attribute':
+            return ('player', move, pos, used, moves + 1)
+        return ('attribute', attr, move, used | (1 << move), moves + 1)
+
+    # --- Search ---------------------------------------------------------
+
+    def evaluate(self, state):
+        """Static score for the side to move: more options is better, none is a loss."""
+        options = self.mobility(state)
+        return math.log2(1 + options) if options else -WIN
+
+    def _negamax(self, state, depth, alpha, beta):
+        self.nodes += 1
+        if self.nodes & 63 == 0 and time.perf_counter() > self.deadline:
+            raise _Timeout()
+        if depth == 0:
+            return self.evaluate(state)
+
+        moves = self.legal_moves(state, self.settings['beam'])
+        if not moves:
+            return -WIN
+        best = -math.inf
+        for move in moves:
+            if state[4] + 1 >= TURN_LIMIT:
+                score = -WIN
+            else:
+                # Prefer quicker wins and slower losses
+                score = -self._negamax(self.apply(state, move), depth - 1, -beta / 0.99, -alpha / 0.99) * 0.99
+            if score > best:
+                best = score
+            alpha = max(alpha, score)
+            if alpha >= beta:
+                break
+        return best
+
+    def search(self, state, budget=None, max_depth=None):
+        """
+        Iterative-deepening search within a time budget.
+
+        Returns:
+            Best move (position or attribute key), or None if there is no legal move
+        """
+        budget = self.settings['budget'] if budget is None else budget
+        max_depth = max_depth or self.settings['depth']
+        start = time.perf_counter()
+        self.deadline = start + budget
+        self.nodes = 0
+
+        moves = self.legal_moves(state, self.settings['beam'])
+        if not moves:
+            self.last_search = {'depth': 0, 'nodes': 0, 'elapsed': 0.0, 'score': -WIN}
+            return None
+
+        best_move, best_score, completed = moves[0], -math.inf, 0
+        for depth in range(1, max_depth + 1):
+            try:
+                scores = {}
+                alpha = -math.inf
+                for move in moves:
+                    if state[4] + 1 >= TURN_LIMIT:
+                        scores[move] = -WIN
+                    else:
+                        scores[move] = -self._negamax(self.apply(state, move), depth - 1, -math.inf, -alpha / 0.99) * 0.99
+                    alpha = max(alpha, scores[move])
+            except _Timeout:
+                break
+            # Search the previous iteration's best moves first next time
+            moves.sort(key=lambda m: -scores[m])
+            best_move, best_score, completed = moves[0], scores[moves[0]], depth
+            if abs(best_score) >= WIN * 0.5:
+                break
+
+        if self.settings['blunder'] and self.rng.random() < self.settings['blunder']:
+            best_move = self.rng.choice(moves)
+
+        self.last_search = {
+            'depth': completed,
+            'nodes': self.nodes,
+            'elapsed': time.perf_counter() - start,
+            'score': best_score,
+        }
+        return best_move
+
+    def choose_move(self, game, budget=None):
+        """
+        Pick a move for a game document.
+
+        Args:
+            game: Game state dict (as stored in the games collection)
+            budget: Time budget in seconds (default: the difficulty's budget)
+
+        Returns:
+            {'type': 'player'|'number'|'team'|'college', 'value': ...}, or None
+            if there is no legal move
+        """
+        state = self.state_from_game(game)
+        if state is None:
+            return None
+        move = self.search(state, budget)
+        if move is None:
+            return None
+        if state[0] == 'attribute':
+            return {'type': move[0], 'value': self.display_values[move]}
+        return {'type': 'player', 'value': self.index.ids[move]}
+
+def run_benchmark(players, difficulties, games, seed=0):
+    """
+    Self-play each difficulty against itself and report search speed.
+
+    Returns:
+        Dict of difficulty -> stats
+    """
+    results = {}
+    for difficulty in difficulties:
+        engine = AIOpponent(players, difficulty, seed)
+        rng = random.Random(seed)
+        moves = nodes = 0
+        elapsed = worst = 0.0
+        lengths = []
+        for _ in range(games):
+            start_pos = rng.randrange(len(engine.index.ids))
+            state = ('attribute', None, start_pos, 1 << start_pos, 1)
+            while state[4] < TURN_LIMIT:
+                move = engine.search(state)
+                stats = engine.last_search
+                moves += 1
+                nodes += stats['nodes']
+                elapsed += stats['elapsed']
+                worst = max(worst, stats['elapsed'])
+                if move is None:
+                    break
+                state = engine.apply(state, move)
+            lengths.append(state[4])
+
+        # Raw candidate generation rate, independent of search settings
+        gen_start = time.perf_counter()
+        generated = 0
+        keys = list(engine.attr_bitmaps)
+        for key in keys:
+            generated += len(engine.legal_moves(('player', key, None, 0, 0), engine.settings['beam']))
+            engine.mobility(('player', key, None, 0, 0))
+        gen_elapsed = time.perf_counter() - gen_start
+
+        results[difficulty] = {
+            'moves': moves,
+            'moves_per_sec': round(moves / elapsed, 1) if elapsed else None,
+            'avg_ms_per_move': round(1000 * elapsed / moves, 2) if moves else None,
+            'max_ms_per_move': round(1000 * worst, 2),
+            'nodes_per_sec': round(nodes / elapsed) if elapsed else None,
+            'avg_game_length': round(sum(lengths) / len(lengths), 1) if lengths else None,
+            'candidate_lookups_per_sec': round(len(keys) / gen_elapsed) if gen_elapsed else None,
+        }
+    return results
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Computer opponent for the player/attribute chain game")
+    parser.add_argument("--input", default=str(DEFAULT_PLAYERS_PATH), help="Players JSON file")
+    parser.add_argument("--difficulty", choices=list(DIFFICULTIES), help="Difficulty (default: all for --benchmark, medium otherwise)")
+    parser.add_argument("--state", help="Game state JSON file to pick a move for")
+    parser.add_argument("--budget", type=float, help="Override the time budget (seconds)")
+    parser.add_argument("--benchmark", action="store_true", help="Self-play benchmark reporting moves/sec")
+    parser.add_argument("--games", type=int, default=10, help="Self-play games per difficulty for --benchmark")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    players = load_json(args.input)
+    if args.benchmark:
+        levels = [args.difficulty] if args.difficulty else list(DIFFICULTIES)
+        print(json.dumps(run_benchmark(players, levels, args.games, args.seed), indent=2))
+    elif args.state:
+        engine = AIOpponent(players, args.difficulty or 'medium', args.seed)
+        move = engine.choose_move(load_json(args.state), args.budget)
+        print(json.dumps({'move': move, **engine.last_search}, indent=2))
+    else:
+        parser.error("Pass --state or --benchmark")
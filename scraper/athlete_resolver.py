@@ -0,0 +1,189 @@
+"""
+Resolve two-sport athletes across the NFL and NBA databases.
+
+The two leagues use different ID schemes, so a player who appeared in both
+(e.g. Otto Graham, Bud Grant) ends up as two unrelated records. This module
+links them with a blocked hash join: NBA records are bucketed by
+(normalized last name, first three letters of the first name) and each NFL
+record only probes its own bucket, so the work grows linearly with the number
+of players instead of comparing every NFL/NBA pair.
+
+Each candidate pair is scored from:
+    name     - identical normalized names, or one first name a prefix of the
+               other ("Chris" / "Christopher")
+    college  - overlapping colleges (after colleges_grouped.json normalization)
+               raise confidence; known but disjoint colleges lower it
+    years    - careers that overlap or sit within a few years of each other
+               raise confidence; decades apart lowers it sharply
+
+Pairs are matched one-to-one, best first, and written as a cross-reference
+table. merge_players() adds a `same_as` field to records linked with at least
+LINK_CONFIDENCE, which graph tools can use to treat both records as one person.
+
+Usage:
+    python athlete_resolver.py
+    python athlete_resolver.py --nfl players_db_nfl.json --nba players_db_nba.json --min-confidence 0.5
+"""
+
+import argparse
+import re
+import unicodedata
+from pathlib import Path
+
+from college_normalizer import load_canonical_map
+from utils import load_json, save_json
+
+SCRAPER_DIR = Path(__file__).parent
+CROSSREF_PATH = SCRAPER_DIR / "two_sport_athletes.json"
+
+# Minimum confidence to keep a pair in the cross-reference table
+MIN_CONFIDENCE = 0.5
+# Minimum confidence for merge_players to link records via `same_as`
+LINK_CONFIDENCE = 0.8
+
+NAME_SUFFIXES = {'jr', 'sr', 'ii', 'iii', 'iv', 'v'}
+
+def normalize_name(name):
+    """Lowercase, strip accents, punctuation and generational suffixes."""
+    name = unicodedata.normalize('NFKD', name or '')
+    name = ''.join(c for c in name if not unicodedata.combining(c)).lower()
+    tokens = re.sub(r"[^a-z\s-]", '', name).replace('-', ' ').split()
+    while len(tokens) > 1 and tokens[-1] in NAME_SUFFIXES:
+        tokens.pop()
+    return tokens
+
+def block_key(tokens):
+    """
+    Blocking key for the hash join: (last name, first three letters of first name).
+
+    Any two names that score_pair can match share this key, since a first-name
+    prefix match needs at least three letters. Single-token names are not keyed.
+    """
+    if len(tokens) < 2:
+        return None
+    return (tokens[-1], tokens[0][:3])
+
+def _years(record):
+    try:
+        return int(record.get('start_year')), int(record.get('end_year'))
+    except (TypeError, ValueError):
+        return None
+
+def _colleges(record, col_map):
+    return {col_map.get(c, c).lower() for c in record.get('colleges') or []}
+
+def score_pair(nfl_tokens, nba_tokens, nfl_record, nba_record, col_map):
+    """
+    Score one candidate pair from the same block.
+
+    Returns:
+        (confidence, evidence list), or (0.0, []) if the names do not match
+    """
+    evidence = []
+    if nfl_tokens == nba_tokens:
+        confidence = 0.6
+        evidence.append('name')
+    else:
+        first_a, first_b = nfl_tokens[0], nba_tokens[0]
+        shorter, longer = sorted((first_a, first_b), key=len)
+        if len(shorter) < 3 or not longer.startswith(shorter):
+            return 0.0, []
+        confidence = 0.45
+        evidence.append('name_prefix')
+
+    nfl_colleges = _colleges(nfl_record, col_map)
+    nba_colleges = _colleges(nba_record, col_map)
+    if nfl_colleges and nba_colleges:
+        if nfl_colleges & nba_colleges:
+            confidence += 0.3
+            evidence.append('college')
+        else:
+            confidence -= 0.4
+
+    nfl_years, nba_years = _years(nfl_record), _years(nba_record)
+    if nfl_years and nba_years:
+        # Negative gap means the careers overlap
+        gap = max(nfl_years[0], nba_years[0]) - min(nfl_years[1], nba_years[1])
+        if gap <= 5:
+            confidence += 0.1
+            evidence.append('years')
+        elif gap > 12:
+            confidence -= 0.5
+
+    return round(max(0.0, min(1.0, confidence)), 2), evidence
+
+def resolve_athletes(nfl_data, nba_data, col_map=None, min_confidence=MIN_CONFIDENCE):
+    """
+    Match NFL and NBA records that belong to the same person.
+
+    Args:
+        nfl_data: NFL DB dict (player ID -> record)
+        nba_data: NBA DB dict (player ID -> record)
+        col_map: Optional college variant -> canonical map
+        min_confidence: Drop pairs scoring below this
+
+    Returns:
+        List of {'nfl_id', 'nba_id', 'name', 'confidence', 'evidence'} dicts,
+        highest confidence first; each ID appears at most once
+    """
+    col_map = col_map or {}
+
+    # Build side of the join
+    blocks = {}
+    for pid, record in nba_data.items():
+        tokens = normalize_name(record.get('name'))
+        key = block_key(tokens)
+        if key:
+            blocks.setdefault(key, []).append((pid, tokens, record))
+
+    # Probe side
+    candidates = []
+    for pid, record in nfl_data.items():
+        tokens = normalize_name(record.get('name'))
+        key = block_key(tokens)
+        if not key:
+            continue
+        for nba_id, nba_tokens, nba_record in blocks.get(key, ()):
+            confidence, evidence = score_pair(tokens, nba_tokens, record, nba_record, col_map)
+            if confidence >= min_confidence:
+                candidates.append((confidence, pid, nba_id, record.get('name'), evidence))
+
+    # One-to-one assignment, best first
+    candidates.sort(key=lambda c: (-c[0], c[1], c[2]))
+    matched_nfl, matched_nba = set(), set()
+    crossref = []
+    for confidence, nfl_id, nba_id, name, evidence in candidates:
+        if nfl_id in matched_nfl or nba_id in matched_nba:
+            continue
+        matched_nfl.add(nfl_id)
+        matched_nba.add(nba_id)
+        crossref.append({
+            'nfl_id': nfl_id,
+            'nba_id': nba_id,
+            'name': name,
+            'confidence': confidence,
+            'evidence': evidence,
+        })
+    return crossref
+
+def same_as_links(crossref, min_confidence=LINK_CONFIDENCE):
+    """Return {player ID: [linked IDs]} for cross-reference entries above a confidence."""
+    links = {}
+    for entry in crossref or []:
+        if entry['confidence'] >= min_confidence:
+            links.setdefault(entry['nfl_id'], []).append(entry['nba_id'])
+            links.setdefault(entry['nba_id'], []).append(entry['nfl_id'])
+    return links
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Find players who appear in both the NFL and NBA databases")
+    parser.add_argument("--nfl", default="players_db_nfl.json", help="Path to NFL DB")
+    parser.add_argument("--nba", default="players_db_nba.json", help="Path to NBA DB")
+    parser.add_argument("--output", default=str(CROSSREF_PATH), help="Cross-reference output path")
+    parser.add_argument("--min-confidence", type=float, default=MIN_CONFIDENCE, help="Minimum confidence to keep a pair")
+    args = parser.parse_args()
+
+    crossref = resolve_athletes(load_json(args.nfl), load_json(args.nba), load_canonical_map(), args.min_confidence)
+    save_json(crossref, args.output)
+    linked = sum(1 for entry in crossref if entry['confidence'] >= LINK_CONFIDENCE)
+    print(f"Found {len(crossref)} two-sport candidates ({linked} at or above {LINK_CONFIDENCE} confidence)")
@@ -0,0 +1,126 @@
+"""
+End-to-end pipeline throughput benchmark against local stand-in servers.
+
+Starts one fake_server.py process per league, points the pipeline at them via
+SCRAPER_NFL_BASE_URL / SCRAPER_NBA_BASE_URL, and runs run_scraper.run_pipeline
+into a temporary directory (the real DBs, page corpus, extraction cache and
+snapshots are never touched). Reports requests/sec, time spent sleeping vs
+working, 429 and failure counts, and peak memory.
+
+Usage:
+    python benchmark_pipeline.py
+    python benchmark_pipeline.py --players 20000 --latency 0.02 --rate-429 0.01
+    python benchmark_pipeline.py --leagues NBA --steps 1 3 4 --report bench.json
+"""
+
+import argparse
+import contextlib
+import importlib
+import io
+import json
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from fake_server import serve
+
+def start_server(league, args):
+    """Start a fake server in a child process; returns (process, base_url)."""
+    ready = multiprocessing.Queue()
+    proc = multiprocessing.Process(
+        target=serve,
+        kwargs=dict(league=league, port=0, players=args.players, latency=args.latency,
+                    rate_429=args.rate_429, failure_rate=args.failure_rate,
+                    retry_after=args.retry_after, seed=args.seed, ready=ready),
+        daemon=True,
+    )
+    proc.start()
+    port = ready.get(timeout=60)
+    return proc, f"http://127.0.0.1:{port}"
+
+def run_benchmark(args):
+    servers = [start_server(league, args) for league in ('NFL', 'NBA')]
+    os.environ['SCRAPER_NFL_BASE_URL'] = servers[0][1]
+    os.environ['SCRAPER_NBA_BASE_URL'] = servers[1][1]
+    os.environ['SCRAPER_REQUEST_DELAY'] = str(args.delay)
+
+    # Pipeline modules read base URLs and the request delay from config at
+    # import time; config was already loaded (by fake_server), so reload it
+    # before importing anything that copies those values.
+    import config
+    importlib.reload(config)
+    import extract_cache
+    import page_store
+    import profiling
+    import snapshot_store
+    import utils
+    from run_scraper import run_pipeline
+
+    with tempfile.TemporaryDirectory(prefix="scraper_bench_") as tmp:
+        tmp = Path(tmp)
+        page_store.CORPUS_DIR = tmp / "page_corpus"
+        extract_cache.CACHE_PATH = tmp / "extract_cache.sqlite"
+        snapshot_store.SNAPSHOT_DIR = tmp / "snapshots"
+        output = tmp / "backend" / "players_new.json"
+        output.parent.mkdir()
+
+        log = io.StringIO()
+        start_wall = time.perf_counter()
+        start_cpu = time.process_time()
+        with contextlib.redirect_stdout(log if not args.verbose else sys.stdout):
+            run_pipeline(args.leagues, args.steps, str(output), data_dir=tmp, items_file=tmp / "items.json")
+        wall = time.perf_counter() - start_wall
+        cpu = time.process_time() - start_cpu
+
+        merged_players = len(utils.load_json(output)) if output.exists() else 0
+
+    for proc, _ in servers:
+        proc.terminate()
+
+    stats = utils.REQUEST_STATS
+    sleep_s = stats['sleep_seconds']
+    report = {
+        'players_per_league': args.players,
+        'leagues': args.leagues,
+        'steps': args.steps,
+        'request_delay': args.delay,
+        'server_latency': args.latency,
+        'requests': stats['requests'],
+        'rate_limited': stats['rate_limited'],
+        'failures': stats['failures'],
+        'circuit_trips': stats['circuit_trips'],
+        'wall_seconds': round(wall, 2),
+        'sleep_seconds': round(sleep_s, 2),
+        'work_seconds': round(wall - sleep_s, 2),
+        'cpu_seconds': round(cpu, 2),
+        'requests_per_sec': round(stats['requests'] / wall, 1) if wall else None,
+        'requests_per_work_sec': round(stats['requests'] / (wall - sleep_s), 1) if wall > sleep_s else None,
+        'peak_rss_mb': round(profiling.peak_rss_mb() or 0, 1),
+        'merged_players': merged_players,
+        'extract_cache': extract_cache.stats(),
+    }
+    return report
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Benchmark the full pipeline against local fake servers")
+    parser.add_argument("--players", type=int, default=2000, help="Synthetic players per league")
+    parser.add_argument("--latency", type=float, default=0.0, help="Server latency per request (seconds)")
+    parser.add_argument("--rate-429", type=float, default=0.0, help="Fraction of requests answered with 429")
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="Fraction of requests answered with 503")
+    parser.add_argument("--retry-after", type=int, default=1, help="Retry-After seconds sent with 429s")
+    parser.add_argument("--delay", type=float, default=0.0, help="Client request delay (default: 0, no rate limit)")
+    parser.add_argument("--leagues", nargs="+", choices=["NBA", "NFL"], default=["NBA", "NFL"])
+    parser.add_argument("--steps", nargs="+", type=int, choices=[1, 2, 3, 4, 5], default=[1, 3, 4, 5])
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--report", help="Write the report as JSON to this path")
+    parser.add_argument("--verbose", action="store_true", help="Show pipeline output")
+    args = parser.parse_args()
+
+    report = run_benchmark(args)
+    print(json.dumps(report, indent=2))
+    if args.report:
+        with open(args.report, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
@@ -0,0 +1,389 @@
+"""
+Freshness-maximizing crawl under a fixed time budget.
+
+A full refresh is thousands of requests at 20/minute. When only a short
+window is available, this module scores every candidate URL across all
+fetchers by the expected value of refetching it now and spends the budget on
+the most valuable requests first:
+
+    value = P(page changed since last fetch) * (1 + ln(1 + active players on it))
+
+P(changed) uses each URL's history in the page corpus (page_store.py): its
+observed change count over the time it has been tracked, smoothed with a prior
+of one change per REFRESH_CADENCES period for its page family, under a
+Poisson model. URLs never fetched get P = 1. "Active" players are those whose
+end_year is the current or previous season.
+
+Discovery pages (NFL team list, NFL schools list) are only fetched when they
+are missing from the corpus or older than their family cadence; their cost is
+taken out of the budget first. Selected pages are then fetched best first and
+merged with the same functions the fetchers use; the only reordering is that a
+league's selected index pages go before its other pages, since they create the
+players those pages update. The number of pages that fit is estimated from the
+measured time per request: if requests are slower than expected, the budget
+runs out on the least valuable pages, and if time is left once the selection is
+fetched, the remaining candidates are planned again. The crawl stops when the
+wall-clock budget is spent, and a coverage report lists what was refreshed and
+what was deferred.
+
+Usage:
+    python budget_crawl.py --budget 30
+    python budget_crawl.py --budget 10 --leagues NBA --dry-run
+    python run_scraper.py --budget 30           # then step 5
+"""
+
+import argparse
+import math
+import time
+from datetime import datetime
+from pathlib import Path
+
+import requests
+
+import page_store
+from config import (
+    NFL_BASE_URL, NBA_BASE_URL, NFL_LETTERS, NBA_LETTERS, NBA_TEAMS, NUMS,
+    REFRESH_CADENCES, REQUEST_DELAY
+)
+from fetch_players import index_url, extract_players_from_index, apply_index_players
+from fetch_teams import (
+    teams_list_url, uniform_url, franchise_url,
+    extract_active_teams_nfl, extract_player_data_uniform, extract_player_ids_pfr,
+    apply_uniform_rows, apply_roster_ids
+)
+from fetch_numbers import number_url, extract_player_ids, apply_number_ids
+from fetch_colleges import schools_url, extract_schools, extract_school_player_ids, apply_school_ids
+from utils import CircuitOpenError, fetch_with_retry, load_json, save_json
+
+SCRAPER_DIR = Path(__file__).parent
+
+# Expected wall-clock cost of one request (the rate-limit delay plus latency)
+# until pages have been fetched; then the measured average is used
+REQUEST_SECONDS = REQUEST_DELAY + 0.5
+
+# Pipeline order, used to break ties between equally valuable pages
+FAMILY_ORDER = ['players_index', 'nfl_uniform', 'nba_franchise', 'nba_numbers', 'nfl_school']
+
+# REFRESH_CADENCES key per (family, league)
+CADENCE_KEYS = {
+    ('players_index', 'NFL'): 'nfl_players',
+    ('players_index', 'NBA'): 'nba_players',
+    ('nfl_uniform', 'NFL'): 'nfl_uniforms',
+    ('nba_franchise', 'NBA'): 'nba_teams',
+    ('nba_numbers', 'NBA'): 'nba_numbers',
+    ('nfl_school', 'NFL'): 'nfl_colleges',
+}
+
+def change_probability(info, cadence_hours, now):
+    """
+    Probability that a page changed since it was last fetched.
+
+    Args:
+        info: page_store.page_info() dict, or None if never fetched
+        cadence_hours: Family cadence, used as the prior change interval
+        now: Current Unix time
+    """
+    if info is None:
+        return 1.0
+    age_days = max(0.0, now - info['last_fetched']) / 86400
+    tracked_days = max(0.0, info['last_fetched'] - info['first_fetched']) / 86400
+    prior_days = cadence_hours / 24
+    rate = (info['change_count'] + 1) / (tracked_days + prior_days)
+    return 1 - math.exp(-rate * age_days)
+
+def fetch_order(jobs):
+    """
+    Order jobs (sorted best first) for fetching.
+
+    Jobs keep their value order, except that a league's index pages are
+    moved ahead of its first page from another family: index pages create
+    the players that team, number and college pages update.
+    """
+    index_jobs = {}
+    for job in jobs:
+        if job['family'] == 'players_index':
+            index_jobs.setdefault(job['league'], []).append(job)
+    ordered = []
+    queued = set()
+    for job in jobs:
+        if job['family'] != 'players_index':
+            for index_job in index_jobs.pop(job['league'], []):
+                if id(index_job) not in queued:
+                    ordered.append(index_job)
+                    queued.add(id(index_job))
+        if id(job) not in queued:
+            ordered.append(job)
+            queued.add(id(job))
+    return ordered
+
+class ActivityIndex:
+    """Counts of active players per page, from the current league DBs."""
+
+    def __init__(self, dbs, season=None):
+        season = season or datetime.now().year
+        self.by_letter = {}
+        self.by_team_number = {}
+        self.by_team = {}
+        self.by_number = {}
+        self.by_college = {}
+        for league, players in dbs.items():
+            for pid, record in players.items():
+                try:
+                    active = int(record.get('end_year') or 0) >= season - 1
+                except ValueError:
+                    active = False
+                if not active:
+                    continue
+                self._add(self.by_letter, (league, pid[0].lower()))
+                for team in record.get('teams') or []:
+                    self._add(self.by_team, team)
+                    for num in record.get('numbers') or []:
+                        self._add(self.by_team_number, (team, num))
+                for num in record.get('numbers') or []:
+                    self._add(self.by_number, (league, num))
+                for college in record.get('colleges') or []:
+                    self._add(self.by_college, (league, college))
+
+    @staticmethod
+    def _add(counts, key):
+        counts[key] = counts.get(key, 0) + 1
+
+class BudgetCrawler:
+    """Plans and runs a budgeted crawl over the league DBs in data_dir."""
+
+    def __init__(self, budget_seconds, leagues=('NFL', 'NBA'), data_dir=SCRAPER_DIR, session=None):
+        self.budget_seconds = budget_seconds
+        self.leagues = [league.upper() for league in leagues]
+        self.data_dir = Path(data_dir)
+        self.db_paths = {league: self.data_dir / f"players_db_{league.lower()}.json" for league in self.leagues}
+        self.dbs = {league: load_json(path) for league, path in self.db_paths.items()}
+        self.session = session or requests.Session()
+        if session is None:
+            self.session.headers.update({
+                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/114.0.0.0 Safari/537.36'
+            })
+        self.start = time.time()
+        self.discovery_requests = 0
+        self.fetched_pages = 0
+        self.fetch_seconds = 0.0
+
+    def remaining_seconds(self):
+        return self.budget_seconds - (time.time() - self.start)
+
+    def request_seconds(self):
+        """Average wall-clock seconds per page fetched so far (REQUEST_SECONDS before any)."""
+        if not self.fetched_pages:
+            return REQUEST_SECONDS
+        return self.fetch_seconds / self.fetched_pages
+
+    def _discover(self, url, family, extract, *args):
+        """Return a list page's rows, refetching it if missing or older than its cadence."""
+        info = page_store.page_info(url)
+        stale = info is None or time.time() - info['last_fetched'] > REFRESH_CADENCES[family] * 3600
+        if stale and self.remaining_seconds() > self.request_seconds():
+            try:
+                self.discovery_requests += 1
+                return extract(fetch_with_retry(url, self.session).text, *args)
+            except Exception as e:
+                print(f"Error fetching {url}: {e}")
+        body = page_store.get_body(url)
+        return extract(body, *args) if body is not None else []
+
+    def candidates(self):
+        """
+        Enumerate every candidate page with its merge callback.
+
+        Returns:
+            List of dicts: family, league, url, extract (callable taking the
+            body), apply (callable taking the extracted rows), active (count)
+        """
+        activity = ActivityIndex(self.dbs)
+        jobs = []
+
+        def add(family, league, url, active, extract, apply):
+            jobs.append({'family': family, 'league': league, 'url': url, 'active': active,
+                         'extract': extract, 'apply': apply})
+
+        for league in self.leagues:
+            players = self.dbs[league]
+            base_url, letters = (NFL_BASE_URL, NFL_LETTERS) if league == 'NFL' else (NBA_BASE_URL, NBA_LETTERS)
+            for letter in letters:
+                add('players_index', league, index_url(base_url, letter),
+                    activity.by_letter.get((league, letter.lower()), 0),
+                    lambda body, b=base_url, l=league: extract_players_from_index(body, b, l),
+                    lambda rows, p=players, l=league: apply_index_players(p, rows, l))
+
+            if league == 'NFL':
+                teams = self._discover(teams_list_url(NFL_BASE_URL), 'nfl_team_list', extract_active_teams_nfl)
+                for abbr, _ in teams:
+                    team_code = f"nfl_{abbr.upper()}"
+                    for num in NUMS:
+                        add('nfl_uniform', league, uniform_url(NFL_BASE_URL, abbr, num),
+                            activity.by_team_number.get((team_code, num), 0),
+                            lambda body, t=team_code: extract_player_data_uniform(body, t),
+                            lambda rows, p=players, t=team_code, n=num: apply_uniform_rows(p, rows, t, n))
+                schools = self._discover(schools_url(NFL_BASE_URL), 'nfl_colleges', extract_schools, NFL_BASE_URL)
+                for school_name, school_url, _ in schools:
+                    add('nfl_school', league, school_url,
+                        activity.by_college.get((league, school_name), 0),
+                        extract_school_player_ids,
+                        lambda rows, p=players, s=school_name: apply_school_ids(p, rows, s))
+            else:
+                for team in NBA_TEAMS:
+                    add('nba_franchise', league, franchise_url(NBA_BASE_URL, team),
+                        activity.by_team.get(f"nba_{team}", 0),
+                        extract_player_ids_pfr,
+                        lambda rows, p=players, t=f"nba_{team}": apply_roster_ids(p, rows, t))
+                for num in NUMS:
+                    add('nba_numbers', league, number_url(NBA_BASE_URL, num),
+                        activity.by_number.get((league, num), 0),
+                        extract_player_ids,
+                        lambda rows, p=players, n=num: apply_number_ids(p, rows, n))
+        return jobs
+
+    def score(self):
+        """Score every candidate page; returns them best first."""
+        now = time.time()
+        history = page_store.all_page_info()
+        jobs = self.candidates()
+        for job in jobs:
+            cadence = REFRESH_CADENCES[CADENCE_KEYS[(job['family'], job['league'])]]
+            info = history.get(job['url'])
+            job['p_change'] = change_probability(info, cadence, now)
+            job['last_fetched'] = info['last_fetched'] if info else None
+            job['value'] = job['p_change'] * (1 + math.log1p(job['active']))
+        # Ties (e.g. a cold corpus where every page has P = 1) go to earlier pipeline families
+        order = {family: i for i, family in enumerate(FAMILY_ORDER)}
+        jobs.sort(key=lambda j: (-j['value'], order[j['family']], j['url']))
+        return jobs
+
+    def plan(self, jobs=None):
+        """
+        Split candidates into (selected, deferred) for the time left, best first.
+
+        Args:
+            jobs: Scored candidates, best first (default: score() them now)
+        """
+        if jobs is None:
+            jobs = self.score()
+        slots = max(0, int(self.remaining_seconds() // self.request_seconds()))
+        return jobs[:slots], jobs[slots:]
+
+    def fetch(self, job, refreshed, failed, deferred):
+        """Fetch and merge one page, filing the job under refreshed, failed or deferred."""
+        before = page_store.page_info(job['url'])
+        start = time.time()
+        try:
+            body = fetch_with_retry(job['url'], self.session).text
+        except CircuitOpenError as e:
+            # The family is paused; leave its pages for the next run
+            print(f"Deferring {job['url']}: {e}")
+            deferred.append(job)
+            return
+        except Exception as e:
+            print(f"Error fetching {job['url']}: {e}")
+            failed.append(job)
+            return
+        finally:
+            self.fetched_pages += 1
+            self.fetch_seconds += time.time() - start
+        rows = job['extract'](body)
+        if rows:
+            job['apply'](rows)
+        after = page_store.page_info(job['url'])
+        job['changed'] = before is None or (after is not None and after['body_hash'] != before['body_hash'])
+        refreshed.append(job)
+
+    def run(self, dry_run=False):
+        """
+        Plan and (unless dry_run) fetch the selected pages, then save the DBs.
+
+        Returns:
+            Coverage report dict
+        """
+        jobs = self.score()
+        selected, deferred = self.plan(jobs)
+        print(f"Budget {self.budget_seconds / 60:.1f} min: {len(selected)} pages selected, "
+              f"{len(deferred)} deferred ({self.discovery_requests} discovery requests)")
+
+        refreshed, failed = [], []
+        if not dry_run:
+            # Candidates not yet attempted, best first; deferred is rebuilt from what is left
+            unplanned, deferred = deferred, []
+            try:
+                while selected:
+                    queue = fetch_order(selected)
+                    for i, job in enumerate(queue):
+                        if self.remaining_seconds() < self.request_seconds():
+                            deferred.extend(queue[i:])
+                            print("Time budget spent; deferring the rest.")
+                            break
+                        self.fetch(job, refreshed, failed, deferred)
+                    else:
+                        # Requests were faster than estimated: spend the rest on the next best pages
+                        if unplanned and self.remaining_seconds() >= self.request_seconds():
+                            selected, unplanned = self.plan(unplanned)
+                            print(f"{self.remaining_seconds():.0f}s of the budget left; "
+                                  f"re-planned {len(selected)} more pages")
+                            continue
+                    break
+                deferred.extend(unplanned)
+            finally:
+                for league, path in self.db_paths.items():
+                    save_json(self.dbs[league], path)
+
+        report = self.coverage_report(selected if dry_run else refreshed, deferred, failed, dry_run)
+        save_json(report, self.data_dir / "budget_coverage.json")
+        for family, stats in report['families'].items():
+            print(f"  {family:15s} refreshed {stats['refreshed']:5d}  deferred {stats['deferred']:5d}  "
+                  f"value covered {stats['value_covered']:.0%}")
+        return report
+
+    def coverage_report(self, refreshed, deferred, failed, dry_run):
+        def entry(job):
+            item = {k: job[k] for k in ('family', 'league', 'url', 'active', 'last_fetched')}
+            item['p_change'] = round(job['p_change'], 3)
+            item['value'] = round(job['value'], 3)
+            if 'changed' in job:
+                item['changed'] = job['changed']
+            return item
+
+        families = {}
+        for status, jobs in (('refreshed', refreshed), ('deferred', deferred), ('failed', failed)):
+            for job in jobs:
+                stats = families.setdefault(job['family'], {'refreshed': 0, 'deferred': 0, 'failed': 0,
+                                                            'value_refreshed': 0.0, 'value_total': 0.0})
+                stats[status] += 1
+                stats['value_total'] += job['value']
+                if status == 'refreshed':
+                    stats['value_refreshed'] += job['value']
+        for stats in families.values():
+            stats['value_covered'] = stats['value_refreshed'] / stats['value_total'] if stats['value_total'] else 1.0
+            stats['value_refreshed'] = round(stats['value_refreshed'], 2)
+            stats['value_total'] = round(stats['value_total'], 2)
+
+        return {
+            'generated_at': datetime.now().isoformat(timespec='seconds'),
+            'dry_run': dry_run,
+            'budget_seconds': self.budget_seconds,
+            'elapsed_seconds': round(time.time() - self.start, 1),
+            'discovery_requests': self.discovery_requests,
+            'families': families,
+            'refreshed': [entry(job) for job in refreshed],
+            'failed': [entry(job) for job in failed],
+            'deferred': [entry(job) for job in deferred],
+        }
+
+def budget_crawl(budget_minutes, leagues=('NFL', 'NBA'), data_dir=SCRAPER_DIR, dry_run=False):
+    """Run a budgeted crawl of at most budget_minutes; returns the coverage report."""
+    return BudgetCrawler(budget_minutes * 60, leagues, data_dir).run(dry_run)
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Refresh the most valuable pages within a time budget")
+    parser.add_argument("--budget", type=float, required=True, help="Time budget in minutes")
+    parser.add_argument("--leagues", nargs="+", choices=["NBA", "NFL"], default=["NBA", "NFL"])
+    parser.add_argument("--data-dir", default=str(SCRAPER_DIR), help="Directory with the league DBs")
+    parser.add_argument("--dry-run", action="store_true", help="Plan and report without fetching")
+    args = parser.parse_args()
+
+    budget_crawl(args.budget, args.leagues, args.data_dir, args.dry_run)
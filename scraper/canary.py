@@ -0,0 +1,169 @@
+"""
+Canary probes and zero-yield watchdogs for site layout changes.
+
+If Sports Reference renames a table id (teams_active, uniform_number,
+all_players, ...), the extractors quietly return [] and a crawl can spend
+hours of rate-limited requests producing an empty or degraded DB. Two guards:
+
+Preflight: before crawling, fetch one or two known pages per page family and
+check that each yields at least a minimum number of rows with the expected
+fields. run_pipeline() skips the steps whose families fail; if a league's
+player index fails, that whole league is skipped, and if every probe fails
+the crawl is aborted.
+
+Watchdog: during the crawl, each fetch loop reports how many rows every page
+yielded. After ZERO_YIELD_LIMITS[family] consecutive successfully fetched
+pages with no rows, ZeroYieldWatchdog (in utils.py, next to fetch_with_retry)
+raises LayoutChangeError and the step stops early.
+
+Usage:
+    python canary.py                    # probe every family for both leagues
+    python canary.py --leagues NBA
+    python run_scraper.py --skip-preflight
+"""
+
+import argparse
+
+import requests
+
+from config import NFL_BASE_URL, NBA_BASE_URL, NFL_LETTERS, NBA_LETTERS
+from fetch_players import index_url, extract_players_from_index
+from fetch_teams import (
+    teams_list_url, uniform_url, franchise_url,
+    extract_active_teams_nfl, extract_player_data_uniform, extract_player_ids_pfr
+)
+from fetch_numbers import number_url, extract_player_ids
+from fetch_colleges import schools_url, extract_schools, extract_school_player_ids
+from utils import fetch_with_retry
+
+# (league, family) -> pipeline step that depends on it
+FAMILY_STEPS = {
+    ('NFL', 'players_index'): 1,
+    ('NBA', 'players_index'): 1,
+    ('NFL', 'nfl_team_list'): 3,
+    ('NFL', 'nfl_uniform'): 3,
+    ('NBA', 'nba_franchise'): 3,
+    ('NFL', 'nfl_schools'): 4,
+    ('NFL', 'nfl_school'): 4,
+    ('NBA', 'nba_numbers'): 4,
+}
+
+# Known pages: numbers worn by many players on every franchise, a big franchise
+UNIFORM_CANARY_NUMBERS = ['12', '80']
+NBA_CANARY_TEAM = 'CHI'
+NBA_CANARY_NUMBER = '23'
+
+def _field_ok(row, field):
+    if isinstance(row, dict):
+        return bool(row.get(field))
+    return bool(row[field])
+
+def probe(session, family, urls, extract, min_rows, fields=()):
+    """
+    Fetch canary pages for one family and check what the extractor returns.
+
+    Args:
+        session: requests.Session
+        family: Page family name
+        urls: One or more known URLs for the family
+        extract: Callable taking a page body and returning rows
+        min_rows: Minimum total rows across the URLs
+        fields: Keys (dict rows) or indexes (list rows) that must be set in
+            at least 90% of rows; empty for plain ID lists
+
+    Returns:
+        (ok, rows, detail) tuple
+    """
+    rows = []
+    for url in urls:
+        try:
+            rows += extract(fetch_with_retry(url, session).text)
+        except Exception as e:
+            return False, rows, f"fetch failed for {url}: {e}"
+    if len(rows) < min_rows:
+        return False, rows, f"{len(rows)} rows from {len(urls)} page(s), expected at least {min_rows}"
+    for field in fields or [None]:
+        filled = sum(1 for row in rows if (_field_ok(row, field) if field is not None else bool(row)))
+        if filled < 0.9 * len(rows):
+            label = field if field is not None else 'value'
+            return False, rows, f"only {filled}/{len(rows)} rows have {label}"
+    return True, rows, f"{len(rows)} rows"
+
+def preflight(leagues, steps=(1, 3, 4), session=None):
+    """
+    Probe every page family the requested steps depend on.
+
+    Args:
+        leagues: Leagues to probe
+        steps: Pipeline steps that will run (families of other steps are not probed)
+        session: Optional requests.Session
+
+    Returns:
+        (blocked, results): blocked maps each league to the set of steps to
+        skip; results lists (league, family, ok, detail) per probe
+    """
+    if session is None:
+        session = requests.Session()
+        session.headers.update({
+            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64)'
+        })
+    steps = set(steps)
+    results = []
+
+    def check(league, family, urls, extract, min_rows, fields=()):
+        if FAMILY_STEPS[(league, family)] not in steps:
+            return None
+        ok, rows, detail = probe(session, family, urls, extract, min_rows, fields)
+        print(f"  [{'ok' if ok else 'FAIL'}] {league} {family}: {detail}")
+        results.append((league, family, ok, detail))
+        return rows if ok else None
+
+    print("Preflight: probing known pages per page family...")
+    for league in leagues:
+        league = league.upper()
+        if league == 'NFL':
+            check(league, 'players_index', [index_url(NFL_BASE_URL, NFL_LETTERS[0])],
+                  lambda body: extract_players_from_index(body, NFL_BASE_URL, league), 10,
+                  ('name', 'url', 'start_year'))
+            teams = check(league, 'nfl_team_list', [teams_list_url(NFL_BASE_URL)],
+                          extract_active_teams_nfl, 28, (0, 1))
+            if teams:
+                abbr = teams[0][0]
+                team_code = f"nfl_{abbr.upper()}"
+                check(league, 'nfl_uniform', [uniform_url(NFL_BASE_URL, abbr, num) for num in UNIFORM_CANARY_NUMBERS],
+                      lambda body: extract_player_data_uniform(body, team_code), 1, ('id', 'start_year'))
+            schools = check(league, 'nfl_schools', [schools_url(NFL_BASE_URL)],
+                            lambda body: extract_schools(body, NFL_BASE_URL), 20, (0, 1))
+            if schools:
+                check(league, 'nfl_school', [schools[0][1]], extract_school_player_ids, 1)
+        else:
+            check(league, 'players_index', [index_url(NBA_BASE_URL, NBA_LETTERS[0])],
+                  lambda body: extract_players_from_index(body, NBA_BASE_URL, league), 10,
+                  ('name', 'url', 'start_year'))
+            check(league, 'nba_franchise', [franchise_url(NBA_BASE_URL, NBA_CANARY_TEAM)],
+                  extract_player_ids_pfr, 10)
+            check(league, 'nba_numbers', [number_url(NBA_BASE_URL, NBA_CANARY_NUMBER)],
+                  extract_player_ids, 5)
+
+    blocked = {league.upper(): set() for league in leagues}
+    for league, family, ok, _ in results:
+        if not ok:
+            blocked[league].add(FAMILY_STEPS[(league, family)])
+    # Without a player index the other steps would only add to a stale DB
+    for skipped in blocked.values():
+        if 1 in skipped:
+            skipped.update({1, 3, 4})
+    return blocked, results
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Probe known pages to detect site layout changes")
+    parser.add_argument("--leagues", nargs="+", choices=["NBA", "NFL"], default=["NBA", "NFL"])
+    args = parser.parse_args()
+
+    blocked, results = preflight(args.leagues)
+    for league, skipped in blocked.items():
+        if skipped:
+            print(f"{league}: run_scraper would skip steps {sorted(skipped)}")
+    if not all(ok for _, _, ok, _ in results):
+        raise SystemExit(1)
+    print(f"All {len(results)} probes passed.")
@@ -53,16 +53,20 @@ def normalize_players(col_map, players):
                 count += 1
     return count
 
+def load_canonical_map():
+    """Load colleges_grouped.json and return the variant -> canonical map (None if missing)."""
+    if not GROUPED_COLLEGES_PATH.exists():
+        print(f"Error: {GROUPED_COLLEGES_PATH} not found. Cannot normalize.")
+        return None
+    return build_canonical_map(load_json(GROUPED_COLLEGES_PATH))
+
 def run_normalization(input_path, output_path=None):
     if not output_path:
         output_path = input_path
         
-    if not GROUPED_COLLEGES_PATH.exists():
-        print(f"Error: {GROUPED_COLLEGES_PATH} not found. Cannot normalize.")
+    col_map = load_canonical_map()
+    if col_map is None:
         return
-
-    grouped = load_json(GROUPED_COLLEGES_PATH)
-    col_map = build_canonical_map(grouped)
     
     players = load_json(input_path)
     print(f"Normalizing colleges for {len(players)} players...")
@@ -0,0 +1,154 @@
+"""
+Columnar Arrow/Parquet export of the merged player data.
+
+players_new.json is one pretty-printed dict keyed by player ID, so any
+analysis starts with json.load of the whole file and Python loops. Step 5
+also writes the same data as a Parquet dataset partitioned by league:
+
+    players_dataset/league=NBA/part-0.parquet
+    players_dataset/league=NFL/part-0.parquet
+
+Columns: id, name, url, start_year and end_year (int16, null when missing),
+teams, numbers, colleges and same_as (list<string>). Any Arrow-aware tool
+can then query it vectorized:
+
+    import pyarrow.dataset as ds
+    table = ds.dataset("players_dataset", partitioning="hive").to_table(
+        filter=ds.field("end_year") >= 2000)
+
+pyarrow is an optional dependency: without it, step 5 skips the export.
+
+Usage:
+    python columnar_export.py
+    python columnar_export.py --input ../ballknower/public/backend/players_new.json --format ipc
+    python columnar_export.py --summary
+"""
+
+import argparse
+import shutil
+import time
+from pathlib import Path
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.dataset as ds
+except ImportError:  # Optional dependency (pip install pyarrow)
+    pa = None
+
+from utils import load_json
+
+SCRAPER_DIR = Path(__file__).parent
+DATASET_DIR = SCRAPER_DIR / "players_dataset"
+DEFAULT_PLAYERS_PATH = Path("../ballknower/public/backend/players_new.json")
+
+STRING_FIELDS = ('id', 'name', 'url', 'league')
+YEAR_FIELDS = ('start_year', 'end_year')
+LIST_FIELDS = ('teams', 'numbers', 'colleges', 'same_as')
+
+def _year(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+def player_columns(players):
+    """
+    Column lists for a players dict, in player ID order.
+
+    Returns:
+        Dict of column name -> list of values (years as int or None, list
+        fields as lists of strings)
+    """
+    columns = {name: [] for name in STRING_FIELDS + YEAR_FIELDS + LIST_FIELDS}
+    for pid in sorted(players):
+        record = players[pid]
+        columns['id'].append(pid)
+        for name in ('name', 'url', 'league'):
+            columns[name].append(record.get(name))
+        for name in YEAR_FIELDS:
+            columns[name].append(_year(record.get(name)))
+        for name in LIST_FIELDS:
+            columns[name].append([str(value) for value in record.get(name) or []])
+    return columns
+
+def player_schema():
+    return pa.schema(
+        [(name, pa.string()) for name in STRING_FIELDS] +
+        [(name, pa.int16()) for name in YEAR_FIELDS] +
+        [(name, pa.list_(pa.string())) for name in LIST_FIELDS]
+    )
+
+def export_players(players_path, output_dir=DATASET_DIR, file_format='parquet'):
+    """
+    Write players_path as an Arrow dataset partitioned by league.
+
+    Args:
+        players_path: Merged player data (players_new.json)
+        output_dir: Dataset directory (replaced on every export)
+        file_format: 'parquet' or 'ipc' (Arrow/Feather files)
+
+    Returns:
+        Output directory, or None if pyarrow is not installed or there is no data
+    """
+    if pa is None:
+        print("pyarrow is not installed; skipping columnar export (pip install pyarrow).")
+        return None
+    players = load_json(players_path)
+    if not players:
+        print(f"No players in {players_path}; skipping columnar export.")
+        return None
+
+    table = pa.Table.from_pydict(player_columns(players), schema=player_schema())
+    output_dir = Path(output_dir)
+    # Write next to the old dataset and swap, so readers never see a partial one
+    tmp_dir = output_dir.with_name(output_dir.name + '.tmp')
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    ds.write_dataset(
+        table, tmp_dir, format=file_format,
+        partitioning=ds.partitioning(pa.schema([('league', pa.string())]), flavor='hive'),
+        basename_template=f"part-{{i}}.{'parquet' if file_format == 'parquet' else 'arrow'}",
+    )
+    shutil.rmtree(output_dir, ignore_errors=True)
+    tmp_dir.rename(output_dir)
+    print(f"Exported {table.num_rows} players to {output_dir} ({file_format}, partitioned by league)")
+    return output_dir
+
+def load_players_table(dataset_dir=DATASET_DIR, file_format='parquet'):
+    """Read the exported dataset back as one pyarrow Table (league restored from the partitions)."""
+    return ds.dataset(dataset_dir, format=file_format, partitioning='hive').to_table()
+
+def summarize(table):
+    """Per-league player counts, career spans and attribute totals, computed with pyarrow.compute."""
+    summary = {}
+    for league in sorted(pc.unique(table['league']).to_pylist()):
+        rows = table.filter(pc.equal(table['league'], league))
+        span = pc.subtract(rows['end_year'], rows['start_year'])
+        summary[league] = {
+            'players': rows.num_rows,
+            'first_year': pc.min(rows['start_year']).as_py(),
+            'last_year': pc.max(rows['end_year']).as_py(),
+            'mean_career_years': round(pc.mean(span).as_py() or 0, 2),
+            'team_stints': pc.sum(pc.list_value_length(rows['teams'])).as_py(),
+            'with_college': pc.sum(pc.greater(pc.list_value_length(rows['colleges']), 0)).as_py(),
+        }
+    return summary
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Export the merged player data as a partitioned Arrow dataset")
+    parser.add_argument("--input", default=str(DEFAULT_PLAYERS_PATH), help="Merged players JSON file")
+    parser.add_argument("--output-dir", default=str(DATASET_DIR), help=f"Dataset directory (default: {DATASET_DIR.name}/)")
+    parser.add_argument("--format", choices=['parquet', 'ipc'], default='parquet', help="File format")
+    parser.add_argument("--summary", action="store_true", help="Summarize the existing dataset instead of exporting")
+    args = parser.parse_args()
+
+    if pa is None:
+        raise SystemExit("columnar_export.py needs pyarrow (pip install pyarrow)")
+    if not args.summary:
+        export_players(args.input, args.output_dir, args.format)
+
+    start_time = time.perf_counter()
+    table = load_players_table(args.output_dir, args.format)
+    for league, stats in summarize(table).items():
+        print(f"{league}: " + ", ".join(f"{k}={v}" for k, v in stats.items()))
+    print(f"Loaded and summarized {table.num_rows} players in {(time.perf_counter() - start_time) * 1000:.1f} ms")
@@ -5,9 +5,34 @@ Contains base URLs, team codes, jersey numbers, and letter ranges
 for iterating through Sports Reference websites.
 """
 
-# Base URLs for Sports Reference sites
-NBA_BASE_URL = 'https://www.basketball-reference.com'
-NFL_BASE_URL = 'https://www.pro-football-reference.com'
+import os
+
+# Base URLs for Sports Reference sites.
+# Overridable via environment so the pipeline can run against a local
+# stand-in server (see fake_server.py / benchmark_pipeline.py).
+NBA_BASE_URL = os.environ.get('SCRAPER_NBA_BASE_URL', 'https://www.basketball-reference.com')
+NFL_BASE_URL = os.environ.get('SCRAPER_NFL_BASE_URL', 'https://www.pro-football-reference.com')
+
+# Delay before each request in seconds (20 requests/minute, with margin).
+# Only lower this when pointing the base URLs at a local stand-in server.
+REQUEST_DELAY = float(os.environ.get('SCRAPER_REQUEST_DELAY', '3.1'))
+
+# Retry policy for fetch_with_retry (utils.py). Backoff sleeps are jittered so
+# retries of different URLs don't line up; 429s are counted separately from
+# network errors and 5xx responses. A page family (per host) whose requests
+# keep failing or getting 429s has its circuit opened: its URLs are deferred
+# and re-queued instead of each one grinding through its own retries.
+RETRY_POLICY = {
+  "max_retries": 5,             # Attempts per URL for network errors and 5xx
+  "max_rate_limited": 3,        # 429 responses tolerated per URL
+  "backoff_base": 2.0,          # Seconds before the first retry, doubled per attempt
+  "backoff_cap": 60.0,
+  "breaker_rate_limited": 3,    # Different URLs 429'd since the last success that open a family's circuit
+  "breaker_failures": 3,        # Consecutive failed URLs in a family that open it
+  "breaker_cooldown": 60.0,     # First pause in seconds, doubled on every re-trip
+  "breaker_cooldown_cap": 900.0,
+  "max_deferrals": 3,           # Times a URL is re-queued before it is given up
+}
 
 # Letters to iterate over for player lists
 # NBA uses lowercase, NFL uses uppercase
@@ -38,3 +63,16 @@ NBA_TEAMS = [
 # NFL teams are dynamically fetched from Pro-Football-Reference
 # (scraped from /teams/ page to ensure current/accurate abbreviations)
 NFL_TEAMS = []
+
+# Refresh cadences (in hours) per page family for the refresh daemon.
+# Current-season data (player index end years, NBA franchise registers) changes
+# daily during the season; the large historical crawls rarely change.
+REFRESH_CADENCES = {
+  "nfl_players": 24,          # A-Z index: new players, end_year updates (26 requests)
+  "nba_players": 24,          # A-Z index incl. colleges (26 requests)
+  "nba_teams": 24,            # Franchise registers (30 requests)
+  "nba_numbers": 24 * 7,      # Jersey number pages (101 requests)
+  "nfl_team_list": 24 * 30,   # Active franchises list (1 request)
+  "nfl_uniforms": 24 * 30,    # Uniform pages (~3,200 requests)
+  "nfl_colleges": 24 * 30,    # School pages (hundreds of requests)
+}
@@ -0,0 +1,188 @@
+"""
+Generate the daily challenge item pool from graph centrality.
+
+dailyAutomater/script.js picks a random start item and a random end item from
+another league out of items.json ({id, league, type} entries). This job
+replaces the hand-curated list with a ranked one: PageRank over the bipartite
+player/attribute graph (the same graph as distance_oracle.py) favours players
+and teams that connect to many other well-connected items, so random pairs
+from the pool stay solvable in a few moves. Degree centrality is reported
+alongside.
+
+The pool is league-balanced: the top players and teams of each league by
+PageRank. Numbers and colleges are shared between leagues, so they are only
+included with --types. With --era, only players whose careers reach that era
+(era_datasets.ERAS) are ranked.
+
+PageRank is a power iteration over the two sides of the graph in turn: each
+attribute's rank is a sum over its players' shares (and vice versa), done with
+map() over precomputed index tuples rather than an edge loop.
+
+Step 5 of run_scraper.py and every refresh daemon publish regenerate items.json.
+
+Usage:
+    python daily_pool.py
+    python daily_pool.py --players 100 --teams 20 --era post1980
+    python daily_pool.py --types player team number --output /tmp/items.json
+"""
+
+import argparse
+import time
+
+from distance_oracle import PlayerGraph, DEFAULT_ITEMS_PATH, DEFAULT_PLAYERS_PATH
+from era_datasets import ERAS, era_first_year, filter_era
+from utils import load_json, save_json_atomic
+
+DAMPING = 0.85
+PLAYERS_PER_LEAGUE = 80
+TEAMS_PER_LEAGUE = 32
+ATTRIBUTES_PER_TYPE = 10
+LEAGUES = ('NBA', 'NFL')
+
+def pagerank(graph, damping=DAMPING, tol=1e-6, max_iter=100):
+    """
+    PageRank over a PlayerGraph (undirected, so each node splits its rank
+    evenly between its neighbours).
+
+    Returns:
+        (ranks, iterations): rank per node (sums to 1) and iterations run
+    """
+    num_players = graph.num_players
+    num_nodes = len(graph)
+    player_degree = [len(attrs) for attrs in graph.player_attrs]
+    attr_degree = [len(members) for members in graph.attr_players]
+    ranks = [1.0 / num_nodes] * num_nodes
+
+    for iteration in range(1, max_iter + 1):
+        player_ranks, attr_ranks = ranks[:num_players], ranks[num_players:]
+        # Nodes without edges spread their rank over every node
+        dangling = (sum(r for r, d in zip(player_ranks, player_degree) if not d) +
+                    sum(r for r, d in zip(attr_ranks, attr_degree) if not d))
+        base = (1 - damping + damping * dangling) / num_nodes
+
+        player_share = [r / d if d else 0.0 for r, d in zip(player_ranks, player_degree)]
+        attr_share = [r / d if d else 0.0 for r, d in zip(attr_ranks, attr_degree)]
+        new_attrs = [base + damping * sum(map(player_share.__getitem__, members))
+                     for members in graph.attr_players]
+        new_players = [base + damping * sum(map(attr_share.__getitem__, attrs))
+                       for attrs in graph.player_attrs]
+        new_ranks = new_players + new_attrs
+
+        delta = sum(abs(a - b) for a, b in zip(new_ranks, ranks))
+        ranks = new_ranks
+        if delta < tol:
+            break
+    return ranks, iteration
+
+def _team_league(team_id):
+    prefix = team_id.split('_', 1)[0].upper()
+    return prefix if prefix in LEAGUES else None
+
+def rank_items(players, types=('player', 'team'), players_per_league=PLAYERS_PER_LEAGUE,
+               teams_per_league=TEAMS_PER_LEAGUE, attributes_per_type=ATTRIBUTES_PER_TYPE):
+    """
+    League-balanced daily items ranked by PageRank.
+
+    Args:
+        players: Dict of player ID -> player record
+        types: Item types to include ('player', 'team', 'number', 'college')
+        players_per_league: Players kept per league
+        teams_per_league: Teams kept per league
+        attributes_per_type: Numbers/colleges kept per type (league None)
+
+    Returns:
+        (items, stats): items as {id, league, type, pagerank, degree} dicts in
+        rank order, stats about the run
+    """
+    start_time = time.time()
+    graph = PlayerGraph(players)
+    ranks, iterations = pagerank(graph)
+    max_degree = max((graph.degree(node) for node in range(len(graph))), default=1) or 1
+
+    # Node keys are lowercased; items.json uses the values as stored in the data
+    display = {}
+    for record in players.values():
+        for team in record.get('teams') or []:
+            display.setdefault(f"team:{team.lower()}", team)
+
+    ranked = sorted(range(len(graph)), key=lambda node: (-ranks[node], node))
+    limits = {}
+    items = []
+    for node in ranked:
+        kind, value = graph.node_keys[node].split(':', 1)
+        if kind not in types:
+            continue
+        if kind == 'player':
+            item_id = value
+            league = players[value].get('league')
+            limit = players_per_league
+        elif kind == 'team':
+            item_id = display.get(graph.node_keys[node], value)
+            league = _team_league(item_id)
+            limit = teams_per_league
+        else:
+            item_id, league, limit = value, None, attributes_per_type
+        taken = limits.get((kind, league), 0)
+        if taken >= limit:
+            continue
+        limits[(kind, league)] = taken + 1
+        items.append({
+            'id': item_id,
+            'league': league,
+            'type': kind,
+            'pagerank': round(ranks[node] * len(graph), 4),
+            'degree': round(graph.degree(node) / max_degree, 4),
+        })
+
+    stats = {'nodes': len(graph), 'iterations': iterations, 'seconds': round(time.time() - start_time, 2)}
+    return items, stats
+
+def build_pool(players_path, output_path=DEFAULT_ITEMS_PATH, era=None, types=('player', 'team'),
+               players_per_league=PLAYERS_PER_LEAGUE, teams_per_league=TEAMS_PER_LEAGUE):
+    """
+    Rank the items of players_path and write them in items.json format.
+
+    Returns:
+        The written items ({id, league, type}), or None if there is no data
+    """
+    players = load_json(players_path)
+    if not players:
+        print(f"No players in {players_path}; skipping daily pool.")
+        return None
+    if era:
+        players = filter_era(players, era_first_year(era))
+    items, stats = rank_items(players, types, players_per_league, teams_per_league)
+    pool = [{'id': item['id'], 'league': item['league'], 'type': item['type']} for item in items]
+    print(f"Daily pool: {len(pool)} items from {stats['nodes']} nodes "
+          f"(PageRank converged in {stats['iterations']} iterations, {stats['seconds']}s)")
+    save_json_atomic(pool, output_path)
+    return pool
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Rank players and attributes by centrality for the daily pool")
+    parser.add_argument("--input", default=str(DEFAULT_PLAYERS_PATH), help="Merged players JSON file")
+    parser.add_argument("--output", default=str(DEFAULT_ITEMS_PATH), help="items.json to write")
+    parser.add_argument("--players", type=int, default=PLAYERS_PER_LEAGUE, help="Players per league")
+    parser.add_argument("--teams", type=int, default=TEAMS_PER_LEAGUE, help="Teams per league")
+    parser.add_argument("--types", nargs="+", choices=['player', 'team', 'number', 'college'],
+                        default=['player', 'team'], help="Item types to include")
+    parser.add_argument("--era", choices=list(ERAS), help="Only rank players whose careers reach this era")
+    parser.add_argument("--show", type=int, default=10, help="Print the top N items per league and type")
+    parser.add_argument("--dry-run", action="store_true", help="Print the ranking without writing items.json")
+    args = parser.parse_args()
+
+    players = load_json(args.input)
+    if args.era:
+        players = filter_era(players, era_first_year(args.era))
+    items, stats = rank_items(players, args.types, args.players, args.teams)
+    shown = {}
+    for item in items:
+        group = (item['league'], item['type'])
+        shown[group] = shown.get(group, 0) + 1
+        if shown[group] <= args.show:
+            print(f"  {item['league'] or '-':4s} {item['type']:8s} {item['id']:24s} "
+                  f"pagerank {item['pagerank']:.3f}  degree {item['degree']:.3f}")
+    print(f"{len(items)} items from {stats['nodes']} nodes in {stats['seconds']}s "
+          f"({stats['iterations']} PageRank iterations)")
+    if not args.dry_run:
+        save_json_atomic([{'id': i['id'], 'league': i['league'], 'type': i['type']} for i in items], args.output)
@@ -0,0 +1,203 @@
+"""
+Incrementally maintained indexes derived from the merged player data.
+
+Everything built from players_new.json (the attribute bitmaps used for
+queries, a name index, the player/attribute adjacency used by graph tools,
+and per-attribute player counts) used to be rebuilt from scratch after every
+refresh, even when a delta crawl touched 200 of ~30k players. DerivedIndexes
+instead applies a player-level change set:
+
+    changes = diff_players(old_players, new_players)   # [(id, old, new), ...]
+    derived.apply(changes)
+
+Each changed player only touches the keys it gained or lost, so the cost
+follows the size of the change set rather than the size of the dataset.
+check_consistency() rebuilds everything from the current players and reports
+any difference from the incrementally maintained state.
+
+Usage:
+    python derived_index.py old_players.json new_players.json --check
+    python derived_index.py latest~1 latest --check      # snapshot_store releases
+"""
+
+import argparse
+import time
+from collections import Counter
+from pathlib import Path
+
+from athlete_resolver import normalize_name
+from player_index import PlayerIndex, record_keys
+from utils import load_json
+
+def diff_players(old_players, new_players):
+    """
+    Player-level change set between two DB dicts.
+
+    Returns:
+        List of (player ID, old record or None, new record or None) for every
+        added, removed or changed player, in player ID order
+    """
+    changes = []
+    for pid in sorted(set(old_players) | set(new_players)):
+        old, new = old_players.get(pid), new_players.get(pid)
+        if old != new:
+            changes.append((pid, old, new))
+    return changes
+
+def _name_tokens(record):
+    return set(normalize_name(record.get('name'))) if record else set()
+
+def _links(record):
+    return set(record.get('same_as') or []) if record else set()
+
+class DerivedIndexes:
+    """
+    Derived structures over one version of the players dict.
+
+    Attributes:
+        players: The players dict the structures currently describe
+        index: PlayerIndex of attribute bitmaps (the inverted lists)
+        names: Normalized name token -> set of player IDs
+        adjacency: Player ID -> frozenset of (attribute_type, value) keys
+        same_as: Player ID -> set of linked player IDs (two-sport athletes)
+        counts: Counter of (attribute_type, value) -> number of players
+    """
+
+    def __init__(self, players):
+        self.players = players
+        self.index = PlayerIndex.from_players(players)
+        self.names = {}
+        self.adjacency = {}
+        self.same_as = {}
+        self.counts = Counter()
+        for pid, record in players.items():
+            self._add(pid, record)
+
+    def _add(self, pid, record):
+        for token in _name_tokens(record):
+            self.names.setdefault(token, set()).add(pid)
+        keys = frozenset(record_keys(record))
+        self.adjacency[pid] = keys
+        self.counts.update(keys)
+        links = _links(record)
+        if links:
+            self.same_as[pid] = links
+
+    def _remove(self, pid, record):
+        for token in _name_tokens(record):
+            bucket = self.names.get(token)
+            if bucket is not None:
+                bucket.discard(pid)
+                if not bucket:
+                    del self.names[token]
+        self.counts.subtract(self.adjacency.pop(pid, ()))
+        # Counter.subtract keeps zero entries; drop them so the state matches a fresh build
+        for key in record_keys(record):
+            if self.counts[key] <= 0:
+                del self.counts[key]
+        self.same_as.pop(pid, None)
+
+    def apply(self, changes, players=None):
+        """
+        Apply a change set from diff_players().
+
+        Args:
+            changes: List of (player ID, old record or None, new record or None)
+            players: The new players dict (defaults to patching self.players in place)
+        """
+        self.index.apply_changes(changes)
+        for pid, old, new in changes:
+            if old is not None:
+                self._remove(pid, old)
+            if new is not None:
+                self._add(pid, new)
+        if players is not None:
+            self.players = players
+        else:
+            for pid, _, new in changes:
+                if new is None:
+                    self.players.pop(pid, None)
+                else:
+                    self.players[pid] = new
+
+    def update(self, new_players):
+        """Diff against the current players, apply the changes, and return them."""
+        changes = diff_players(self.players, new_players)
+        self.apply(changes, new_players)
+        return changes
+
+    def search_name(self, name):
+        """Player IDs whose normalized name contains every token of `name`."""
+        tokens = normalize_name(name)
+        if not tokens:
+            return []
+        result = set(self.names.get(tokens[0], ()))
+        for token in tokens[1:]:
+            result &= self.names.get(token, set())
+        return sorted(result)
+
+def check_consistency(derived):
+    """
+    Compare incrementally maintained structures against a full rebuild.
+
+    Returns:
+        List of human-readable mismatch descriptions (empty if consistent)
+    """
+    fresh = DerivedIndexes(derived.players)
+    problems = []
+
+    live_ids = sorted(pid for pid in derived.index.ids if pid is not None)
+    if live_ids != fresh.index.ids:
+        problems.append(f"index: {len(live_ids)} players indexed, expected {len(fresh.index.ids)}")
+    if derived.index.count(derived.index.universe) != len(fresh.index.ids):
+        problems.append("index: universe bitmap does not match the player count")
+    keys = set(derived.index.bitmaps) | set(fresh.index.bitmaps)
+    for key in sorted(keys, key=str):
+        got = derived.index.to_ids(derived.index.bitmaps.get(key, 0))
+        expected = fresh.index.to_ids(fresh.index.bitmaps.get(key, 0))
+        if got != expected:
+            problems.append(f"index: {key} has {len(got)} players, expected {len(expected)}")
+
+    for name in ('names', 'adjacency', 'same_as', 'counts'):
+        got, expected = getattr(derived, name), getattr(fresh, name)
+        if got != expected:
+            wrong = [k for k in set(got) | set(expected) if got.get(k) != expected.get(k)]
+            problems.append(f"{name}: {len(wrong)} entries differ, e.g. {sorted(wrong, key=str)[0]!r}")
+    return problems
+
+def _load_players(ref, name):
+    """Load a players dict from a file path or a snapshot_store release reference."""
+    if Path(ref).exists():
+        return load_json(ref)
+    import snapshot_store
+    return snapshot_store.load_release(snapshot_store.resolve_release(ref), name)
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Apply a dataset patch to the derived indexes incrementally")
+    parser.add_argument("old", help="Old players JSON file or snapshot release (e.g. latest~1)")
+    parser.add_argument("new", help="New players JSON file or snapshot release (e.g. latest)")
+    parser.add_argument("--file", default="players_new.json", help="File name within snapshot releases")
+    parser.add_argument("--check", action="store_true", help="Verify the result against a full rebuild")
+    args = parser.parse_args()
+
+    old_players = _load_players(args.old, args.file)
+    new_players = _load_players(args.new, args.file)
+
+    derived = DerivedIndexes(dict(old_players))
+
+    start_time = time.perf_counter()
+    changes = derived.update(new_players)
+    incremental = time.perf_counter() - start_time
+
+    start_time = time.perf_counter()
+    DerivedIndexes(new_players)
+    full = time.perf_counter() - start_time
+
+    print(f"{len(changes)} changed players of {len(new_players)}")
+    print(f"Incremental update: {incremental * 1000:.1f} ms (full rebuild: {full * 1000:.1f} ms)")
+
+    if args.check:
+        problems = check_consistency(derived)
+        for problem in problems[:20]:
+            print(f"  MISMATCH {problem}")
+        print("Consistent with a full rebuild" if not problems else f"{len(problems)} mismatches")
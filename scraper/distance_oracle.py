@@ -0,0 +1,441 @@
+"""
+Landmark-based distance oracle over the player/attribute graph.
+
+The game graph is bipartite: players on one side, attribute values (team,
+number, college; compared case-insensitively like gameUtils.js) on the other,
+with an edge wherever a player has the attribute. The number of moves between
+two items (the daily challenge's shortestPath, hints, result pages) is their
+distance in this graph, which otherwise takes a graph search per question.
+
+build() precomputes, once per dataset:
+
+    - BFS distance arrays from a few landmark nodes. Landmarks alternate
+      between the best-connected remaining node and the node farthest from
+      the landmarks picked so far. For any pair (u, v) the triangle
+      inequality gives max |d(L,u) - d(L,v)| <= d(u,v) <= min d(L,u) + d(L,v),
+      tightened to the pair's parity (player-player distances are even).
+    - Exact distances between popular nodes (the daily items.json pool and
+      the most played players/attributes from popularity.json).
+    - The isolated nodes (no edges), which no other node can reach.
+
+The BFS is level-synchronous over attribute bitmaps (the PlayerIndex idea):
+one Python integer per attribute has a bit per player, so each level costs one
+AND per unvisited attribute and one OR per newly reached attribute, done
+word-at-a-time in C rather than edge-by-edge in Python.
+
+Node keys are strings: "player:<id>" or "<type>:<lowercased value>", e.g.
+"player:jordami01", "team:nba_chi", "number:23", "college:north carolina".
+
+Usage:
+    python distance_oracle.py                                # build distance_oracle.json
+    python distance_oracle.py --landmarks 24 --popular 300
+    python distance_oracle.py --benchmark 2000               # compare with plain BFS
+    python distance_oracle.py --query player:jordami01 team:nfl_chi
+"""
+
+import argparse
+import base64
+import random
+import time
+from collections import deque
+from pathlib import Path
+
+from simulate_games import CompactGameData
+from utils import load_json, save_json_atomic
+
+SCRAPER_DIR = Path(__file__).parent
+DEFAULT_PLAYERS_PATH = Path("../ballknower/public/backend/players_new.json")
+DEFAULT_ITEMS_PATH = Path("../ballknower/dailyAutomater/items.json")
+ORACLE_PATH = SCRAPER_DIR / "distance_oracle.json"
+
+DEFAULT_LANDMARKS = 16
+DEFAULT_POPULAR = 200
+
+# Distance arrays are bytes; 255 marks nodes a landmark cannot reach
+UNREACHABLE = 255
+
+def node_key(kind, value):
+    """Node key for a player ID or an attribute (type, value)."""
+    if kind == 'player':
+        return f"player:{value}"
+    return f"{kind}:{str(value).lower()}"
+
+def _positions(bitmap):
+    """Set bit positions of a bitmap (one C-level find per set bit)."""
+    bits = bin(bitmap)
+    top = len(bits) - 1
+    positions = []
+    i = bits.find('1', 2)
+    while i != -1:
+        positions.append(top - i)
+        i = bits.find('1', i + 1)
+    return positions
+
+def _encode(distances):
+    return base64.b64encode(bytes(distances)).decode('ascii')
+
+def _decode(text):
+    return bytearray(base64.b64decode(text))
+
+class PlayerGraph:
+    """
+    Bipartite player/attribute graph.
+
+    Nodes 0..len(player_ids)-1 are players (sorted by ID); the attributes
+    follow in CompactGameData order.
+
+    Attributes:
+        node_keys: Node key string per node
+        node_index: Node key -> node
+        player_attrs: Tuple of attribute indexes per player
+        attr_players: Tuple of player indexes per attribute
+        attr_bitmaps: Player bitmap per attribute
+    """
+
+    def __init__(self, players):
+        data = CompactGameData(players)
+        self.num_players = len(data.player_ids)
+        self.player_attrs = data.player_attrs
+        self.attr_players = data.attr_players
+        self.node_keys = ([node_key('player', pid) for pid in data.player_ids] +
+                          [node_key(attr_type, value) for attr_type, value in data.attr_keys])
+        self.node_index = {key: node for node, key in enumerate(self.node_keys)}
+
+        num_bytes = (self.num_players + 7) // 8
+        self.attr_bitmaps = []
+        for members in self.attr_players:
+            bits = bytearray(num_bytes)
+            for pos in members:
+                bits[pos >> 3] |= 1 << (pos & 7)
+            self.attr_bitmaps.append(int.from_bytes(bits, 'little'))
+
+    def __len__(self):
+        return len(self.node_keys)
+
+    def degree(self, node):
+        if node < self.num_players:
+            return len(self.player_attrs[node])
+        return len(self.attr_players[node - self.num_players])
+
+    def bfs(self, source):
+        """
+        Distances from one node to every node.
+
+        Returns:
+            bytearray of distances (UNREACHABLE where there is no path)
+        """
+        num_players = self.num_players
+        dist = bytearray([UNREACHABLE]) * len(self.node_keys)
+        dist[source] = 0
+        unseen_attrs = set(range(len(self.attr_bitmaps)))
+        if source < num_players:
+            frontier, level = 1 << source, 0
+            seen = frontier
+        else:
+            attr = source - num_players
+            unseen_attrs.discard(attr)
+            frontier, level = self.attr_bitmaps[attr], 1
+            seen = frontier
+            for pos in _positions(frontier):
+                dist[pos] = 1
+
+        while frontier and level < UNREACHABLE - 2:
+            # Players -> attributes: every unseen attribute held by a frontier player
+            level += 1
+            reached = [attr for attr in unseen_attrs if self.attr_bitmaps[attr] & frontier]
+            if not reached:
+                break
+            unseen_attrs.difference_update(reached)
+            next_frontier = 0
+            for attr in reached:
+                dist[num_players + attr] = level
+                next_frontier |= self.attr_bitmaps[attr]
+            # Attributes -> players not reached before
+            level += 1
+            frontier = next_frontier & ~seen
+            seen |= frontier
+            for pos in _positions(frontier):
+                dist[pos] = level
+        return dist
+
+    def neighbors(self, node):
+        if node < self.num_players:
+            return [self.num_players + attr for attr in self.player_attrs[node]]
+        return self.attr_players[node - self.num_players]
+
+    def shortest_path_length(self, source, target):
+        """Plain BFS with early exit (the baseline the oracle is measured against)."""
+        if source == target:
+            return 0
+        dist = {source: 0}
+        queue = deque([source])
+        while queue:
+            node = queue.popleft()
+            next_dist = dist[node] + 1
+            for neighbor in self.neighbors(node):
+                if neighbor not in dist:
+                    if neighbor == target:
+                        return next_dist
+                    dist[neighbor] = next_dist
+                    queue.append(neighbor)
+        return None
+
+class DistanceOracle:
+    """
+    Landmark distance arrays plus exact distances between popular nodes.
+
+    Attributes:
+        node_keys: Node key string per node (same order as the distance arrays)
+        landmarks: Landmark nodes
+        distances: One bytearray of distances per landmark
+        popular: Popular nodes, in pair-table order
+        pair_distances: len(popular)**2 bytearray, row-major
+        isolated: Set of nodes without edges
+        graph: PlayerGraph for BFS fallbacks (None when loaded without players)
+    """
+
+    def __init__(self, node_keys, landmarks, distances, popular=(), pair_distances=b'', graph=None,
+                 isolated=()):
+        self.node_keys = node_keys
+        self.node_index = graph.node_index if graph else {key: node for node, key in enumerate(node_keys)}
+        self.num_players = sum(1 for key in node_keys if key.startswith('player:'))
+        self.landmarks = list(landmarks)
+        self.distances = distances
+        self.popular = list(popular)
+        self.popular_index = {node: i for i, node in enumerate(self.popular)}
+        self.pair_distances = pair_distances
+        self.isolated = set(isolated)
+        self.graph = graph
+
+    @classmethod
+    def build(cls, graph, num_landmarks=DEFAULT_LANDMARKS, popular=()):
+        """
+        Precompute landmark distance arrays and the popular pair table.
+
+        Args:
+            graph: PlayerGraph
+            num_landmarks: Number of landmarks
+            popular: Popular node keys (unknown keys are ignored)
+        """
+        nodes = range(len(graph))
+        by_degree = sorted(nodes, key=lambda node: (-graph.degree(node), node))
+        landmarks, distances = [], []
+        nearest = bytearray([UNREACHABLE]) * len(graph)
+        degree_pos = 0
+        while len(landmarks) < min(num_landmarks, len(graph)):
+            if len(landmarks) % 2 == 0:
+                while by_degree[degree_pos] in landmarks:
+                    degree_pos += 1
+                landmark = by_degree[degree_pos]
+            else:
+                # Farthest reachable node from the current landmarks (ties: better connected)
+                landmark = max((node for node in nodes if nearest[node] != UNREACHABLE),
+                               key=lambda node: (nearest[node], graph.degree(node), -node))
+                if nearest[landmark] == 0:
+                    break
+            dist = graph.bfs(landmark)
+            landmarks.append(landmark)
+            distances.append(dist)
+            nearest = bytearray(map(min, nearest, dist))
+
+        popular = list(dict.fromkeys(graph.node_index[key] for key in popular if key in graph.node_index))
+        pair_distances = bytearray(len(popular) * len(popular))
+        for i, source in enumerate(popular):
+            dist = graph.bfs(source)
+            pair_distances[i * len(popular):(i + 1) * len(popular)] = bytes(dist[target] for target in popular)
+        isolated = [node for node in nodes if not graph.degree(node)]
+        return cls(graph.node_keys, landmarks, distances, popular, pair_distances, graph, isolated)
+
+    def _node(self, key):
+        node = self.node_index.get(key)
+        if node is None:
+            raise KeyError(f"Unknown node {key!r}")
+        return node
+
+    def bounds(self, u, v):
+        """
+        Lower and upper bounds on the distance between two node keys.
+
+        Returns:
+            (None, None) if the nodes are known to be in different components:
+            one of them is isolated, or a landmark reaches exactly one of them.
+            Otherwise (lower, upper), where upper is None if no landmark
+            reaches both nodes; the pair may then still be unreachable (two
+            small components that no landmark lies in), so lower is only a
+            bound on the distance if one exists.
+        """
+        a, b = self._node(u), self._node(v)
+        if a == b:
+            return 0, 0
+        if a in self.isolated or b in self.isolated:
+            return None, None
+        lower, upper = 1, None
+        for dist in self.distances:
+            da, db = dist[a], dist[b]
+            if da == UNREACHABLE or db == UNREACHABLE:
+                if da != db:
+                    return None, None
+                continue
+            lower = max(lower, abs(da - db))
+            if upper is None or da + db < upper:
+                upper = da + db
+        # Same-side nodes are an even number of moves apart, others odd
+        parity = (a < self.num_players) == (b < self.num_players)
+        if (lower % 2 == 0) != parity:
+            lower += 1
+        if upper is not None and (upper % 2 == 0) != parity:
+            upper -= 1
+        return lower, upper
+
+    def distance(self, u, v, fallback=True):
+        """
+        Exact distance between two node keys.
+
+        Uses the popular pair table, then landmark bounds when they meet, then
+        (if fallback and the graph is loaded) a BFS.
+
+        Returns:
+            Number of moves, or None if unknown or unreachable
+        """
+        a, b = self._node(u), self._node(v)
+        i, j = self.popular_index.get(a), self.popular_index.get(b)
+        if i is not None and j is not None:
+            d = self.pair_distances[i * len(self.popular) + j]
+            return None if d == UNREACHABLE else d
+        lower, upper = self.bounds(u, v)
+        if lower is not None and lower == upper:
+            return lower
+        if fallback and self.graph is not None and lower is not None:
+            return self.graph.shortest_path_length(a, b)
+        return None
+
+    def to_dict(self):
+        return {
+            'nodes': self.node_keys,
+            'landmarks': self.landmarks,
+            'distances': [_encode(dist) for dist in self.distances],
+            'popular': self.popular,
+            'pair_distances': _encode(self.pair_distances),
+            'isolated': sorted(self.isolated),
+        }
+
+    @classmethod
+    def from_dict(cls, data, graph=None):
+        return cls(data['nodes'], data['landmarks'], [_decode(d) for d in data['distances']],
+                   data['popular'], _decode(data['pair_distances']), graph, data.get('isolated', ()))
+
+    @classmethod
+    def load(cls, path=ORACLE_PATH, players=None):
+        """Load a saved oracle; pass the players dict to enable BFS fallbacks."""
+        data = load_json(path)
+        graph = PlayerGraph(players) if players else None
+        if graph is not None and graph.node_keys != data['nodes']:
+            raise ValueError(f"{path} was built from a different dataset; rebuild it")
+        return cls.from_dict(data, graph)
+
+def popular_nodes(items_path=DEFAULT_ITEMS_PATH, popularity_path=None, limit=DEFAULT_POPULAR):
+    """
+    Node keys worth exact distances: the daily item pool, then the most played
+    players and attributes from popularity.json, up to `limit` keys.
+    """
+    keys = []
+    for item in load_json(items_path) or []:
+        keys.append(node_key(item.get('type', 'player'), item['id']))
+    tables = load_json(popularity_path) if popularity_path else {}
+    played = [(count, node_key('player', pid)) for pid, count in tables.get('players', {}).items()]
+    for attr_type, values in tables.get('attributes', {}).items():
+        played += [(count, node_key(attr_type, value)) for value, count in values.items()]
+    keys += [key for _, key in sorted(played, reverse=True)]
+    return list(dict.fromkeys(keys))[:limit]
+
+def build_oracle(players_path, output_path=ORACLE_PATH, num_landmarks=DEFAULT_LANDMARKS,
+                 items_path=DEFAULT_ITEMS_PATH, popularity_path=None, num_popular=DEFAULT_POPULAR):
+    """Build the oracle for a players file and save it; returns the DistanceOracle."""
+    players = load_json(players_path)
+    if not players:
+        print(f"No players in {players_path}; skipping distance oracle.")
+        return None
+    start_time = time.time()
+    graph = PlayerGraph(players)
+    oracle = DistanceOracle.build(graph, num_landmarks, popular_nodes(items_path, popularity_path, num_popular))
+    print(f"Distance oracle: {len(oracle.landmarks)} landmarks, {len(oracle.popular)} popular nodes "
+          f"over {len(graph)} nodes in {time.time() - start_time:.1f}s")
+    save_json_atomic(oracle.to_dict(), output_path, compact=True)
+    return oracle
+
+def run_benchmark(oracle, pairs=1000, seed=0):
+    """
+    Time oracle queries against plain BFS on random node pairs and check the bounds.
+
+    A violation is a bound the true distance breaks: for reachable pairs,
+    (None, None) or a distance outside [lower, upper]; for unreachable pairs,
+    a finite upper bound (a lower bound alone is no claim that a path exists).
+
+    Returns:
+        Dict of timings (microseconds per query) and bound quality
+    """
+    graph = oracle.graph
+    rng = random.Random(seed)
+    sample = [(oracle.node_keys[rng.randrange(len(graph))], oracle.node_keys[rng.randrange(len(graph))])
+              for _ in range(pairs)]
+    popular = [oracle.node_keys[node] for node in oracle.popular]
+    popular_sample = [(rng.choice(popular), rng.choice(popular)) for _ in range(pairs)] if popular else []
+
+    start_time = time.perf_counter()
+    truth = [graph.shortest_path_length(graph.node_index[u], graph.node_index[v]) for u, v in sample]
+    bfs_time = time.perf_counter() - start_time
+
+    start_time = time.perf_counter()
+    bounds = [oracle.bounds(u, v) for u, v in sample]
+    bounds_time = time.perf_counter() - start_time
+
+    start_time = time.perf_counter()
+    for u, v in popular_sample:
+        oracle.distance(u, v, fallback=False)
+    popular_time = time.perf_counter() - start_time
+
+    violations = exact = 0
+    gaps = []
+    for d, (lower, upper) in zip(truth, bounds):
+        if d is None:
+            violations += upper is not None
+            continue
+        if lower is None or d < lower or (upper is not None and d > upper):
+            violations += 1
+        elif upper is not None:
+            exact += lower == upper
+            gaps.append(upper - lower)
+    reachable = sum(1 for d in truth if d is not None)
+    return {
+        'pairs': pairs,
+        'bfs_us': round(bfs_time / pairs * 1e6, 1),
+        'bounds_us': round(bounds_time / pairs * 1e6, 2),
+        'popular_exact_us': round(popular_time / len(popular_sample) * 1e6, 2) if popular_sample else None,
+        'bounds_exact': round(exact / reachable, 3) if reachable else None,
+        'mean_gap': round(sum(gaps) / len(gaps), 2) if gaps else None,
+        'violations': violations,
+    }
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Landmark distance oracle for the player/attribute graph")
+    parser.add_argument("--input", default=str(DEFAULT_PLAYERS_PATH), help="Merged players JSON file")
+    parser.add_argument("--output", default=str(ORACLE_PATH), help=f"Oracle file (default: {ORACLE_PATH.name})")
+    parser.add_argument("--landmarks", type=int, default=DEFAULT_LANDMARKS, help="Number of landmarks")
+    parser.add_argument("--items", default=str(DEFAULT_ITEMS_PATH), help="Daily item pool (popular nodes)")
+    parser.add_argument("--popularity", help="popularity.json from game_analytics.py (more popular nodes)")
+    parser.add_argument("--popular", type=int, default=DEFAULT_POPULAR, help="Popular nodes with exact distances")
+    parser.add_argument("--benchmark", type=int, metavar="PAIRS", help="Benchmark the saved oracle against BFS")
+    parser.add_argument("--query", nargs=2, metavar=("FROM", "TO"), help="Distance between two node keys")
+    args = parser.parse_args()
+
+    if args.benchmark or args.query:
+        oracle = DistanceOracle.load(args.output, load_json(args.input))
+        if args.query:
+            u, v = args.query
+            lower, upper = oracle.bounds(u, v)
+            print(f"{u} -> {v}: bounds [{lower}, {upper}], distance {oracle.distance(u, v)}")
+        if args.benchmark:
+            for name, value in run_benchmark(oracle, args.benchmark).items():
+                print(f"  {name:18s} {value}")
+    else:
+        build_oracle(args.input, args.output, args.landmarks, args.items, args.popularity, args.popular)
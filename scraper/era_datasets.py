@@ -0,0 +1,183 @@
+"""
+Era-restricted player datasets and compact indexes for modern game modes.
+
+players_new.json covers every player back to the 1920s, but most casual
+players only know recent ones. Step 5 (and every refresh daemon publish) also
+writes one subset per era, so a modern-only mode downloads and searches a
+fraction of the data:
+
+    eras/manifest.json          - era names, labels, year ranges, player
+                                  counts and file names
+    eras/players_<era>.json     - the players of the era, same format as
+                                  players_new.json
+    eras/index_<era>.json       - compact inverted lists for the era: sorted
+                                  player IDs plus, per attribute value, the
+                                  positions of its players in that list
+
+A player belongs to an era when any part of their career falls inside it
+(end_year, or start_year if end_year is missing, at or after the era's first
+year). The "active" era is relative to the current season, like the active
+player counts in budget_crawl.py. `same_as` links to players outside the era
+are dropped so every ID in an era file resolves within it.
+
+With --items, each era index also gets a `daily_items` pool: the entries of
+the daily puzzle items.json (players and teams) that exist in the era, so
+daily puzzles can be generated per era.
+
+Usage:
+    python era_datasets.py
+    python era_datasets.py --input ../ballknower/public/backend/players_new.json --eras post2000 active
+    python era_datasets.py --items ../ballknower/dailyAutomater/items.json
+"""
+
+import argparse
+import time
+from datetime import datetime
+from pathlib import Path
+
+from player_index import PlayerIndex, iter_bits
+from utils import load_json, save_json_atomic
+
+# Era name -> label shown to users and first season included.
+# first_year None means "current or previous season" (active players).
+ERAS = {
+    'post1980': {'label': 'Since 1980', 'first_year': 1980},
+    'post2000': {'label': 'Since 2000', 'first_year': 2000},
+    'active': {'label': 'Active players', 'first_year': None},
+}
+
+DEFAULT_ITEMS_PATH = Path("../ballknower/dailyAutomater/items.json")
+
+def era_first_year(era, season=None):
+    """First season included in an era (active players: the previous season)."""
+    first_year = ERAS[era]['first_year']
+    if first_year is None:
+        first_year = (season or datetime.now().year) - 1
+    return first_year
+
+def last_year(record):
+    """Last season a player appeared in, or 0 if the record has no years."""
+    for field in ('end_year', 'start_year'):
+        try:
+            return int(record.get(field))
+        except (TypeError, ValueError):
+            continue
+    return 0
+
+def filter_era(players, first_year):
+    """
+    Players whose careers reach first_year or later.
+
+    Args:
+        players: Dict of player ID -> player record
+        first_year: First season of the era
+
+    Returns:
+        Dict of player ID -> record, with same_as links outside the era removed
+    """
+    era_players = {}
+    for pid, record in players.items():
+        if last_year(record) >= first_year:
+            era_players[pid] = record
+    for pid, record in era_players.items():
+        if record.get('same_as'):
+            links = [other for other in record['same_as'] if other in era_players]
+            record = dict(record)
+            if links:
+                record['same_as'] = links
+            else:
+                del record['same_as']
+            era_players[pid] = record
+    return era_players
+
+def compact_index(players):
+    """
+    Inverted lists for a players dict, with players referenced by position.
+
+    Returns:
+        Dict with `ids` (sorted player IDs) and `attributes`
+        ({attribute_type: {value: [positions]}})
+    """
+    index = PlayerIndex.from_players(players)
+    attributes = {}
+    for (attr_type, value), bitmap in sorted(index.bitmaps.items()):
+        attributes.setdefault(attr_type, {})[value] = list(iter_bits(bitmap))
+    return {'ids': index.ids, 'attributes': attributes}
+
+def era_items(items, players):
+    """Daily puzzle items ({id, league, type}) that exist among an era's players."""
+    teams = {team for record in players.values() for team in record.get('teams') or []}
+    pool = []
+    for item in items:
+        if item.get('type') == 'player' and item.get('id') in players:
+            pool.append(item)
+        elif item.get('type') == 'team' and item.get('id') in teams:
+            pool.append(item)
+    return pool
+
+def build_eras(players_path, output_dir=None, eras=None, items_path=None, season=None):
+    """
+    Write the era datasets, their indexes and the manifest.
+
+    Args:
+        players_path: Merged player data (players_new.json)
+        output_dir: Directory for the era files (default: eras/ next to players_path)
+        eras: Era names to build (default: all of ERAS)
+        items_path: Optional daily puzzle items.json to filter per era
+        season: Current season (default: this year)
+
+    Returns:
+        The manifest dict
+    """
+    players = load_json(players_path)
+    if not players:
+        print(f"No players in {players_path}; skipping era datasets.")
+        return None
+    output_dir = Path(output_dir) if output_dir else Path(players_path).parent / "eras"
+    output_dir.mkdir(parents=True, exist_ok=True)
+    items = load_json(items_path) if items_path and Path(items_path).exists() else None
+
+    manifest = {'generated': datetime.now().strftime("%Y-%m-%d"), 'total_players': len(players), 'eras': {}}
+    for era in eras or ERAS:
+        first_year = era_first_year(era, season)
+        era_players = filter_era(players, first_year)
+        index = compact_index(era_players)
+        if items is not None:
+            index['daily_items'] = era_items(items, era_players)
+
+        players_file = output_dir / f"players_{era}.json"
+        index_file = output_dir / f"index_{era}.json"
+        save_json_atomic(era_players, players_file, compact=True)
+        save_json_atomic(index, index_file, compact=True)
+        manifest['eras'][era] = {
+            'label': ERAS[era]['label'],
+            'first_year': first_year,
+            'players': len(era_players),
+            'players_file': players_file.name,
+            'index_file': index_file.name,
+            'bytes': players_file.stat().st_size + index_file.stat().st_size,
+        }
+        if items is not None:
+            manifest['eras'][era]['daily_items'] = len(index['daily_items'])
+        print(f"  {era}: {len(era_players)}/{len(players)} players since {first_year}")
+
+    save_json_atomic(manifest, output_dir / "manifest.json")
+    return manifest
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Write era-restricted player datasets and indexes")
+    parser.add_argument("--input", default="../ballknower/public/backend/players_new.json", help="Merged player data")
+    parser.add_argument("--output-dir", help="Output directory (default: eras/ next to the input)")
+    parser.add_argument("--eras", nargs="+", choices=list(ERAS), help="Eras to build (default: all)")
+    parser.add_argument("--items", help=f"Daily puzzle items to filter per era (e.g. {DEFAULT_ITEMS_PATH})")
+    parser.add_argument("--season", type=int, help="Current season for the active era (default: this year)")
+    args = parser.parse_args()
+
+    start_time = time.time()
+    manifest = build_eras(args.input, args.output_dir, args.eras, args.items, args.season)
+    if manifest:
+        full_size = Path(args.input).stat().st_size
+        for era, info in manifest['eras'].items():
+            print(f"{era:10s} {info['players']:6d} players, {info['bytes'] / 1024:8.1f} KB "
+                  f"({info['bytes'] / full_size:.0%} of the full dataset)")
+        print(f"Built {len(manifest['eras'])} eras in {time.time() - start_time:.1f}s")
@@ -0,0 +1,241 @@
+"""
+Persistent memoization of page extraction results.
+
+Extractors are pure functions of a page body (plus a few small arguments), so
+their output can be cached under (page family, parser version, source hash,
+body hash, arguments). A byte-identical page then costs one SHA-256 and a
+SQLite lookup instead of a BeautifulSoup parse.
+
+Each extractor is registered with its own family name and version via the
+@cached_extractor decorator. The key also includes a hash of the extractor's
+source, so editing a parser invalidates its entries even if the version is not
+bumped. Entries of superseded versions are dropped the first time a family is
+looked up; entries not read for MAX_UNUSED_DAYS (pages whose body has since
+changed) are dropped once per process. Every other family keeps its cache.
+
+The cache lives in extract_cache.sqlite next to this file. Set the environment
+variable SCRAPER_EXTRACT_CACHE=0 (or call disable()) to bypass it.
+
+Usage:
+    python extract_cache.py stats
+    python extract_cache.py prune [--days 7]
+    python extract_cache.py clear [--family nfl_uniform]
+"""
+
+import argparse
+import functools
+import hashlib
+import inspect
+import json
+import os
+import sqlite3
+import time
+from pathlib import Path
+
+CACHE_PATH = Path(__file__).parent / "extract_cache.sqlite"
+
+# Entries not read for this long belong to pages that have since changed
+MAX_UNUSED_DAYS = 30
+
+# family -> (version, source hash), filled in by @cached_extractor
+EXTRACTOR_VERSIONS = {}
+
+_enabled = os.environ.get('SCRAPER_EXTRACT_CACHE', '1') != '0'
+_conn = None
+_conn_pid = None
+_pruned = set()
+_pruned_unused = False
+_stats = {'hits': 0, 'misses': 0}
+
+def disable():
+    """Bypass the cache for the rest of this process."""
+    global _enabled
+    _enabled = False
+
+def stats():
+    """Return hit/miss counts for this process."""
+    return dict(_stats)
+
+def body_hash(body):
+    """SHA-256 hex digest of a page body (str or bytes)."""
+    if isinstance(body, str):
+        body = body.encode('utf-8')
+    return hashlib.sha256(body).hexdigest()
+
+def source_hash(func):
+    """Short hash of a function's source (its bytecode if the source is unavailable)."""
+    try:
+        code = inspect.getsource(func).encode('utf-8')
+    except (OSError, TypeError):
+        code = func.__code__.co_code + repr(func.__code__.co_consts).encode('utf-8')
+    return hashlib.sha256(code).hexdigest()[:16]
+
+def _connection():
+    # One connection per process; forked workers must not share the parent's
+    global _conn, _conn_pid
+    if _conn is None or _conn_pid != os.getpid():
+        _conn = sqlite3.connect(CACHE_PATH, timeout=30)
+        _conn.execute("PRAGMA journal_mode=WAL")
+        columns = {row[1] for row in _conn.execute("PRAGMA table_info(extractions)")}
+        if columns and 'code_hash' not in columns:
+            # Cache from before source hashes were keyed; nothing in it can be reused
+            with _conn:
+                _conn.execute("DROP TABLE extractions")
+        _conn.execute("""
+            CREATE TABLE IF NOT EXISTS extractions (
+                family TEXT NOT NULL,
+                version INTEGER NOT NULL,
+                code_hash TEXT NOT NULL,
+                body_hash TEXT NOT NULL,
+                args TEXT NOT NULL,
+                rows TEXT NOT NULL,
+                last_used REAL NOT NULL,
+                PRIMARY KEY (family, version, code_hash, body_hash, args)
+            )
+        """)
+        _conn_pid = os.getpid()
+    return _conn
+
+def prune_unused(days=MAX_UNUSED_DAYS):
+    """
+    Delete entries not read for the given number of days.
+
+    Returns:
+        Number of entries deleted
+    """
+    conn = _connection()
+    with conn:
+        cursor = conn.execute("DELETE FROM extractions WHERE last_used < ?", (time.time() - days * 86400,))
+    return cursor.rowcount
+
+def _prune_stale(conn, family, version, code_hash):
+    # Done once per family per process: drops rows from other parser versions
+    # or sources, plus (once per process) rows no page has needed for a while
+    global _pruned_unused
+    if family in _pruned:
+        return
+    with conn:
+        conn.execute(
+            "DELETE FROM extractions WHERE family = ? AND (version != ? OR code_hash != ?)",
+            (family, version, code_hash)
+        )
+    _pruned.add(family)
+    if not _pruned_unused:
+        prune_unused()
+        _pruned_unused = True
+
+def lookup(family, version, code_hash, digest, args_key):
+    conn = _connection()
+    _prune_stale(conn, family, version, code_hash)
+    key = (family, version, code_hash, digest, args_key)
+    row = conn.execute(
+        "SELECT rows, last_used FROM extractions "
+        "WHERE family = ? AND version = ? AND code_hash = ? AND body_hash = ? AND args = ?",
+        key
+    ).fetchone()
+    if row is None:
+        return None
+    now = time.time()
+    if now - row[1] > 86400:
+        # Refreshed at most daily so hits stay read-only
+        with conn:
+            conn.execute(
+                "UPDATE extractions SET last_used = ? "
+                "WHERE family = ? AND version = ? AND code_hash = ? AND body_hash = ? AND args = ?",
+                (now,) + key
+            )
+    return json.loads(row[0])
+
+def store(family, version, code_hash, digest, args_key, rows):
+    conn = _connection()
+    with conn:
+        conn.execute(
+            "INSERT OR REPLACE INTO extractions "
+            "(family, version, code_hash, body_hash, args, rows, last_used) VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (family, version, code_hash, digest, args_key, json.dumps(rows, ensure_ascii=False), time.time())
+        )
+
+def cached_extractor(family, version):
+    """
+    Decorator for extractor functions of the form f(html, *args, **kwargs).
+
+    Arguments after html are bound to the function's signature (defaults
+    applied) before keying, so f(html, 'x'), f(html, team='x') and a call
+    relying on the default share one entry. They must be JSON-serializable.
+
+    The result must be JSON-serializable too; it is returned exactly as JSON
+    round-trips it (tuples come back as lists), on hits and misses alike,
+    so callers always see the same shape.
+
+    Args:
+        family: Page family name (e.g. 'nfl_uniform')
+        version: Parser version; bump it when the extractor's output changes
+            for reasons outside its own source (e.g. a helper it calls)
+    """
+    def decorator(func):
+        code_hash = source_hash(func)
+        signature = inspect.signature(func)
+        EXTRACTOR_VERSIONS[family] = (version, code_hash)
+
+        @functools.wraps(func)
+        def wrapper(html, *args, **kwargs):
+            if not _enabled:
+                return func(html, *args, **kwargs)
+            bound = signature.bind(html, *args, **kwargs)
+            bound.apply_defaults()
+            args_key = json.dumps(list(bound.arguments.items())[1:], sort_keys=True)
+            digest = body_hash(html)
+            cached = lookup(family, version, code_hash, digest, args_key)
+            if cached is not None:
+                _stats['hits'] += 1
+                return cached
+            _stats['misses'] += 1
+            rows = func(html, *args, **kwargs)
+            store(family, version, code_hash, digest, args_key, rows)
+            return json.loads(json.dumps(rows))
+        wrapper.uncached = func
+        return wrapper
+    return decorator
+
+def cache_stats():
+    """Return {(family, version, source hash): entry count} for the on-disk cache."""
+    conn = _connection()
+    return {
+        (family, version, code_hash): count
+        for family, version, code_hash, count in conn.execute(
+            "SELECT family, version, code_hash, COUNT(*) FROM extractions "
+            "GROUP BY family, version, code_hash ORDER BY family"
+        )
+    }
+
+def clear(family=None):
+    """Delete cached extractions (for one family, or everything)."""
+    conn = _connection()
+    with conn:
+        if family:
+            conn.execute("DELETE FROM extractions WHERE family = ?", (family,))
+        else:
+            conn.execute("DELETE FROM extractions")
+    conn.execute("VACUUM")
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Inspect or clear the extraction cache")
+    parser.add_argument("command", choices=["stats", "prune", "clear"])
+    parser.add_argument("--family", help="Limit 'clear' to one page family")
+    parser.add_argument("--days", type=float, default=MAX_UNUSED_DAYS,
+                        help=f"'prune' entries not read for this many days (default: {MAX_UNUSED_DAYS})")
+    args = parser.parse_args()
+
+    if args.command == 'stats':
+        entries = cache_stats()
+        if not entries:
+            print(f"Extraction cache at {CACHE_PATH} is empty")
+        for (family, version, code_hash), count in entries.items():
+            print(f"  {family} (v{version}, source {code_hash}): {count} pages")
+    elif args.command == 'prune':
+        deleted = prune_unused(args.days)
+        _connection().execute("VACUUM")
+        print(f"Pruned {deleted} entries not read for {args.days:g} days from {CACHE_PATH}")
+    else:
+        clear(args.family)
+        print(f"Cleared {'family ' + args.family if args.family else 'all families'} from {CACHE_PATH}")
@@ -0,0 +1,375 @@
+"""
+Fact-emitting extraction and a map-reduce builder for the league DBs.
+
+The fetchers merge each page straight into a shared `players` dict. That ties
+extraction to one process and one run. Here each page is instead turned into
+immutable facts:
+
+    Fact(player_id, attribute, value, source_url, years)
+
+where attribute is one of league / name / url / team / number / college and
+years is a (start, end) tuple of year strings, or None.
+
+Map: facts are appended as NDJSON to partitioned shard files,
+
+    facts/part-<NN>/<run id>-<pid>.ndjson     (partition = crc32(player ID))
+    facts/runs/<run id>.json                  (source URLs the run covered)
+
+so any number of processes, crawls or replays can write side by side without
+coordination.
+
+Reduce: each partition is reduced independently (in a process pool) with set
+semantics. Duplicate facts collapse, and list fields come out sorted, so the
+result does not depend on how pages were sharded or in which order they were
+read. When several runs covered the same source URL, only the facts from the
+newest run are used. A partial re-run of a few pages therefore replaces just
+those pages' facts. Player records are only created by league / name / url
+facts (index and NFL uniform pages), exactly like the online fetchers. Team,
+number and college facts for unknown players are dropped.
+
+Usage:
+    python fact_builder.py map                      # replay the page corpus into facts/
+    python fact_builder.py map --since 2026-10-01   # only pages fetched since then
+    python fact_builder.py reduce --output-dir .    # facts/ -> players_db_<league>.json
+    python fact_builder.py build --workers 4        # map then reduce
+    python fact_builder.py prune                    # drop runs superseded by newer ones
+"""
+
+import argparse
+import json
+import os
+import time
+import zlib
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+from pathlib import Path
+
+import page_store
+from config import NFL_BASE_URL, NBA_BASE_URL, NFL_LETTERS, NBA_LETTERS, NBA_TEAMS, NUMS
+from fetch_players import index_url
+from fetch_teams import teams_list_url, uniform_url, franchise_url
+from fetch_numbers import number_url
+from fetch_colleges import schools_url
+from offline_rebuild import EXTRACTORS
+from utils import save_json
+
+SCRAPER_DIR = Path(__file__).parent
+FACT_DIR = SCRAPER_DIR / "facts"
+FACT_PARTITIONS = 16
+
+Fact = namedtuple('Fact', ['player_id', 'attribute', 'value', 'source_url', 'years'])
+
+# Attributes that create a player record; the rest only attach to existing ones
+CREATING_ATTRIBUTES = {'league', 'name', 'url'}
+LIST_FIELDS = {'team': 'teams', 'number': 'numbers', 'college': 'colleges'}
+NUMBER_ORDER = {num: i for i, num in enumerate(NUMS)}
+
+# --- Emitters: extracted rows -> facts (pure functions) ---
+
+def index_facts(rows, league, source_url):
+    """Facts from a player index page (extract_players_from_index rows)."""
+    facts = []
+    for row in rows:
+        pid = Path(row['url']).stem
+        years = (row.get('start_year'), row.get('end_year'))
+        facts.append(Fact(pid, 'league', league.upper(), source_url, None))
+        facts.append(Fact(pid, 'name', row['name'], source_url, years))
+        facts.append(Fact(pid, 'url', row['url'], source_url, None))
+        for college in row.get('colleges') or []:
+            facts.append(Fact(pid, 'college', college, source_url, None))
+    return facts
+
+def uniform_facts(rows, team_code, num, source_url):
+    """Facts from an NFL uniform page; these create players missing from the index."""
+    facts = []
+    for row in rows:
+        years = (row['start_year'], row['end_year'])
+        facts.append(Fact(row['id'], 'league', 'NFL', source_url, None))
+        facts.append(Fact(row['id'], 'team', team_code, source_url, years))
+        facts.append(Fact(row['id'], 'number', num, source_url, years))
+    return facts
+
+def roster_facts(player_ids, attribute, value, source_url):
+    """Facts from a page listing player IDs that share one attribute value."""
+    return [Fact(pid, attribute, value, source_url, None) for pid in player_ids]
+
+# --- Map side ---
+
+def partition_of(player_id, partitions=FACT_PARTITIONS):
+    """Stable partition for a player ID (the same in every process and run)."""
+    return zlib.crc32(player_id.encode('utf-8')) % partitions
+
+def new_run_id():
+    """Sortable run ID; later runs supersede earlier ones per source URL."""
+    return datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S%f")
+
+class FactWriter:
+    """Appends facts to this process's shard file in each partition."""
+
+    def __init__(self, run_id, fact_dir=FACT_DIR, partitions=FACT_PARTITIONS):
+        self.fact_dir = Path(fact_dir)
+        self.partitions = partitions
+        self.shard_name = f"{run_id}-{os.getpid()}.ndjson"
+        self.files = {}
+        self.count = 0
+
+    def write(self, facts):
+        for fact in facts:
+            part = partition_of(fact.player_id, self.partitions)
+            f = self.files.get(part)
+            if f is None:
+                part_dir = self.fact_dir / f"part-{part:02d}"
+                part_dir.mkdir(parents=True, exist_ok=True)
+                f = self.files[part] = open(part_dir / self.shard_name, 'a', encoding='utf-8')
+            f.write(json.dumps(list(fact), ensure_ascii=False, separators=(',', ':')) + '\n')
+            self.count += 1
+
+    def close(self):
+        for f in self.files.values():
+            f.close()
+        self.files = {}
+
+def write_run_manifest(run_id, source_urls, fact_dir=FACT_DIR):
+    """Record which source URLs a run covered (written after its facts)."""
+    runs_dir = Path(fact_dir) / "runs"
+    runs_dir.mkdir(parents=True, exist_ok=True)
+    save_json({'run_id': run_id, 'source_urls': sorted(source_urls)}, runs_dir / f"{run_id}.json")
+
+def page_facts(family, body, url, args):
+    """Extract one page and convert its rows to facts."""
+    if family == 'players_index':
+        base_url, league = args
+        return index_facts(EXTRACTORS[family](body, base_url, league), league, url)
+    if family == 'nfl_uniform':
+        team_code, num = args
+        return uniform_facts(EXTRACTORS[family](body, team_code), team_code, num, url)
+    attribute, value = args
+    return roster_facts(EXTRACTORS[family](body), attribute, value, url)
+
+# Per-worker writer, created by the pool initializer
+_writer = None
+
+def _init_map_worker(run_id, fact_dir, partitions):
+    global _writer
+    _writer = FactWriter(run_id, fact_dir, partitions)
+
+def _map_page(job):
+    """Worker entry point: load a stored page and write its facts. Returns the URL or None."""
+    family, url, args = job
+    body = page_store.get_body(url)
+    if body is None:
+        return None
+    _writer.write(page_facts(family, body, url, args))
+    # Flush per page so a crashed run never leaves half-written lines behind
+    for f in _writer.files.values():
+        f.flush()
+    return url
+
+def corpus_jobs(leagues, since=None):
+    """
+    List (family, url, args) map jobs for every page family in the corpus.
+
+    Args:
+        leagues: Leagues to include
+        since: Optional Unix time; only pages fetched at or after it are included
+    """
+    jobs = []
+    for league in leagues:
+        league = league.upper()
+        base_url, letters = (NFL_BASE_URL, NFL_LETTERS) if league == 'NFL' else (NBA_BASE_URL, NBA_LETTERS)
+        jobs += [('players_index', index_url(base_url, letter), (base_url, league)) for letter in letters]
+        if league == 'NFL':
+            body = page_store.get_body(teams_list_url(NFL_BASE_URL))
+            for abbr, _ in EXTRACTORS['nfl_team_list'](body) if body else []:
+                team_code = f"nfl_{abbr.upper()}"
+                jobs += [('nfl_uniform', uniform_url(NFL_BASE_URL, abbr, num), (team_code, num)) for num in NUMS]
+            body = page_store.get_body(schools_url(NFL_BASE_URL))
+            for school_name, school_url, _ in EXTRACTORS['nfl_schools'](body, NFL_BASE_URL) if body else []:
+                jobs.append(('nfl_school', school_url, ('college', school_name)))
+        else:
+            jobs += [('nba_franchise', franchise_url(NBA_BASE_URL, team), ('team', f"nba_{team}")) for team in NBA_TEAMS]
+            jobs += [('nba_numbers', number_url(NBA_BASE_URL, num), ('number', num)) for num in NUMS]
+
+    if since is not None:
+        info = page_store.all_page_info()
+        jobs = [job for job in jobs if job[1] in info and info[job[1]]['last_fetched'] >= since]
+    return jobs
+
+def map_corpus(leagues=('NFL', 'NBA'), fact_dir=FACT_DIR, workers=None, since=None,
+               partitions=FACT_PARTITIONS):
+    """
+    Replay stored pages into a new fact run.
+
+    Returns:
+        Run ID, or None if no pages matched
+    """
+    page_store.disable()
+    jobs = corpus_jobs(leagues, since)
+    if not jobs:
+        print("No stored pages to map.")
+        return None
+
+    run_id = new_run_id()
+    workers = workers or os.cpu_count() or 1
+    start_time = time.time()
+    initargs = (run_id, str(fact_dir), partitions)
+    if workers > 1:
+        with ProcessPoolExecutor(workers, initializer=_init_map_worker, initargs=initargs) as pool:
+            chunksize = max(1, len(jobs) // (workers * 4))
+            # Workers flush after every page; their files close when the pool exits
+            mapped = [url for url in pool.map(_map_page, jobs, chunksize=chunksize) if url]
+    else:
+        _init_map_worker(*initargs)
+        mapped = [url for url in map(_map_page, jobs) if url]
+        _writer.close()
+
+    if mapped:
+        write_run_manifest(run_id, mapped, fact_dir)
+    print(f"Mapped {len(mapped)} of {len(jobs)} pages into run {run_id} in {time.time() - start_time:.1f}s")
+    return run_id
+
+# --- Reduce side ---
+
+def latest_runs(fact_dir=FACT_DIR):
+    """Return {source URL: newest run ID that covered it}."""
+    latest = {}
+    for path in sorted((Path(fact_dir) / "runs").glob("*.json")):
+        with open(path, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+        for url in manifest['source_urls']:
+            latest[url] = manifest['run_id']
+    return latest
+
+def _pick(facts):
+    """Deterministic choice among conflicting scalar facts: latest career, then value."""
+    return max(facts, key=lambda fact: ((fact.years or ('', ''))[1] or '', fact.value)).value
+
+def reduce_facts(facts):
+    """
+    Reduce a set of facts into {league: {player ID: record}}.
+
+    Years are the earliest start and latest end over all facts that carry
+    years; list fields are sorted (numbers in NUMS order).
+    """
+    by_player = {}
+    for fact in facts:
+        by_player.setdefault(fact.player_id, []).append(fact)
+
+    leagues = {}
+    for pid in sorted(by_player):
+        player_facts = by_player[pid]
+        league_facts = [f for f in player_facts if f.attribute == 'league']
+        if not league_facts or not any(f.attribute in CREATING_ATTRIBUTES for f in player_facts):
+            continue
+        record = {}
+        names = [f for f in player_facts if f.attribute == 'name']
+        urls = [f for f in player_facts if f.attribute == 'url']
+        if names:
+            record['name'] = _pick(names)
+        if urls:
+            record['url'] = _pick(urls)
+        starts = [f.years[0] for f in player_facts if f.years and f.years[0]]
+        ends = [f.years[1] for f in player_facts if f.years and f.years[1]]
+        if starts or names:
+            record['start_year'] = min(starts) if starts else None
+            record['end_year'] = max(ends) if ends else None
+        record['league'] = _pick(league_facts)
+        record['id'] = pid
+        for attribute, field in LIST_FIELDS.items():
+            values = {f.value for f in player_facts if f.attribute == attribute}
+            if attribute == 'number':
+                record[field] = sorted(values, key=lambda n: (NUMBER_ORDER.get(n, len(NUMS)), n))
+            else:
+                record[field] = sorted(values)
+        leagues.setdefault(record['league'], {})[pid] = record
+    return leagues
+
+def reduce_partition(job):
+    """
+    Worker entry point: read one partition's shards and reduce them.
+
+    Args:
+        job: (partition dir, {source URL: newest run ID})
+    """
+    part_dir, latest = job
+    facts = set()
+    for path in sorted(Path(part_dir).glob("*.ndjson")):
+        run_id = path.name.split('-', 1)[0]
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                if not line.endswith('\n'):
+                    continue  # torn final line from an interrupted writer
+                pid, attribute, value, source_url, years = json.loads(line)
+                # Facts from a superseded (or unfinished) run of this page are ignored
+                if latest.get(source_url) != run_id:
+                    continue
+                facts.add(Fact(pid, attribute, value, source_url, tuple(years) if years else None))
+    return reduce_facts(facts)
+
+def prune_runs(fact_dir=FACT_DIR):
+    """Delete shards and manifests of runs fully superseded by newer runs. Returns the runs removed."""
+    live = set(latest_runs(fact_dir).values())
+    removed = set()
+    for path in Path(fact_dir).glob("part-*/*.ndjson"):
+        run_id = path.name.split('-', 1)[0]
+        if run_id not in live:
+            path.unlink()
+            removed.add(run_id)
+    for path in (Path(fact_dir) / "runs").glob("*.json"):
+        if path.stem not in live:
+            path.unlink()
+            removed.add(path.stem)
+    print(f"Pruned {len(removed)} superseded run(s)")
+    return sorted(removed)
+
+def build_dbs(fact_dir=FACT_DIR, output_dir=SCRAPER_DIR, leagues=('NFL', 'NBA'), workers=None):
+    """
+    Reduce all fact partitions into players_db_<league>.json files.
+
+    Returns:
+        Dict of league -> DB path written
+    """
+    start_time = time.time()
+    latest = latest_runs(fact_dir)
+    part_dirs = sorted(Path(fact_dir).glob("part-*"))
+    jobs = [(str(part_dir), latest) for part_dir in part_dirs]
+    workers = workers or os.cpu_count() or 1
+    if workers > 1 and len(jobs) > 1:
+        with ProcessPoolExecutor(workers) as pool:
+            results = list(pool.map(reduce_partition, jobs))
+    else:
+        results = [reduce_partition(job) for job in jobs]
+
+    written = {}
+    for league in leagues:
+        league = league.upper()
+        players = {}
+        for result in results:
+            players.update(result.get(league, {}))
+        players = {pid: players[pid] for pid in sorted(players)}
+        db_path = Path(output_dir) / f"players_db_{league.lower()}.json"
+        save_json(players, db_path)
+        written[league] = db_path
+        print(f"Built {len(players)} {league} players from facts")
+    print(f"Reduced {len(part_dirs)} partitions in {time.time() - start_time:.1f}s")
+    return written
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Map stored pages to facts and reduce facts to player DBs")
+    parser.add_argument("command", choices=["map", "reduce", "build", "prune"])
+    parser.add_argument("--leagues", nargs="+", choices=["NBA", "NFL"], default=["NBA", "NFL"])
+    parser.add_argument("--fact-dir", default=str(FACT_DIR), help="Fact partition directory")
+    parser.add_argument("--output-dir", default=str(SCRAPER_DIR), help="Directory for the built DB files")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: all cores)")
+    parser.add_argument("--since", help="map: only pages fetched on or after this date (YYYY-MM-DD)")
+    args = parser.parse_args()
+
+    if args.command == 'prune':
+        prune_runs(args.fact_dir)
+    else:
+        since = datetime.strptime(args.since, "%Y-%m-%d").timestamp() if args.since else None
+        if args.command in ('map', 'build'):
+            map_corpus(args.leagues, args.fact_dir, args.workers, since)
+        if args.command in ('reduce', 'build'):
+            build_dbs(args.fact_dir, args.output_dir, args.leagues, args.workers)
@@ -0,0 +1,256 @@
+"""
+Local stand-in for Pro-Football-Reference / Basketball-Reference.
+
+Serves synthetic but structurally faithful pages (same table ids, data-stat
+attributes and link formats the extractors look for) for a deterministic fake
+player population, so the full pipeline can be exercised and load-tested
+without touching the real sites.
+
+Pages served:
+    NFL: /players/<L>/, /teams/, /players/uniform.cgi?team=..&number=..,
+         /schools/, /schools/<slug>/
+    NBA: /players/<l>/, /teams/<TEAM>/players.html, /friv/numbers.fcgi?number=..
+
+Latency, 429 rate (with Retry-After) and 5xx failure rate are configurable.
+
+Usage:
+    python fake_server.py NFL --port 8001 --players 5000
+    python fake_server.py NBA --port 8002 --latency 0.05 --rate-429 0.02 --failure-rate 0.01
+
+    SCRAPER_NFL_BASE_URL=http://127.0.0.1:8001 SCRAPER_REQUEST_DELAY=0 python fetch_players.py NFL
+"""
+
+import argparse
+import html
+import random
+import string
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+from config import NBA_TEAMS, NUMS
+
+NFL_TEAM_ABBRS = [
+    "crd", "atl", "rav", "buf", "car", "chi", "cin", "cle", "dal", "den", "det",
+    "gnb", "htx", "clt", "jax", "kan", "rai", "sdg", "ram", "mia", "min", "nwe",
+    "nor", "nyg", "nyj", "phi", "pit", "sfo", "sea", "tam", "oti", "was"
+]
+SCHOOL_NAMES = [
+    "Alabama", "Auburn", "Boston College", "Clemson", "Duke", "Florida", "Florida St.",
+    "Georgia", "Iowa", "LSU", "Miami (FL)", "Michigan", "Michigan St.", "Nebraska",
+    "North Carolina", "Notre Dame", "Ohio St.", "Oklahoma", "Oregon", "Penn St.",
+    "Stanford", "Tennessee", "Texas", "Texas A&M", "UCLA", "USC", "Virginia Tech",
+    "Washington", "Wisconsin", "Kentucky", "Kansas", "Arizona", "Syracuse", "Villanova",
+]
+
+class FakeWorld:
+    """Deterministic synthetic player population for one league."""
+
+    def __init__(self, league, n_players, seed=0):
+        self.league = league.upper()
+        rng = random.Random(f"{self.league}:{seed}")
+        teams = NFL_TEAM_ABBRS if self.league == 'NFL' else NBA_TEAMS
+        self.players = []
+        seen_ids = set()
+        for i in range(n_players):
+            last = rng.choice(string.ascii_uppercase) + ''.join(rng.choices(string.ascii_lowercase, k=rng.randint(3, 8)))
+            first = rng.choice(string.ascii_uppercase) + ''.join(rng.choices(string.ascii_lowercase, k=rng.randint(2, 6)))
+            if self.league == 'NFL':
+                pid = f"{last[:4]}{first[:2]}{i % 100:02d}"
+            else:
+                pid = f"{last[:5].lower()}{first[:2].lower()}{i % 100:02d}"
+            if pid in seen_ids:
+                pid = f"{pid}{i}"
+            seen_ids.add(pid)
+            start = rng.randint(1950, 2024)
+            end = min(2025, start + rng.randint(0, 15))
+            self.players.append({
+                'id': pid,
+                'name': f"{first} {last}",
+                'letter': last[0],
+                'start_year': start,
+                'end_year': end,
+                'teams': sorted(rng.sample(teams, rng.randint(1, 4))),
+                'numbers': sorted(rng.sample(NUMS, rng.randint(1, 3))),
+                'college': rng.choice(SCHOOL_NAMES) if rng.random() < 0.85 else None,
+            })
+        self.by_letter = {}
+        self.by_team_number = {}
+        self.by_team = {}
+        self.by_number = {}
+        self.by_school = {}
+        for p in self.players:
+            self.by_letter.setdefault(p['letter'].upper(), []).append(p)
+            for team in p['teams']:
+                self.by_team.setdefault(team, []).append(p)
+                for num in p['numbers']:
+                    self.by_team_number.setdefault((team, num), []).append(p)
+            for num in p['numbers']:
+                self.by_number.setdefault(num, []).append(p)
+            if p['college']:
+                self.by_school.setdefault(school_slug(p['college']), []).append(p)
+
+    def player_href(self, p):
+        if self.league == 'NFL':
+            return f"/players/{p['id'][0].upper()}/{p['id']}.htm"
+        return f"/players/{p['id'][0].lower()}/{p['id']}.html"
+
+def school_slug(name):
+    return ''.join(c for c in name.lower() if c.isalnum())
+
+def _page(title, body):
+    return f"<!DOCTYPE html><html><head><title>{html.escape(title)}</title></head><body>{body}</body></html>"
+
+def render(world, path, query):
+    """Return (status, html) for a request path, mirroring the real site's structure."""
+    parts = [p for p in path.split('/') if p]
+    esc = html.escape
+
+    if len(parts) == 2 and parts[0] == 'players' and len(parts[1]) == 1:
+        players = world.by_letter.get(parts[1].upper(), [])
+        if world.league == 'NBA':
+            rows = ''
+            for p in players:
+                college = f"<a href=\"/friv/colleges.fcgi\">{esc(p['college'])}</a>" if p['college'] else ''
+                rows += (
+                    f"<tr><th data-stat=\"player\"><a href=\"{world.player_href(p)}\">{esc(p['name'])}</a></th>"
+                    f"<td data-stat=\"year_min\">{p['start_year']}</td><td data-stat=\"year_max\">{p['end_year']}</td>"
+                    f"<td data-stat=\"pos\">G</td><td data-stat=\"colleges\">{college}</td></tr>"
+                )
+            return 200, _page("Players", f"<table id=\"players\"><thead><tr><th>Player</th></tr></thead><tbody>{rows}</tbody></table>")
+        rows = ''.join(
+            f"<p><a href=\"{world.player_href(p)}\">{esc(p['name'])}</a> (QB) {p['start_year']}-{p['end_year']}</p>"
+            for p in players
+        )
+        return 200, _page("Players", f"<div id=\"div_players\">{rows}</div>")
+
+    if world.league == 'NFL':
+        if parts == ['teams']:
+            rows = ''.join(
+                f"<tr><th data-stat=\"team_name\"><a href=\"/teams/{abbr}/\">Team {abbr.upper()}</a></th><td>1960</td></tr>"
+                for abbr in NFL_TEAM_ABBRS
+            )
+            return 200, _page("Teams", f"<table id=\"teams_active\"><tbody>{rows}</tbody></table>")
+        if parts == ['players', 'uniform.cgi']:
+            team = query.get('team', [''])[0]
+            num = query.get('number', [''])[0]
+            players = world.by_team_number.get((team, num), [])
+            rows = ''.join(
+                f"<tr><td data-stat=\"player\"><a href=\"{world.player_href(p)}\">{esc(p['name'])}</a></td>"
+                f"<td data-stat=\"year_min\">{p['start_year']}</td><td data-stat=\"year_max\">{p['end_year']}</td></tr>"
+                for p in players
+            )
+            return 200, _page("Uniform", f"<table id=\"uniform\"><thead><tr><th>Player</th><th>From</th><th>To</th></tr></thead><tbody>{rows}</tbody></table>")
+        if parts == ['schools']:
+            rows = ''
+            for name in SCHOOL_NAMES:
+                alumni = world.by_school.get(school_slug(name), [])
+                latest = max((p['end_year'] for p in alumni), default='')
+                rows += (
+                    f"<tr><th data-stat=\"ranker\">1</th><td data-stat=\"college_name\"><a href=\"/schools/{school_slug(name)}/\">{esc(name)}</a></td>"
+                    f"<td data-stat=\"players\">{len(alumni)}</td><td data-stat=\"year_max\">{latest}</td></tr>"
+                )
+            return 200, _page("Schools", f"<table id=\"college_stats_table\"><tbody>{rows}</tbody></table>")
+        if len(parts) == 2 and parts[0] == 'schools':
+            alumni = world.by_school.get(parts[1], [])
+            rows = ''.join(
+                f"<tr><th data-stat=\"ranker\">{i}</th><td data-stat=\"player\"><a href=\"{world.player_href(p)}\">{esc(p['name'])}</a></td></tr>"
+                for i, p in enumerate(alumni, 1)
+            )
+            return 200, _page("School", f"<table id=\"all_players\"><tbody>{rows}</tbody></table>")
+    else:
+        if len(parts) == 3 and parts[0] == 'teams' and parts[2] == 'players.html':
+            players = world.by_team.get(parts[1], [])
+            rows = ''.join(
+                f"<tr><td data-stat=\"player\"><a href=\"{world.player_href(p)}\">{esc(p['name'])}</a></td>"
+                f"<td data-stat=\"year_min\">{p['start_year']}</td></tr>"
+                for p in players
+            )
+            return 200, _page("Franchise", f"<table id=\"franchise_register\"><tbody>{rows}</tbody></table>")
+        if parts == ['friv', 'numbers.fcgi']:
+            num = query.get('number', [''])[0]
+            rows = ''.join(
+                f"<tr><th data-stat=\"player\"><a href=\"{world.player_href(p)}\">{esc(p['name'])}</a></th></tr>"
+                for p in world.by_number.get(num, [])
+            )
+            return 200, _page("Numbers", f"<table id=\"uniform_number\"><tbody>{rows}</tbody></table>")
+
+    return 404, _page("Not Found", "<p>Page not found</p>")
+
+def make_handler(world, latency=0.0, rate_429=0.0, failure_rate=0.0, retry_after=1, seed=0):
+    rng = random.Random(seed)
+    rng_lock = threading.Lock()
+    counters = {'requests': 0, '429': 0, 'errors': 0}
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            with rng_lock:
+                roll = rng.random()
+                counters['requests'] += 1
+            if latency:
+                time.sleep(latency)
+            if roll < rate_429:
+                with rng_lock:
+                    counters['429'] += 1
+                self.send_response(429)
+                self.send_header('Retry-After', str(retry_after))
+                self.end_headers()
+                return
+            if roll < rate_429 + failure_rate:
+                with rng_lock:
+                    counters['errors'] += 1
+                self.send_error(503)
+                return
+            url = urlparse(self.path)
+            status, body = render(world, url.path, parse_qs(url.query))
+            data = body.encode('utf-8')
+            self.send_response(status)
+            self.send_header('Content-Type', 'text/html; charset=utf-8')
+            self.send_header('Content-Length', str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, *args):
+            pass
+
+    Handler.counters = counters
+    return Handler
+
+def serve(league, port=0, players=2000, latency=0.0, rate_429=0.0, failure_rate=0.0,
+          retry_after=1, seed=0, ready=None):
+    """
+    Run a stand-in server until interrupted.
+
+    Args:
+        ready: Optional multiprocessing Queue/Connection; receives the bound port
+    """
+    world = FakeWorld(league, players, seed)
+    handler = make_handler(world, latency, rate_429, failure_rate, retry_after, seed)
+    server = ThreadingHTTPServer(('127.0.0.1', port), handler)
+    bound_port = server.server_address[1]
+    if ready is not None:
+        ready.put(bound_port)
+    else:
+        print(f"Serving fake {league.upper()} site ({players} players) on http://127.0.0.1:{bound_port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Local stand-in for Sports Reference sites")
+    parser.add_argument("league", choices=["NFL", "NBA"])
+    parser.add_argument("--port", type=int, default=8001)
+    parser.add_argument("--players", type=int, default=2000, help="Synthetic players to generate")
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds of latency per request")
+    parser.add_argument("--rate-429", type=float, default=0.0, help="Fraction of requests answered with 429")
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="Fraction of requests answered with 503")
+    parser.add_argument("--retry-after", type=int, default=1, help="Retry-After seconds sent with 429s")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    serve(args.league, args.port, args.players, args.latency, args.rate_429,
+          args.failure_rate, args.retry_after, args.seed)
@@ -6,25 +6,48 @@ with their colleges.
 
 Note: NBA colleges are scraped directly in fetch_players.py from player list pages.
 
+Crawls are incremental: the summary columns of each school's row in the
+/schools/ table (player counts, latest year, ...) are snapshotted next to the
+DB, and only schools whose summary changed since the last run are re-crawled.
+
 Usage:
     python fetch_colleges.py NFL players_db_nfl.json
+    python fetch_colleges.py NFL players_db_nfl.json --full   # ignore the snapshot
 """
 
 import requests
 from bs4 import BeautifulSoup
 from pathlib import Path
-import time
 import argparse
 import os
-from utils import fetch_with_retry, load_json, save_json
-from config import NFL_BASE_URL
+from profiling import add_profile_args, enable_profiling, profile_step
+from extract_cache import cached_extractor
+from progress import TRACKER
+from utils import CircuitOpenError, FetchQueue, ZeroYieldWatchdog, fetch_with_retry, load_json, save_json
+from config import NFL_BASE_URL, REQUEST_DELAY
+
+def schools_url(base_url):
+    return f"{base_url}/schools/"
+
+def snapshot_path(db_path):
+    """School summary snapshot stored alongside the DB file."""
+    db_path = Path(db_path)
+    return db_path.with_name(f"{db_path.stem}_school_snapshot.json")
 
 def scrape_schools(session, base_url):
-    """Returns a list of (school_name, school_url) tuples."""
-    url = f"{base_url}/schools/"
+    """Returns a list of (school_name, school_url, summary) tuples."""
+    url = schools_url(base_url)
     print(f"Fetching schools from {url}")
     resp = fetch_with_retry(url, session)
-    soup = BeautifulSoup(resp.text, "html.parser")
+    return [tuple(school) for school in extract_schools(resp.text, base_url)]
+
+@cached_extractor('nfl_schools', version=2)
+def extract_schools(html, base_url):
+    """
+    Parse the /schools/ page into [school_name, school_url, summary] rows,
+    where summary maps each other data-stat column to its text.
+    """
+    soup = BeautifulSoup(html, "html.parser")
     
     table = soup.find("table", id="college_stats_table")
     if not table:
@@ -44,14 +67,24 @@ def scrape_schools(session, base_url):
         
         name = link.text.strip()
         href = link["href"]
-        schools.append((name, base_url + href))
+        summary = {
+            td["data-stat"]: td.get_text(strip=True)
+            for td in row.find_all("td", attrs={"data-stat": True})
+            if td["data-stat"] != "college_name"
+        }
+        schools.append([name, base_url + href, summary])
         
     return schools
 
 def scrape_players_from_school(school_url, session):
     """Returns a list of player IDs."""
     resp = fetch_with_retry(school_url, session)
-    soup = BeautifulSoup(resp.text, "html.parser")
+    return extract_school_player_ids(resp.text)
+
+@cached_extractor('nfl_school', version=1)
+def extract_school_player_ids(html):
+    """Parse a school page's all_players table into player IDs."""
+    soup = BeautifulSoup(html, "html.parser")
     
     table = soup.find("table", id="all_players") # PFR uses all_players
     if not table:
@@ -73,66 +106,103 @@ def scrape_players_from_school(school_url, session):
         
     return player_ids
 
-def fetch_colleges(league, db_path):
+def apply_school_ids(players, roster_ids, school_name):
+    """Add a college to every known player on a school page. Returns the update count."""
+    updated_count = 0
+    for pid in roster_ids:
+        if pid in players:
+            cols = players[pid].setdefault("colleges", [])
+            if school_name not in cols:
+                cols.append(school_name)
+                updated_count += 1
+    return updated_count
+
+def fetch_colleges(league, db_path, session=None, players=None, incremental=True):
     if league.upper() != 'NFL':
         print("fetch_colleges currently only supports NFL (PFR). Skipping.")
-        return
+        return players
 
-    session = requests.Session()
-    session.headers.update({
-        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64)'
-    })
+    if session is None:
+        session = requests.Session()
+        session.headers.update({
+            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64)'
+        })
     
-    players = load_json(db_path)
+    if players is None:
+        players = load_json(db_path)
     base_url = NFL_BASE_URL
     
     schools = scrape_schools(session, base_url)
     print(f"Found {len(schools)} schools.")
     
-    total_requests = len(schools)
-    start_time = time.time()
+    # Only trust the snapshot if the DB actually holds colleges from a
+    # previous crawl; a fresh or rebuilt DB needs every school page.
+    snapshot_file = snapshot_path(db_path)
+    snapshot = load_json(snapshot_file) if incremental else {}
+    if snapshot and not any(p.get('colleges') for p in players.values()):
+        print("DB has no colleges yet; ignoring school snapshot.")
+        snapshot = {}
     
-    for idx, (school_name, school_url) in enumerate(schools, 1):
-        print(f"[{idx}/{len(schools)}] Scraping {school_name} ...", end=" ", flush=True)
-        
-        try:
-            roster_ids = scrape_players_from_school(school_url, session)
-        except Exception as e:
-            print(f"Error: {e}")
-            continue
+    to_crawl = [s for s in schools if snapshot.get(s[1]) != s[2]]
+    skipped = len(schools) - len(to_crawl)
+    if incremental:
+        print(f"{len(to_crawl)} schools changed since last run; skipping {skipped} unchanged.")
+    
+    progress = TRACKER.step("nfl_colleges", len(to_crawl))
+    watchdog = ZeroYieldWatchdog('nfl_school')
+    
+    queue = FetchQueue(to_crawl, progress)
+    try:
+        for idx, (school_name, school_url, summary) in enumerate(queue, 1):
+            print(f"[{idx}/{progress.total}] Scraping {school_name} ...", end=" ", flush=True)
+            progress.advance()
             
-        print(f"found {len(roster_ids)} players.")
-        
-        updated_count = 0
-        for pid in roster_ids:
-            if pid in players:
-                cols = players[pid].setdefault("colleges", [])
-                if school_name not in cols:
-                    cols.append(school_name)
-                    updated_count += 1
-        
-        # Calculate progress
-        elapsed = time.time() - start_time
-        avg_time_per_req = elapsed / idx
-        remaining_reqs = total_requests - idx
-        estimated_time_remaining = remaining_reqs * avg_time_per_req
-        percent_complete = (idx / total_requests) * 100
-        
-        mins_remaining = int(estimated_time_remaining // 60)
-        secs_remaining = int(estimated_time_remaining % 60)
-        
-        print(f"Progress: {idx}/{total_requests} ({percent_complete:.1f}%) - Est. {mins_remaining}m {secs_remaining}s remaining")
-        
-        # Save periodically
-        if idx % 10 == 0:
-            save_json(players, db_path)
-        
-    save_json(players, db_path)
+            try:
+                roster_ids = scrape_players_from_school(school_url, session)
+            except CircuitOpenError as e:
+                print(f"Deferred: {e}")
+                queue.defer(e)
+                continue
+            except Exception as e:
+                # Leave the snapshot entry stale so this school is retried next run
+                print(f"Error: {e}")
+                continue
+                
+            print(f"found {len(roster_ids)} players.")
+            
+            # Raises before the snapshot records this school, so it is retried next run
+            watchdog.observe(roster_ids, school_url)
+            apply_school_ids(players, roster_ids, school_name)
+            snapshot[school_url] = summary
+            
+            print(progress.status_line())
+            
+            # Save periodically
+            if idx % 10 == 0:
+                save_json(players, db_path)
+                save_json(snapshot, snapshot_file)
+    finally:
+        # Also runs when the watchdog raises, so schools merged so far are kept
+        save_json(players, db_path)
+        save_json(snapshot, snapshot_file)
+    progress.finish()
+    
+    if skipped:
+        # Each skipped school is one request (3.1s at the rate limit)
+        saved_minutes = skipped * REQUEST_DELAY / 60
+        print(f"Incremental crawl saved {skipped} requests (~{saved_minutes:.0f} min at the rate limit).")
+    return players
 
 if __name__ == '__main__':
     parser = argparse.ArgumentParser()
     parser.add_argument("league", choices=["NFL", "NBA"])
     parser.add_argument("db_path", help="Path to the players database JSON")
+    parser.add_argument("--full", action="store_true", help="Re-crawl every school, ignoring the snapshot")
+    add_profile_args(parser)
     args = parser.parse_args()
     
-    fetch_colleges(args.league, args.db_path)
+    if args.profile:
+        enable_profiling(args.profile_dir)
+    
+    with profile_step(f"{args.league.lower()}_fetch_colleges"):
+        fetch_colleges(args.league, args.db_path, incremental=not args.full)
@@ -13,11 +13,17 @@ Usage:
 import requests
 from bs4 import BeautifulSoup
 from pathlib import Path
-import time
 import argparse
-from utils import fetch_with_retry, load_json, save_json
+from profiling import add_profile_args, enable_profiling, profile_step
+from extract_cache import cached_extractor
+from progress import TRACKER
+from utils import CircuitOpenError, FetchQueue, ZeroYieldWatchdog, fetch_with_retry, load_json, save_json
 from config import NBA_BASE_URL, NUMS
 
+def number_url(base_url, num):
+    return base_url + '/friv/numbers.fcgi?number=' + num
+
+@cached_extractor('nba_numbers', version=1)
 def extract_player_ids(html):
     soup = BeautifulSoup(html, 'html.parser')
     # BR uses "numbers" for the table id in friv/numbers.fcgi
@@ -47,64 +53,72 @@ def extract_player_ids(html):
         
     return ids
 
-def fetch_numbers(league, db_path):
+def apply_number_ids(players, roster_ids, num):
+    """Add a jersey number to every known player on a number page. Returns the update count."""
+    updated_count = 0
+    for pid in roster_ids:
+        if pid in players:
+            player = players[pid]
+            nums = player.setdefault('numbers', [])
+            if num not in nums:
+                nums.append(num)
+                updated_count += 1
+    return updated_count
+
+def fetch_numbers(league, db_path, session=None, players=None):
     """Only for NBA - NFL numbers are handled in fetch_teams.py"""
     if league.upper() != 'NBA':
         print(f"fetch_numbers is only for NBA. Skipping for {league}.")
-        return
+        return players
         
-    session = requests.Session()
-    session.headers.update({
-        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64)'
-    })
+    if session is None:
+        session = requests.Session()
+        session.headers.update({
+            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64)'
+        })
     
-    players = load_json(db_path)
+    if players is None:
+        players = load_json(db_path)
     base_url = NBA_BASE_URL
-    url_pattern = base_url + '/friv/numbers.fcgi?number='
     
-    total_requests = len(NUMS)
-    request_count = 0
-    start_time = time.time()
+    progress = TRACKER.step("nba_numbers", len(NUMS))
+    watchdog = ZeroYieldWatchdog('nba_numbers')
     
-    for num in NUMS:
-        request_count += 1
-        url = url_pattern + num
+    queue = FetchQueue(NUMS, progress)
+    for num in queue:
+        progress.advance()
+        url = number_url(base_url, num)
         
         try:
             resp = fetch_with_retry(url, session)
             roster_ids = extract_player_ids(resp.text)
             print(f"  Found {len(roster_ids)} players for #{num}")
+        except CircuitOpenError as e:
+            queue.defer(e)
+            continue
         except Exception as e:
             print(f"Error fetching number {num}: {e}")
             continue
             
-        updated_count = 0
-        for pid in roster_ids:
-            if pid in players:
-                player = players[pid]
-                nums = player.setdefault('numbers', [])
-                if num not in nums:
-                    nums.append(num)
-                    updated_count += 1
-        
-        # Calculate progress
-        elapsed = time.time() - start_time
-        avg_time_per_req = elapsed / request_count
-        remaining_reqs = total_requests - request_count
-        estimated_time_remaining = remaining_reqs * avg_time_per_req
-        percent_complete = (request_count / total_requests) * 100
+        watchdog.observe(roster_ids, url)
+        apply_number_ids(players, roster_ids, num)
         
-        mins_remaining = int(estimated_time_remaining // 60)
-        secs_remaining = int(estimated_time_remaining % 60)
-        
-        print(f"Progress: {request_count}/{total_requests} ({percent_complete:.1f}%) - Est. {mins_remaining}m {secs_remaining}s remaining")
+        print(progress.status_line())
         
         save_json(players, db_path)
+    
+    progress.finish()
+    return players
 
 if __name__ == '__main__':
     parser = argparse.ArgumentParser()
     parser.add_argument("league", choices=["NFL", "NBA"])
     parser.add_argument("db_path", help="Path to the players database JSON")
+    add_profile_args(parser)
     args = parser.parse_args()
     
-    fetch_numbers(args.league, args.db_path)
+    if args.profile:
+        enable_profiling(args.profile_dir)
+    
+    with profile_step(f"{args.league.lower()}_fetch_numbers"):
+        fetch_numbers(args.league, args.db_path)
@@ -12,10 +12,12 @@ Usage:
 import requests
 from bs4 import BeautifulSoup
 from pathlib import Path
-import time
 import argparse
 import re
-from utils import fetch_with_retry, save_json, load_json
+from profiling import add_profile_args, enable_profiling, profile_step
+from extract_cache import cached_extractor
+from progress import TRACKER
+from utils import CircuitOpenError, FetchQueue, ZeroYieldWatchdog, fetch_with_retry, save_json, load_json
 from config import NFL_BASE_URL, NBA_BASE_URL, NFL_LETTERS, NBA_LETTERS
 
 def extract_years(text):
@@ -28,15 +30,32 @@ def extract_years(text):
         return match.group(1), match.group(2)
     return None, None
 
+def index_url(base_url, letter):
+    return f"{base_url}/players/{letter}/"
+
 def get_players_for_letter(base_url, letter, session, league):
-    url = f"{base_url}/players/{letter}/"
+    """Players on one index page, or None if the page could not be fetched."""
+    url = index_url(base_url, letter)
     try:
         resp = fetch_with_retry(url, session)
+    except CircuitOpenError:
+        raise
     except Exception as e:
         print(f"Error fetching {url}: {e}")
-        return []
+        return None
+
+    players = extract_players_from_index(resp.text, base_url, league)
+    if not players:
+        print(f"No player list found for {url}")
+    return players
 
-    soup = BeautifulSoup(resp.text, 'html.parser')
+@cached_extractor('players_index', version=1)
+def extract_players_from_index(html, base_url, league):
+    """
+    Parse a player index page (one letter) into a list of player dicts:
+    {name, url, start_year, end_year, colleges}.
+    """
+    soup = BeautifulSoup(html, 'html.parser')
     
     # Try finding the table first (BBR style - for NBA)
     table = soup.find('table', id='players')
@@ -113,14 +132,54 @@ def get_players_for_letter(base_url, letter, session, league):
             })
         return players
 
-    print(f"No player list found for {url}")
     return []
 
-def fetch_players(league, output_path=None):
-    session = requests.Session()
-    session.headers.update({
-        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/114.0.0.0 Safari/537.36'
-    })
+def apply_index_players(all_players_db, new_players_list, league):
+    """Merge players parsed from one index page into the DB (in place)."""
+    for p in new_players_list:
+        url = p['url']
+        pid = Path(url).stem
+        
+        if pid not in all_players_db:
+            all_players_db[pid] = {}
+            
+        # Update fields
+        all_players_db[pid]['name'] = p['name']
+        all_players_db[pid]['url'] = p['url']
+        all_players_db[pid]['start_year'] = p.get('start_year')
+        all_players_db[pid]['end_year'] = p.get('end_year')
+        all_players_db[pid]['league'] = league.upper()
+        all_players_db[pid]['id'] = pid
+        
+        # Initialize lists if not present
+        all_players_db[pid].setdefault('teams', [])
+        all_players_db[pid].setdefault('numbers', [])
+        all_players_db[pid].setdefault('colleges', [])
+        
+        # Add colleges from list if present (for NBA - scraped in Step 1)
+        if 'colleges' in p and p['colleges']:
+             for c in p['colleges']:
+                 if c not in all_players_db[pid]['colleges']:
+                     all_players_db[pid]['colleges'].append(c)
+
+def fetch_players(league, output_path=None, session=None, players=None):
+    """
+    Scrape the A-Z player index for a league into the player DB.
+
+    Args:
+        league: 'NFL' or 'NBA'
+        output_path: DB file to update (default: players_db_<league>.json)
+        session: Optional requests.Session to reuse (created if omitted)
+        players: Optional in-memory DB to update instead of loading output_path
+
+    Returns:
+        The updated player DB dict
+    """
+    if session is None:
+        session = requests.Session()
+        session.headers.update({
+            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/114.0.0.0 Safari/537.36'
+        })
     
     if league.upper() == 'NFL':
         base_url = NFL_BASE_URL
@@ -135,67 +194,51 @@ def fetch_players(league, output_path=None):
         output_path = f'players_db_{league.lower()}.json'
 
     # Load existing DB to resume or start fresh
-    all_players_db = load_json(output_path)
+    all_players_db = players if players is not None else load_json(output_path)
     if not isinstance(all_players_db, dict):
         all_players_db = {}
         
     print(f"Starting scrape for {league} players...")
     
-    total_requests = len(letters)
-    start_time = time.time()
+    progress = TRACKER.step(f"{league.lower()}_players", len(letters))
+    watchdog = ZeroYieldWatchdog('players_index')
     
-    for idx, letter in enumerate(letters, 1):
+    queue = FetchQueue(letters, progress)
+    for letter in queue:
         print(f"Fetching players for letter: {letter}")
-        new_players_list = get_players_for_letter(base_url, letter, session, league)
+        try:
+            new_players_list = get_players_for_letter(base_url, letter, session, league)
+        except CircuitOpenError as e:
+            progress.advance()
+            queue.defer(e)
+            continue
+        progress.advance()
+        if new_players_list is None:
+            # A failed fetch says nothing about the page layout
+            continue
+        watchdog.observe(new_players_list, index_url(base_url, letter))
         
         # Process list into DB format
-        for p in new_players_list:
-            url = p['url']
-            pid = Path(url).stem
-            
-            if pid not in all_players_db:
-                all_players_db[pid] = {}
-                
-            # Update fields
-            all_players_db[pid]['name'] = p['name']
-            all_players_db[pid]['url'] = p['url']
-            all_players_db[pid]['start_year'] = p.get('start_year')
-            all_players_db[pid]['end_year'] = p.get('end_year')
-            all_players_db[pid]['league'] = league.upper()
-            all_players_db[pid]['id'] = pid
-            
-            # Initialize lists if not present
-            all_players_db[pid].setdefault('teams', [])
-            all_players_db[pid].setdefault('numbers', [])
-            all_players_db[pid].setdefault('colleges', [])
-            
-            # Add colleges from list if present (for NBA - scraped in Step 1)
-            if 'colleges' in p and p['colleges']:
-                 for c in p['colleges']:
-                     if c not in all_players_db[pid]['colleges']:
-                         all_players_db[pid]['colleges'].append(c)
-        
-        # Calculate progress
-        elapsed = time.time() - start_time
-        avg_time_per_req = elapsed / idx
-        remaining_reqs = total_requests - idx
-        estimated_time_remaining = remaining_reqs * avg_time_per_req
-        percent_complete = (idx / total_requests) * 100
-        
-        mins_remaining = int(estimated_time_remaining // 60)
-        secs_remaining = int(estimated_time_remaining % 60)
+        apply_index_players(all_players_db, new_players_list, league)
         
         print(f"Processed {len(new_players_list)} players. Total in DB: {len(all_players_db)}")
-        print(f"Progress: {idx}/{total_requests} ({percent_complete:.1f}%) - Est. {mins_remaining}m {secs_remaining}s remaining")
+        print(progress.status_line())
         
         # Save incrementally
         save_json(all_players_db, output_path)
 
+    progress.finish()
     print(f"Completed. Saved {len(all_players_db)} players to {output_path}")
+    return all_players_db
 
 if __name__ == '__main__':
     parser = argparse.ArgumentParser(description="Scrape players list from Reference sites")
     parser.add_argument("league", choices=["NFL", "NBA"], help="League to scrape")
+    add_profile_args(parser)
     args = parser.parse_args()
     
-    fetch_players(args.league)
+    if args.profile:
+        enable_profiling(args.profile_dir)
+    
+    with profile_step(f"{args.league.lower()}_fetch_players"):
+        fetch_players(args.league)
@@ -14,24 +14,42 @@ Usage:
 import requests
 from bs4 import BeautifulSoup
 from pathlib import Path
-import time
 import argparse
 import os
-from utils import fetch_with_retry, load_json, save_json
+from profiling import add_profile_args, enable_profiling, profile_step
+from extract_cache import cached_extractor
+from progress import TRACKER
+from utils import (
+    CircuitOpenError, FetchQueue, LayoutChangeError, ZeroYieldWatchdog, fetch_with_retry, load_json, save_json
+)
 from config import (
     NFL_BASE_URL, NBA_BASE_URL,
     NBA_TEAMS, NUMS
 )
 
+def teams_list_url(base_url):
+    return f"{base_url}/teams/"
+
+def uniform_url(base_url, abbr, num):
+    return f"{base_url}/players/uniform.cgi?team={abbr.lower()}&number={num}"
+
+def franchise_url(base_url, team):
+    return f"{base_url}/teams/{team}/players.html"
+
 def get_active_teams_nfl(session, base_url):
     """
     Scrape the main /teams/ page and return a list of
     (abbr, full_name) for each active NFL franchise.
     """
-    url = f"{base_url}/teams/"
+    url = teams_list_url(base_url)
     print(f"Fetching active NFL teams from {url}")
     resp = fetch_with_retry(url, session)
-    soup = BeautifulSoup(resp.text, "html.parser")
+    return [tuple(team) for team in extract_active_teams_nfl(resp.text)]
+
+@cached_extractor('nfl_team_list', version=1)
+def extract_active_teams_nfl(html):
+    """Parse the /teams/ page into [abbr, full_name] pairs for active franchises."""
+    soup = BeautifulSoup(html, "html.parser")
     
     # Find the "Active Franchises" section:
     table = soup.find("table", id="teams_active")
@@ -50,10 +68,11 @@ def get_active_teams_nfl(session, base_url):
         # e.g. link['href'] = '/teams/crd/'
         abbr = os.path.basename(os.path.dirname(link["href"]))
         full_name = link.text.strip()
-        teams.append((abbr, full_name))
+        teams.append([abbr, full_name])
         
     return teams
 
+@cached_extractor('nfl_uniform', version=1)
 def extract_player_data_uniform(html, team_code):
     """
     Extract player ID, years, and number from a uniform page.
@@ -118,23 +137,67 @@ def extract_player_data_uniform(html, team_code):
         
     return players_found
 
-def fetch_teams_nfl(db_path, players):
-    session = requests.Session()
-    session.headers.update({
-        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64)'
-    })
+def apply_uniform_rows(players, extracted_data, team_code, num):
+    """
+    Merge rows from one NFL uniform page into the DB (in place).
+    Returns the number of rows applied.
+    """
+    total_updates = 0
+    for item in extracted_data:
+        pid = item['id']
+        
+        if pid not in players:
+            players[pid] = {
+                'id': pid,
+                'league': 'NFL',
+                'teams': [],
+                'numbers': [],
+            }
+        
+        p = players[pid]
+        
+        # Update Team
+        if team_code not in p.setdefault('teams', []):
+            p['teams'].append(team_code)
+            
+        # Update Number
+        if num not in p.setdefault('numbers', []):
+            p['numbers'].append(num)
+            
+        # Update Years (if the player already has a record from Step 1)
+        # Otherwise these stay empty until we scrape
+        current_start = p.get('start_year')
+        current_end = p.get('end_year')
+        
+        new_start = item['start_year']
+        new_end = item['end_year']
+        
+        if not current_start or (new_start < current_start):
+            p['start_year'] = new_start
+        if not current_end or (new_end > current_end):
+            p['end_year'] = new_end
+            
+        total_updates += 1
+    return total_updates
+
+def fetch_teams_nfl(db_path, players, session=None, teams=None):
+    if session is None:
+        session = requests.Session()
+        session.headers.update({
+            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64)'
+        })
     
     base_url = NFL_BASE_URL
     prefix = "nfl_"
     
-    # Dynamically fetch teams
-    teams = get_active_teams_nfl(session, base_url)
+    # Dynamically fetch teams (unless the caller already has the list)
+    if teams is None:
+        teams = get_active_teams_nfl(session, base_url)
     print(f"Found {len(teams)} active NFL teams.")
     
     # Calculate total requests: teams * numbers
-    total_requests = len(teams) * len(NUMS)
-    request_count = 0
-    start_time = time.time()
+    progress = TRACKER.step("nfl_uniforms", len(teams) * len(NUMS))
+    watchdog = ZeroYieldWatchdog('nfl_uniform')
     
     for team_idx, (abbr, full_name) in enumerate(teams, 1):
         print(f"\n=== Processing {full_name} ({abbr}) - Team {team_idx}/{len(teams)} ===")
@@ -143,125 +206,97 @@ def fetch_teams_nfl(db_path, players):
         
         total_updates = 0
         
-        for num in NUMS:
-            request_count += 1
-            url = f"{base_url}/players/uniform.cgi?team={abbr.lower()}&number={num}"
+        queue = FetchQueue(NUMS, progress)
+        for num in queue:
+            progress.advance()
+            url = uniform_url(base_url, abbr, num)
             
             try:
                 resp = fetch_with_retry(url, session)
                 extracted_data = extract_player_data_uniform(resp.text, team_code)
                 if extracted_data:
                     print(f"  Found {len(extracted_data)} players for #{num}")
+            except CircuitOpenError as e:
+                queue.defer(e)
+                continue
             except Exception as e:
                 print(f"Error fetching {url}: {e}")
                 continue
             
+            try:
+                watchdog.observe(extracted_data, url)
+            except LayoutChangeError:
+                # Keep this team's merges from earlier numbers before stopping
+                save_json(players, db_path)
+                raise
             if not extracted_data:
                 continue
                 
-            for item in extracted_data:
-                pid = item['id']
-                
-                if pid not in players:
-                    players[pid] = {
-                        'id': pid,
-                        'league': 'NFL',
-                        'teams': [],
-                        'numbers': [],
-                    }
-                
-                p = players[pid]
-                
-                # Update Team
-                if team_code not in p.setdefault('teams', []):
-                    p['teams'].append(team_code)
-                    
-                # Update Number
-                if num not in p.setdefault('numbers', []):
-                    p['numbers'].append(num)
-                    
-                # Update Years (if the player already has a record from Step 1)
-                # Otherwise these stay empty until we scrape
-                current_start = p.get('start_year')
-                current_end = p.get('end_year')
-                
-                new_start = item['start_year']
-                new_end = item['end_year']
-                
-                if not current_start or (new_start < current_start):
-                    p['start_year'] = new_start
-                if not current_end or (new_end > current_end):
-                    p['end_year'] = new_end
-                    
-                total_updates += 1
+            total_updates += apply_uniform_rows(players, extracted_data, team_code, num)
             
-        # Calculate progress
-        elapsed = time.time() - start_time
-        avg_time_per_req = elapsed / request_count
-        remaining_reqs = total_requests - request_count
-        estimated_time_remaining = remaining_reqs * avg_time_per_req
-        percent_complete = (request_count / total_requests) * 100
-        
-        mins_remaining = int(estimated_time_remaining // 60)
-        secs_remaining = int(estimated_time_remaining % 60)
-        
         print(f"Updated {total_updates} entries for {full_name}.")
-        print(f"Progress: {request_count}/{total_requests} ({percent_complete:.1f}%) - Est. {mins_remaining}m {secs_remaining}s remaining")
+        print(progress.status_line())
         
         save_json(players, db_path)
+        if queue.stopped:
+            break
+    progress.finish()
+
+def apply_roster_ids(players, roster_ids, team_code):
+    """Add a team to every known player on a roster page. Returns the update count."""
+    updated_count = 0
+    for pid in roster_ids:
+        if pid in players:
+            player = players[pid]
+            player_teams = player.setdefault('teams', [])
+            if team_code not in player_teams:
+                player_teams.append(team_code)
+                updated_count += 1
+    return updated_count
 
-def fetch_teams_nba(db_path, players):
-    session = requests.Session()
-    session.headers.update({
-        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64)'
-    })
+def fetch_teams_nba(db_path, players, session=None):
+    if session is None:
+        session = requests.Session()
+        session.headers.update({
+            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64)'
+        })
     
     base_url = NBA_BASE_URL
     teams = NBA_TEAMS
     prefix = "nba_"
     
-    total_requests = len(teams)
-    start_time = time.time()
+    progress = TRACKER.step("nba_teams", len(teams))
+    watchdog = ZeroYieldWatchdog('nba_franchise')
         
-    for idx, team in enumerate(teams, 1):
-        url = f"{base_url}/teams/{team}/players.html"
+    queue = FetchQueue(teams, progress)
+    for team in queue:
+        url = franchise_url(base_url, team)
         print(f"Fetching {url}...")
+        progress.advance()
         
         try:
             resp = fetch_with_retry(url, session)
             roster_ids = extract_player_ids_pfr(resp.text)
             print(f"  Found {len(roster_ids)} players on roster page")
+        except CircuitOpenError as e:
+            queue.defer(e)
+            continue
         except Exception as e:
             print(f"Error fetching {team}: {e}")
             continue
             
-        updated_count = 0
+        watchdog.observe(roster_ids, url)
         team_code = f"{prefix}{team}"
-        
-        for pid in roster_ids:
-            if pid in players:
-                player = players[pid]
-                player_teams = player.setdefault('teams', [])
-                if team_code not in player_teams:
-                    player_teams.append(team_code)
-                    updated_count += 1
-        
-        # Calculate progress
-        elapsed = time.time() - start_time
-        avg_time_per_req = elapsed / idx
-        remaining_reqs = total_requests - idx
-        estimated_time_remaining = remaining_reqs * avg_time_per_req
-        percent_complete = (idx / total_requests) * 100
-        
-        mins_remaining = int(estimated_time_remaining // 60)
-        secs_remaining = int(estimated_time_remaining % 60)
+        updated_count = apply_roster_ids(players, roster_ids, team_code)
         
         print(f"Updated {updated_count} players for team {team} ({len(roster_ids)} found on page)")
-        print(f"Progress: {idx}/{total_requests} ({percent_complete:.1f}%) - Est. {mins_remaining}m {secs_remaining}s remaining")
+        print(progress.status_line())
         
         save_json(players, db_path)
+    progress.finish()
 
 # Helper for NBA reuse
+@cached_extractor('nba_franchise', version=1)
 def extract_player_ids_pfr(html, table_id=None):
     soup = BeautifulSoup(html, 'html.parser')
     if table_id:
@@ -285,21 +320,28 @@ def extract_player_ids_pfr(html, table_id=None):
         ids.append(Path(link['href']).stem)
     return ids
 
-def fetch_teams(league, db_path):
-    players = load_json(db_path)
-    print(f"Loaded {len(players)} players from {db_path}")
+def fetch_teams(league, db_path, session=None, players=None, teams=None):
+    if players is None:
+        players = load_json(db_path)
+        print(f"Loaded {len(players)} players from {db_path}")
     
     if league.upper() == 'NFL':
-        fetch_teams_nfl(db_path, players)
+        fetch_teams_nfl(db_path, players, session=session, teams=teams)
     elif league.upper() == 'NBA':
-        fetch_teams_nba(db_path, players)
+        fetch_teams_nba(db_path, players, session=session)
     else:
         raise ValueError("League must be NFL or NBA")
+    return players
 
 if __name__ == '__main__':
     parser = argparse.ArgumentParser()
     parser.add_argument("league", choices=["NFL", "NBA"])
     parser.add_argument("db_path", help="Path to the players database JSON (dict by ID)")
+    add_profile_args(parser)
     args = parser.parse_args()
     
-    fetch_teams(args.league, args.db_path)
+    if args.profile:
+        enable_profiling(args.profile_dir)
+    
+    with profile_step(f"{args.league.lower()}_fetch_teams"):
+        fetch_teams(args.league, args.db_path)
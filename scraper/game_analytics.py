@@ -0,0 +1,205 @@
+"""
+Aggregate exported game histories into popularity and answer-frequency tables.
+
+Reads a local export of online game documents (JSON array, JSON object keyed
+by game ID, or NDJSON) as a stream, so exports larger than memory are fine.
+Each game's history is reduced to its move list (player / number / team /
+college submissions) and counted in batches with collections.Counter:
+
+    players     - submissions per player ID
+    attributes  - submissions per attribute type and value
+    links       - how often each (player, attribute) pair was played back to back
+    win_rates   - [wins, submissions] per player and per attribute, counting a
+                  submission as a win when its submitter won the game
+
+An optional export of the `tracking` collection (written by trackSubmission in
+the web app) is folded in as per-player tracked answer counts.
+
+The output is a compact JSON file that step 5 of run_scraper.py bundles next
+to players_new.json (see bundle_popularity).
+
+Usage:
+    python game_analytics.py games_export.ndjson
+    python game_analytics.py games.json --tracking tracking.json --output popularity.json
+"""
+
+import argparse
+import time
+from collections import Counter
+from datetime import datetime, timezone
+from pathlib import Path
+
+from utils import iter_json_records, load_json, save_json_atomic
+
+SCRAPER_DIR = Path(__file__).parent
+POPULARITY_PATH = SCRAPER_DIR / "popularity.json"
+
+ATTRIBUTE_TYPES = ('number', 'team', 'college')
+MOVE_TYPES = ('player',) + ATTRIBUTE_TYPES
+
+# Games are reduced to flat key lists and counted a batch at a time
+BATCH_SIZE = 5000
+
+def game_moves(game):
+    """Return [(role, key)] for a game's valid moves; key is a pid or 'type:value'."""
+    moves = []
+    for entry in game.get('history') or []:
+        move_type = entry.get('type')
+        if move_type not in MOVE_TYPES:
+            continue
+        value = str(entry.get('value', ''))
+        key = value if move_type == 'player' else f"{move_type}:{value}"
+        moves.append((entry.get('player'), key))
+    return moves
+
+class GameAggregator:
+    """Accumulates counts over batches of game documents."""
+
+    def __init__(self):
+        self.games = 0
+        self.finished = 0
+        self.moves = 0
+        self.submissions = Counter()
+        self.links = Counter()
+        self.wins = Counter()
+        self.decided = Counter()
+        self.end_reasons = Counter()
+        self.chain_lengths = Counter()
+
+    def add_batch(self, games):
+        submissions, links, wins, decided = [], [], [], []
+        for game in games:
+            self.games += 1
+            moves = game_moves(game)
+            self.chain_lengths[len(moves)] += 1
+            submissions.extend(key for _, key in moves)
+
+            # Consecutive moves always alternate player / attribute
+            for (_, a), (_, b) in zip(moves, moves[1:]):
+                player, attr = (a, b) if ':' not in a else (b, a)
+                links.append(f"{player}|{attr}")
+
+            winner = game.get('winner')
+            if game.get('status') == 'finished' and winner in ('A', 'B'):
+                self.finished += 1
+                decided.extend(key for _, key in moves)
+                wins.extend(key for role, key in moves if role == winner)
+                history = game.get('history') or []
+                if history:
+                    self.end_reasons[history[-1].get('type', 'unknown')] += 1
+
+        self.moves += len(submissions)
+        self.submissions.update(submissions)
+        self.links.update(links)
+        self.wins.update(wins)
+        self.decided.update(decided)
+
+    def tables(self, top_links=5000, min_win_rate_submissions=5):
+        """Build the compact output tables."""
+        players = {}
+        attributes = {t: {} for t in ATTRIBUTE_TYPES}
+        for key, count in self.submissions.most_common():
+            if ':' in key:
+                attr_type, value = key.split(':', 1)
+                attributes[attr_type][value] = count
+            else:
+                players[key] = count
+
+        links = []
+        for key, count in self.links.most_common(top_links):
+            player, attr = key.split('|', 1)
+            attr_type, value = attr.split(':', 1)
+            links.append([player, attr_type, value, count])
+
+        win_rates = {'players': {}, 'attributes': {t: {} for t in ATTRIBUTE_TYPES}}
+        for key, total in self.decided.most_common():
+            if total < min_win_rate_submissions:
+                break
+            entry = [self.wins[key], total]
+            if ':' in key:
+                attr_type, value = key.split(':', 1)
+                win_rates['attributes'][attr_type][value] = entry
+            else:
+                win_rates['players'][key] = entry
+
+        return {
+            'generated_at': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+            'games': self.games,
+            'finished_games': self.finished,
+            'moves': self.moves,
+            'chain_lengths': {str(k): v for k, v in sorted(self.chain_lengths.items())},
+            'end_reasons': dict(self.end_reasons.most_common()),
+            'players': players,
+            'attributes': attributes,
+            'links': links,
+            'win_rates': win_rates,
+        }
+
+def tracked_answer_counts(tracking_path):
+    """Sum trackSubmission counts per player from a `tracking` collection export."""
+    tracked = {}
+    for doc in iter_json_records(tracking_path):
+        pid = doc.get('id')
+        counts = doc.get('tracking') or {}
+        if pid and counts:
+            tracked[pid] = dict(Counter(counts).most_common())
+    return tracked
+
+def aggregate_games(games_path, tracking_path=None, top_links=5000):
+    """Stream a games export and return the popularity tables."""
+    aggregator = GameAggregator()
+    batch = []
+    for game in iter_json_records(games_path):
+        batch.append(game)
+        if len(batch) >= BATCH_SIZE:
+            aggregator.add_batch(batch)
+            batch = []
+    if batch:
+        aggregator.add_batch(batch)
+
+    tables = aggregator.tables(top_links=top_links)
+    if tracking_path:
+        tables['tracked'] = tracked_answer_counts(tracking_path)
+    return tables
+
+def bundle_popularity(players_path, popularity_path=POPULARITY_PATH, output_path=None):
+    """
+    Copy popularity tables next to the player data, dropping unknown player IDs.
+
+    Called from step 5 so the web app gets tables that match players_new.json.
+    Does nothing if no popularity file has been generated yet.
+    """
+    popularity_path = Path(popularity_path)
+    if not popularity_path.exists():
+        print(f"No popularity tables at {popularity_path}; skipping bundle.")
+        return None
+
+    players = load_json(players_path)
+    tables = load_json(popularity_path)
+    tables['players'] = {pid: c for pid, c in tables.get('players', {}).items() if pid in players}
+    tables['links'] = [link for link in tables.get('links', []) if link[0] in players]
+    if 'win_rates' in tables:
+        tables['win_rates']['players'] = {
+            pid: wr for pid, wr in tables['win_rates'].get('players', {}).items() if pid in players
+        }
+    if 'tracked' in tables:
+        tables['tracked'] = {pid: t for pid, t in tables['tracked'].items() if pid in players}
+
+    output_path = Path(output_path) if output_path else Path(players_path).parent / "popularity.json"
+    save_json_atomic(tables, output_path, compact=True)
+    return output_path
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Aggregate exported game histories into popularity tables")
+    parser.add_argument("games", help="Games export (JSON array, JSON object keyed by ID, or NDJSON)")
+    parser.add_argument("--tracking", help="Optional export of the tracking collection")
+    parser.add_argument("--output", default=str(POPULARITY_PATH), help=f"Output path (default: {POPULARITY_PATH.name})")
+    parser.add_argument("--top-links", type=int, default=5000, help="Number of most frequent links to keep")
+    args = parser.parse_args()
+
+    start_time = time.time()
+    tables = aggregate_games(args.games, args.tracking, args.top_links)
+    save_json_atomic(tables, args.output, compact=True)
+    print(f"Aggregated {tables['games']} games ({tables['moves']} moves) in {time.time() - start_time:.1f}s")
+    print(f"  {len(tables['players'])} players, {sum(len(v) for v in tables['attributes'].values())} attribute values, "
+          f"{len(tables['links'])} links")
@@ -0,0 +1,222 @@
+"""
+Precompute leaderboard pages and rank buckets from a users export.
+
+The Home page currently reads the whole `users` collection and sorts it on
+the client. This job does that work once, offline, and writes small static
+documents the client can fetch instead:
+
+    leaderboard/summary.json      - user count, page count, percentile
+                                    thresholds and rank buckets
+    leaderboard/page_0001.json    - ranks 1..page_size, and so on up to top-N
+
+Ratings come from each user's `stats.eloRating` history (latest entry, the
+same as getLatestElo in the web app). With --games, ratings are instead
+recomputed by replaying finished games in order with calculate_elo_rating(),
+a port of calculateEloRating in gameUtils.js.
+
+Ranks use competition ranking: a user's rank is one plus the number of users
+with a strictly higher rating, matching calculateUserRankFromAllUsers. The
+rank buckets ([rating, users rated at or above it]) let the client compute
+any user's exact rank from their own rating without a count query.
+
+Usage:
+    python leaderboard.py users_export.json
+    python leaderboard.py users.ndjson --games games.ndjson --top 500 --page-size 25
+"""
+
+import argparse
+import math
+import time
+from collections import Counter
+from datetime import datetime, timezone
+from pathlib import Path
+
+from utils import iter_json_records, save_json_atomic
+
+DEFAULT_OUTPUT_DIR = Path("../ballknower/public/backend/leaderboard")
+DEFAULT_RATING = 1000
+MIN_RATING = 800
+PERCENTILES = [1, 5, 10, 25, 50, 75, 90]
+
+def js_round(x):
+    """Round half up, like Math.round (Python's round() rounds half to even)."""
+    return math.floor(x + 0.5)
+
+def calculate_elo_rating(old_rating, opponent_rating, result, games_played):
+    """
+    Port of calculateEloRating from gameUtils.js.
+
+    Args:
+        old_rating: Player's rating before the game
+        opponent_rating: Opponent's rating before the game
+        result: 1 for a win, 0 for a loss
+        games_played: Games the player had played before this one
+
+    Returns:
+        New rating (int)
+    """
+    k_factor = 40 if games_played < 30 else 20
+    expected_score = 1 / (1 + 10 ** ((opponent_rating - old_rating) / 400))
+    return js_round(old_rating + k_factor * (result - expected_score))
+
+def latest_elo(elo_rating):
+    """Current rating from a stats.eloRating value (array history or legacy number)."""
+    if isinstance(elo_rating, list):
+        return elo_rating[-1] if elo_rating else DEFAULT_RATING
+    return elo_rating or DEFAULT_RATING
+
+def load_users(users_path):
+    """Read a users export into {uid: entry} with the fields the leaderboard shows."""
+    users = {}
+    for doc in iter_json_records(users_path):
+        uid = doc.get('uid') or doc.get('id')
+        if not uid:
+            continue
+        stats = doc.get('stats') or {}
+        users[uid] = {
+            'uid': uid,
+            'displayName': doc.get('displayName') or 'Anonymous Player',
+            'eloRating': latest_elo(stats.get('eloRating')),
+            'wins': stats.get('wins', 0),
+            'losses': stats.get('losses', 0),
+        }
+    return users
+
+def replay_games(users, games_path):
+    """
+    Recompute every user's rating by replaying finished games in creation order.
+
+    Temporary (guest) players and unknown users are skipped, as in
+    updatePlayerStats. Losers are floored at MIN_RATING.
+    """
+    games = []
+    for game in iter_json_records(games_path):
+        if game.get('status') != 'finished' or game.get('winner') not in ('A', 'B'):
+            continue
+        players = game.get('players') or {}
+        winner = (players.get(game['winner']) or {}).get('id')
+        loser = (players.get('B' if game['winner'] == 'A' else 'A') or {}).get('id')
+        if winner in users and loser in users:
+            games.append((_timestamp(game.get('createdAt')), winner, loser))
+    games.sort(key=lambda g: g[0])
+
+    ratings = {uid: DEFAULT_RATING for uid in users}
+    played = Counter()
+    wins = Counter()
+    for _, winner, loser in games:
+        w, l = ratings[winner], ratings[loser]
+        ratings[winner] = calculate_elo_rating(w, l, 1, played[winner])
+        ratings[loser] = max(MIN_RATING, calculate_elo_rating(l, w, 0, played[loser]))
+        played[winner] += 1
+        played[loser] += 1
+        wins[winner] += 1
+
+    for uid, entry in users.items():
+        entry['eloRating'] = ratings[uid]
+        entry['wins'] = wins[uid]
+        entry['losses'] = played[uid] - wins[uid]
+    return len(games)
+
+def _timestamp(value):
+    """Sort key for Firestore timestamps exported as numbers, ISO strings or {seconds: ...}."""
+    if isinstance(value, dict):
+        return float(value.get('seconds', value.get('_seconds', 0)))
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, str):
+        try:
+            return datetime.fromisoformat(value.replace('Z', '+00:00')).timestamp()
+        except ValueError:
+            return 0.0
+    return 0.0
+
+def rank_users(users):
+    """Return entries sorted for display, each with a competition 'rank'."""
+    ordered = sorted(users.values(), key=lambda u: (-u['eloRating'], -u['wins'], u['displayName'], u['uid']))
+    rank = 0
+    previous = None
+    for position, entry in enumerate(ordered, 1):
+        if entry['eloRating'] != previous:
+            rank = position
+            previous = entry['eloRating']
+        entry['rank'] = rank
+    return ordered
+
+def rank_buckets(ordered):
+    """[[rating, users rated >= rating]] for each distinct rating, highest first."""
+    buckets = []
+    at_or_above = 0
+    for rating, count in sorted(Counter(u['eloRating'] for u in ordered).items(), reverse=True):
+        at_or_above += count
+        buckets.append([rating, at_or_above])
+    return buckets
+
+def percentile_thresholds(ordered):
+    """Minimum rating needed to be in the top p% of users, for each of PERCENTILES."""
+    if not ordered:
+        return {}
+    total = len(ordered)
+    return {
+        str(p): ordered[max(1, math.ceil(total * p / 100)) - 1]['eloRating']
+        for p in PERCENTILES
+    }
+
+def build_leaderboard(users_path, output_dir=DEFAULT_OUTPUT_DIR, games_path=None, top_n=1000, page_size=50):
+    """
+    Write leaderboard pages and summary.json.
+
+    Args:
+        users_path: Users export (JSON array, object keyed by uid, or NDJSON)
+        output_dir: Directory for page_XXXX.json and summary.json
+        games_path: Optional games export; if given, ratings are recomputed
+        top_n: Number of top users to publish in pages
+        page_size: Users per page
+
+    Returns:
+        The summary dict
+    """
+    users = load_users(users_path)
+    replayed = replay_games(users, games_path) if games_path else None
+    ordered = rank_users(users)
+
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    top = ordered[:top_n]
+    pages = math.ceil(len(top) / page_size) if top else 0
+    for page in range(pages):
+        entries = top[page * page_size:(page + 1) * page_size]
+        save_json_atomic({'page': page + 1, 'pages': pages, 'entries': entries},
+                         output_dir / f"page_{page + 1:04d}.json", compact=True)
+
+    # Pages from a previous, longer leaderboard would otherwise linger
+    for stale in output_dir.glob("page_*.json"):
+        if int(stale.stem.split('_')[1]) > pages:
+            stale.unlink()
+
+    summary = {
+        'generated_at': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'users': len(ordered),
+        'page_size': page_size,
+        'pages': pages,
+        'percentiles': percentile_thresholds(ordered),
+        'rank_buckets': rank_buckets(ordered),
+    }
+    if replayed is not None:
+        summary['replayed_games'] = replayed
+    # Summary last, so it never points at pages that are not written yet
+    save_json_atomic(summary, output_dir / "summary.json", compact=True)
+    return summary
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Precompute leaderboard pages and rank buckets")
+    parser.add_argument("users", help="Users export (JSON array, object keyed by uid, or NDJSON)")
+    parser.add_argument("--games", help="Games export; recompute ratings by replaying finished games")
+    parser.add_argument("--output-dir", default=str(DEFAULT_OUTPUT_DIR), help="Output directory")
+    parser.add_argument("--top", type=int, default=1000, help="Number of top users to publish")
+    parser.add_argument("--page-size", type=int, default=50, help="Users per page")
+    args = parser.parse_args()
+
+    start_time = time.time()
+    summary = build_leaderboard(args.users, args.output_dir, args.games, args.top, args.page_size)
+    print(f"Ranked {summary['users']} users into {summary['pages']} pages "
+          f"({len(summary['rank_buckets'])} rank buckets) in {time.time() - start_time:.1f}s")
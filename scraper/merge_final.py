@@ -3,6 +3,8 @@ Merge NFL and NBA player databases into final output.
 
 Combines the two league-specific databases into a single unified database.
 Handles potential ID collisions (though rare due to different ID schemes).
+Two-sport athletes found by athlete_resolver.py are written to
+two_sport_athletes.json and linked in the output via a `same_as` field.
 
 Usage:
     python merge_final.py players_db_nfl.json players_db_nba.json output.json
@@ -11,15 +13,33 @@ Usage:
 import json
 import argparse
 from pathlib import Path
+from athlete_resolver import CROSSREF_PATH, resolve_athletes, same_as_links
+from college_normalizer import load_canonical_map
 from utils import load_json, save_json
 
-def merge_final(nfl_path, nba_path, output_path):
+def merge_final(nfl_path, nba_path, output_path, crossref_path=CROSSREF_PATH):
     nfl_data = load_json(nfl_path)
     nba_data = load_json(nba_path)
     
     print(f"Loaded {len(nfl_data)} NFL players")
     print(f"Loaded {len(nba_data)} NBA players")
     
+    crossref = resolve_athletes(nfl_data, nba_data, load_canonical_map())
+    save_json(crossref, crossref_path)
+    
+    merged = merge_players(nfl_data, nba_data, crossref)
+    save_json(merged, output_path)
+
+def merge_players(nfl_data, nba_data, crossref=None):
+    """
+    Merge in-memory NFL and NBA DB dicts into a single dict keyed by player ID.
+
+    Args:
+        nfl_data: NFL DB dict
+        nba_data: NBA DB dict
+        crossref: Optional resolve_athletes() output; confidently matched
+            records get a `same_as` list with the other league's ID
+    """
     # Merge dictionaries
     # Assuming IDs don't collide. If they do, we might have an issue.
     # PFR: Capital letters (usually)
@@ -48,12 +68,19 @@ def merge_final(nfl_path, nba_path, output_path):
             # NBA keys are like "abdelal01".
             # Seems distinct casing.
         merged[pid] = data
+    
+    links = same_as_links(crossref)
+    for pid, linked_ids in links.items():
+        if pid in merged:
+            merged[pid] = {**merged[pid], 'same_as': linked_ids}
         
     print(f"Total merged players: {len(merged)}")
+    if links:
+        print(f"Linked {len(links) // 2} two-sport athletes across leagues")
     if collisions > 0:
         print(f"Warning: {collisions} ID collisions occurred.")
-        
-    save_json(merged, output_path)
+    
+    return merged
 
 if __name__ == '__main__':
     parser = argparse.ArgumentParser()
@@ -0,0 +1,188 @@
+"""
+Rebuild the league player DBs offline from the stored page corpus.
+
+Replays every page recorded by page_store.py through the same extractors and
+merge functions the online fetchers use, without a single network request or
+rate-limit sleep. Parsing (the expensive part) is fanned out over a process
+pool; merging is done in the parent in the exact order the online pipeline
+crawls pages, so the output is byte-identical regardless of worker count.
+
+The rebuild starts from an empty DB (a full rebuild, not a resume), covering
+steps 1, 3 and 4 for each league. Pages missing from the corpus are skipped
+and reported, just like failed requests in an online run.
+
+Usage:
+    python offline_rebuild.py                   # both leagues, all cores
+    python offline_rebuild.py --leagues NFL --workers 4
+    python run_scraper.py --offline             # same, then step 5
+"""
+
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import page_store
+from config import NFL_BASE_URL, NBA_BASE_URL, NFL_LETTERS, NBA_LETTERS, NBA_TEAMS, NUMS
+from fetch_players import index_url, extract_players_from_index, apply_index_players
+from fetch_teams import (
+    teams_list_url, uniform_url, franchise_url,
+    extract_active_teams_nfl, extract_player_data_uniform, extract_player_ids_pfr,
+    apply_uniform_rows, apply_roster_ids
+)
+from fetch_numbers import number_url, extract_player_ids, apply_number_ids
+from fetch_colleges import schools_url, extract_schools, extract_school_player_ids, apply_school_ids
+from utils import save_json
+
+SCRAPER_DIR = Path(__file__).parent
+
+# Extractors by name, so jobs sent to worker processes stay small and picklable
+EXTRACTORS = {
+    'players_index': extract_players_from_index,
+    'nfl_team_list': extract_active_teams_nfl,
+    'nfl_uniform': extract_player_data_uniform,
+    'nba_franchise': extract_player_ids_pfr,
+    'nba_numbers': extract_player_ids,
+    'nfl_schools': extract_schools,
+    'nfl_school': extract_school_player_ids,
+}
+
+def extract_page(job):
+    """
+    Worker entry point: load one stored page and run its extractor.
+
+    Args:
+        job: (family, url, extra_args) tuple
+
+    Returns:
+        Extracted rows, or None if the page is not in the corpus
+    """
+    family, url, extra_args = job
+    body = page_store.get_body(url)
+    if body is None:
+        return None
+    return EXTRACTORS[family](body, *extra_args)
+
+class OfflineRebuilder:
+    """Runs extraction jobs (in a pool if workers > 1) and tracks missing pages."""
+
+    def __init__(self, workers=None):
+        self.workers = workers or os.cpu_count() or 1
+        self.pool = ProcessPoolExecutor(self.workers) if self.workers > 1 else None
+        self.missing = []
+        self.pages = 0
+
+    def close(self):
+        if self.pool:
+            self.pool.shutdown()
+
+    def extract_all(self, jobs):
+        """Extract a batch of jobs; results come back in job order."""
+        if self.pool:
+            chunksize = max(1, len(jobs) // (self.workers * 4))
+            results = list(self.pool.map(extract_page, jobs, chunksize=chunksize))
+        else:
+            results = [extract_page(job) for job in jobs]
+        for job, rows in zip(jobs, results):
+            if rows is None:
+                self.missing.append(job[1])
+            else:
+                self.pages += 1
+        return results
+
+    def rebuild_league(self, league):
+        """Rebuild one league's DB dict from the corpus."""
+        league = league.upper()
+        players = {}
+        if league == 'NFL':
+            self._players(players, NFL_BASE_URL, NFL_LETTERS, league)
+            self._nfl_uniforms(players)
+            self._nfl_colleges(players)
+        elif league == 'NBA':
+            self._players(players, NBA_BASE_URL, NBA_LETTERS, league)
+            self._nba_teams(players)
+            self._nba_numbers(players)
+        else:
+            raise ValueError("League must be NFL or NBA")
+        return players
+
+    def _players(self, players, base_url, letters, league):
+        jobs = [('players_index', index_url(base_url, letter), (base_url, league)) for letter in letters]
+        for rows in self.extract_all(jobs):
+            if rows:
+                apply_index_players(players, rows, league)
+
+    def _nfl_uniforms(self, players):
+        teams = self.extract_all([('nfl_team_list', teams_list_url(NFL_BASE_URL), ())])[0] or []
+        jobs, keys = [], []
+        for abbr, _ in teams:
+            team_code = f"nfl_{abbr.upper()}"
+            for num in NUMS:
+                jobs.append(('nfl_uniform', uniform_url(NFL_BASE_URL, abbr, num), (team_code,)))
+                keys.append((team_code, num))
+        for (team_code, num), rows in zip(keys, self.extract_all(jobs)):
+            if rows:
+                apply_uniform_rows(players, rows, team_code, num)
+
+    def _nfl_colleges(self, players):
+        schools = self.extract_all([('nfl_schools', schools_url(NFL_BASE_URL), (NFL_BASE_URL,))])[0] or []
+        jobs = [('nfl_school', school_url, ()) for _, school_url, _ in schools]
+        for (school_name, _, _), rows in zip(schools, self.extract_all(jobs)):
+            if rows:
+                apply_school_ids(players, rows, school_name)
+
+    def _nba_teams(self, players):
+        jobs = [('nba_franchise', franchise_url(NBA_BASE_URL, team), ()) for team in NBA_TEAMS]
+        for team, rows in zip(NBA_TEAMS, self.extract_all(jobs)):
+            if rows:
+                apply_roster_ids(players, rows, f"nba_{team}")
+
+    def _nba_numbers(self, players):
+        jobs = [('nba_numbers', number_url(NBA_BASE_URL, num), ()) for num in NUMS]
+        for num, rows in zip(NUMS, self.extract_all(jobs)):
+            if rows:
+                apply_number_ids(players, rows, num)
+
+def offline_rebuild(leagues=('NFL', 'NBA'), workers=None, output_dir=SCRAPER_DIR):
+    """
+    Rebuild players_db_<league>.json for each league from the page corpus.
+
+    Args:
+        leagues: Leagues to rebuild
+        workers: Worker processes for parsing (default: all cores)
+        output_dir: Directory for the rebuilt DB files
+
+    Returns:
+        Dict of league -> DB path written
+    """
+    # Replaying must never add to the corpus it is reading from
+    page_store.disable()
+    rebuilder = OfflineRebuilder(workers)
+    written = {}
+    try:
+        for league in leagues:
+            start_time = time.time()
+            print(f"Rebuilding {league} offline with {rebuilder.workers} worker(s)...")
+            players = rebuilder.rebuild_league(league)
+            db_path = Path(output_dir) / f"players_db_{league.lower()}.json"
+            save_json(players, db_path)
+            written[league] = db_path
+            print(f"Rebuilt {len(players)} {league} players in {time.time() - start_time:.1f}s")
+    finally:
+        rebuilder.close()
+
+    print(f"Replayed {rebuilder.pages} stored pages.")
+    if rebuilder.missing:
+        print(f"Warning: {len(rebuilder.missing)} pages not in corpus (skipped), e.g. {rebuilder.missing[0]}")
+    return written
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Rebuild player DBs from the stored page corpus")
+    parser.add_argument("--leagues", nargs="+", choices=["NBA", "NFL"], default=["NBA", "NFL"],
+                        help="Leagues to rebuild (default: both)")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: all cores)")
+    parser.add_argument("--output-dir", default=str(SCRAPER_DIR), help="Directory for rebuilt DB files")
+    args = parser.parse_args()
+
+    offline_rebuild(args.leagues, args.workers, args.output_dir)
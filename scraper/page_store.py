@@ -0,0 +1,152 @@
+"""
+On-disk corpus of fetched pages.
+
+Every successful fetch_with_retry() response body is recorded here so the
+player DBs can be rebuilt offline (see offline_rebuild.py) after a parser fix,
+without re-crawling. Bodies are stored gzip-compressed and content-addressed
+(identical bodies are stored once); a SQLite index maps each URL to its latest
+body hash and keeps fetch/change counts per URL.
+
+Layout:
+    page_corpus/index.sqlite
+    page_corpus/objects/<first 2 hex chars>/<sha256>.html.gz
+
+Set SCRAPER_PAGE_STORE=0 to disable recording.
+
+Usage:
+    python page_store.py stats
+    python page_store.py show "https://www.pro-football-reference.com/teams/"
+"""
+
+import argparse
+import gzip
+import hashlib
+import os
+import sqlite3
+import time
+from pathlib import Path
+
+CORPUS_DIR = Path(__file__).parent / "page_corpus"
+
+_enabled = os.environ.get('SCRAPER_PAGE_STORE', '1') != '0'
+_conn = None
+_conn_pid = None
+
+def disable():
+    """Stop recording pages for the rest of this process."""
+    global _enabled
+    _enabled = False
+
+def is_enabled():
+    return _enabled
+
+def _connection():
+    global _conn, _conn_pid
+    if _conn is None or _conn_pid != os.getpid():
+        CORPUS_DIR.mkdir(parents=True, exist_ok=True)
+        _conn = sqlite3.connect(CORPUS_DIR / "index.sqlite", timeout=30)
+        _conn.execute("PRAGMA journal_mode=WAL")
+        _conn.execute("""
+            CREATE TABLE IF NOT EXISTS pages (
+                url TEXT PRIMARY KEY,
+                body_hash TEXT NOT NULL,
+                first_fetched REAL NOT NULL,
+                last_fetched REAL NOT NULL,
+                last_changed REAL NOT NULL,
+                fetch_count INTEGER NOT NULL,
+                change_count INTEGER NOT NULL
+            )
+        """)
+        _conn_pid = os.getpid()
+    return _conn
+
+def _object_path(digest):
+    return CORPUS_DIR / "objects" / digest[:2] / f"{digest}.html.gz"
+
+def record(url, body, fetched_at=None):
+    """
+    Store a page body for a URL.
+
+    Args:
+        url: Page URL
+        body: Response text
+        fetched_at: Unix timestamp of the fetch (default: now)
+
+    Returns:
+        True if the body differs from the previously stored one for this URL
+    """
+    if not _enabled:
+        return False
+    fetched_at = fetched_at or time.time()
+    data = body.encode('utf-8')
+    digest = hashlib.sha256(data).hexdigest()
+
+    path = _object_path(digest)
+    if not path.exists():
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(path.name + f".{os.getpid()}.tmp")
+        with gzip.open(tmp_path, 'wb', compresslevel=6) as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+    conn = _connection()
+    with conn:
+        row = conn.execute("SELECT body_hash FROM pages WHERE url = ?", (url,)).fetchone()
+        if row is None:
+            conn.execute(
+                "INSERT INTO pages VALUES (?, ?, ?, ?, ?, 1, 0)",
+                (url, digest, fetched_at, fetched_at, fetched_at)
+            )
+            return True
+        changed = row[0] != digest
+        conn.execute("""
+            UPDATE pages SET body_hash = ?, last_fetched = ?, fetch_count = fetch_count + 1,
+                last_changed = CASE WHEN ? THEN ? ELSE last_changed END,
+                change_count = change_count + ?
+            WHERE url = ?
+        """, (digest, fetched_at, changed, fetched_at, int(changed), url))
+        return changed
+
+def get_body(url):
+    """Return the latest stored body for a URL, or None if it was never fetched."""
+    row = _connection().execute("SELECT body_hash FROM pages WHERE url = ?", (url,)).fetchone()
+    if row is None:
+        return None
+    path = _object_path(row[0])
+    if not path.exists():
+        return None
+    with gzip.open(path, 'rb') as f:
+        return f.read().decode('utf-8')
+
+def page_info(url):
+    """Return fetch metadata for a URL as a dict, or None."""
+    cursor = _connection().execute("SELECT * FROM pages WHERE url = ?", (url,))
+    row = cursor.fetchone()
+    if row is None:
+        return None
+    return dict(zip([c[0] for c in cursor.description], row))
+
+def all_page_info():
+    """Return {url: metadata dict} for every stored page."""
+    conn = _connection()
+    cursor = conn.execute("SELECT * FROM pages")
+    columns = [c[0] for c in cursor.description]
+    return {row[0]: dict(zip(columns, row)) for row in cursor}
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Inspect the stored page corpus")
+    parser.add_argument("command", choices=["stats", "show"])
+    parser.add_argument("url", nargs="?", help="URL for 'show'")
+    args = parser.parse_args()
+
+    if args.command == 'stats':
+        pages = all_page_info()
+        objects = list((CORPUS_DIR / "objects").glob("*/*.html.gz"))
+        size_mb = sum(p.stat().st_size for p in objects) / (1024 * 1024)
+        print(f"{len(pages)} URLs, {len(objects)} stored bodies ({size_mb:.1f} MB) in {CORPUS_DIR}")
+    else:
+        body = get_body(args.url)
+        if body is None:
+            print(f"No stored page for {args.url}")
+        else:
+            print(body)
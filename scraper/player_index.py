@@ -0,0 +1,317 @@
+"""
+Bitmap query engine for multi-attribute player set operations.
+
+Builds one bitmap per attribute value (team, number, college, league) from the
+merged player database so questions like "players who played for nba_CHI, wore
+23 and went to North Carolina" become a couple of bitwise ANDs instead of a
+Python loop over every player record.
+
+Bitmaps are plain Python integers: bit N is set when the player at position N
+(players sorted by ID) has the attribute. Integer AND/OR/NOT run word-at-a-time
+in C, so a query over ~30k players costs microseconds.
+
+Usage:
+    python player_index.py "team=nba_CHI AND number=23"
+    python player_index.py "college='North Carolina' AND NOT league=NFL" --list
+    python player_index.py --stats --input ../ballknower/public/backend/players_new.json
+"""
+
+import argparse
+import re
+import time
+from utils import load_json
+
+# Player record fields that hold attribute lists, keyed by attribute type
+ATTRIBUTE_FIELDS = {
+    'team': 'teams',
+    'number': 'numbers',
+    'college': 'colleges',
+}
+
+def record_keys(record):
+    """Return the set of (attribute_type, value) keys a player record is indexed under."""
+    if not record:
+        return set()
+    keys = {(attr_type, value)
+            for attr_type, field in ATTRIBUTE_FIELDS.items()
+            for value in record.get(field) or []}
+    if record.get('league'):
+        keys.add(('league', record['league']))
+    return keys
+
+def popcount(bitmap):
+    """Return the number of set bits in a bitmap."""
+    return bin(bitmap).count('1')
+
+def iter_bits(bitmap):
+    """Yield the positions of set bits in a bitmap, lowest first."""
+    while bitmap:
+        low = bitmap & -bitmap
+        yield low.bit_length() - 1
+        bitmap ^= low
+
+class PlayerIndex:
+    """
+    Attribute bitmaps over a fixed, ordered set of players.
+
+    Attributes:
+        ids: Player IDs in bitmap position order (None for removed players)
+        positions: Map of player ID -> bit position
+        bitmaps: Map of (attribute_type, value) -> bitmap
+        universe: Bitmap with every player's bit set (used for NOT)
+        ordered: True while positions are still in player ID order
+    """
+
+    def __init__(self, ids, bitmaps):
+        self.ids = ids
+        self.positions = {pid: pos for pos, pid in enumerate(ids)}
+        self.bitmaps = bitmaps
+        self.universe = (1 << len(ids)) - 1
+        self.ordered = True
+
+    @classmethod
+    def from_players(cls, players):
+        """
+        Build an index from a player database dict (keyed by player ID).
+
+        Args:
+            players: Dict of player ID -> player record
+
+        Returns:
+            PlayerIndex
+        """
+        ids = sorted(players)
+        # Collect positions per value first, then OR them together once;
+        # growing a big int bit by bit would copy it on every update.
+        members = {}
+        for pos, pid in enumerate(ids):
+            for key in record_keys(players[pid]):
+                members.setdefault(key, []).append(pos)
+
+        bitmaps = {}
+        for key, positions in members.items():
+            bitmaps[key] = _bitmap_from_positions(positions)
+        return cls(ids, bitmaps)
+
+    @classmethod
+    def from_file(cls, path):
+        """Build an index from a players JSON file."""
+        return cls.from_players(load_json(path))
+
+    def apply_changes(self, changes):
+        """
+        Update the bitmaps in place for a player-level change set.
+
+        Added players get the next free bit position (so positions are no
+        longer in ID order); removed players have their bits cleared and their
+        position retired. Cost is proportional to the number of changed
+        attribute keys, not to the number of players.
+
+        Args:
+            changes: Iterable of (player ID, old record or None, new record or None)
+        """
+        set_positions, clear_positions = {}, {}
+        for pid, old, new in changes:
+            pos = self.positions.get(pid)
+            if pos is None:
+                if new is None:
+                    continue
+                pos = len(self.ids)
+                self.ids.append(pid)
+                self.positions[pid] = pos
+                self.universe |= 1 << pos
+                self.ordered = False
+            old_keys, new_keys = record_keys(old), record_keys(new)
+            for key in old_keys - new_keys:
+                clear_positions.setdefault(key, []).append(pos)
+            for key in new_keys - old_keys:
+                set_positions.setdefault(key, []).append(pos)
+            if new is None:
+                del self.positions[pid]
+                self.ids[pos] = None
+                self.universe &= ~(1 << pos)
+
+        for key in set(set_positions) | set(clear_positions):
+            bitmap = self.bitmaps.get(key, 0) | _bitmap_from_positions(set_positions.get(key, ()))
+            bitmap &= ~_bitmap_from_positions(clear_positions.get(key, ()))
+            if bitmap:
+                self.bitmaps[key] = bitmap
+            else:
+                self.bitmaps.pop(key, None)
+
+    def bitmap(self, attr_type, value):
+        """Return the bitmap for one attribute value (0 if unknown)."""
+        return self.bitmaps.get((attr_type, value), 0)
+
+    def player_bitmap(self, player_ids):
+        """Return a bitmap with the given players' bits set."""
+        return _bitmap_from_positions(
+            self.positions[pid] for pid in player_ids if pid in self.positions
+        )
+
+    def all_of(self, *keys):
+        """AND of the bitmaps for (attribute_type, value) keys."""
+        if not keys:
+            return self.universe
+        result = self.universe
+        for key in keys:
+            result &= self.bitmaps.get(key, 0)
+            if not result:
+                break
+        return result
+
+    def any_of(self, *keys):
+        """OR of the bitmaps for (attribute_type, value) keys."""
+        result = 0
+        for key in keys:
+            result |= self.bitmaps.get(key, 0)
+        return result
+
+    def negate(self, bitmap):
+        """Complement of a bitmap within the indexed players."""
+        return self.universe & ~bitmap
+
+    def count(self, bitmap):
+        """Cardinality of a bitmap."""
+        return popcount(bitmap)
+
+    def to_ids(self, bitmap):
+        """Convert a bitmap to a list of player IDs (sorted)."""
+        ids = [self.ids[pos] for pos in iter_bits(bitmap)]
+        return ids if self.ordered else sorted(ids)
+
+    def values(self, attr_type):
+        """Return all indexed values for an attribute type."""
+        return sorted(value for (t, value) in self.bitmaps if t == attr_type)
+
+    def query(self, expression):
+        """
+        Evaluate a boolean query expression and return the result bitmap.
+
+        Grammar (case-insensitive operators, NOT binds tightest, then AND, then OR):
+            expr   := term ('OR' term)*
+            term   := factor ('AND' factor)*
+            factor := 'NOT' factor | '(' expr ')' | type '=' value
+
+        Values containing spaces must be quoted, e.g. college='North Carolina'.
+        """
+        return _QueryParser(self, expression).parse()
+
+def _bitmap_from_positions(positions):
+    # Build via a bytearray so large bitmaps are assembled in one pass
+    positions = list(positions)
+    if not positions:
+        return 0
+    buf = bytearray(max(positions) // 8 + 1)
+    for pos in positions:
+        buf[pos >> 3] |= 1 << (pos & 7)
+    return int.from_bytes(buf, 'little')
+
+_TOKEN_RE = re.compile(r"""
+    \s*(?:
+        (?P<lparen>\() |
+        (?P<rparen>\)) |
+        (?P<term>[A-Za-z_]+)\s*=\s*(?:'(?P<sq>[^']*)'|"(?P<dq>[^"]*)"|(?P<bare>[^\s()]+)) |
+        (?P<op>AND|OR|NOT)\b
+    )
+""", re.VERBOSE | re.IGNORECASE)
+
+class _QueryParser:
+    """Recursive-descent parser that evaluates directly to bitmaps."""
+
+    def __init__(self, index, expression):
+        self.index = index
+        self.tokens = self._tokenize(expression)
+        self.pos = 0
+
+    def _tokenize(self, expression):
+        tokens = []
+        pos = 0
+        expression = expression.strip()
+        while pos < len(expression):
+            match = _TOKEN_RE.match(expression, pos)
+            if not match or match.end() == pos:
+                raise ValueError(f"Invalid query near: {expression[pos:]!r}")
+            pos = match.end()
+            if match.group('lparen'):
+                tokens.append(('(', None))
+            elif match.group('rparen'):
+                tokens.append((')', None))
+            elif match.group('term'):
+                value = next(v for v in (match.group('sq'), match.group('dq'), match.group('bare')) if v is not None)
+                tokens.append(('term', (match.group('term').lower(), value)))
+            else:
+                tokens.append((match.group('op').upper(), None))
+        return tokens
+
+    def _peek(self):
+        return self.tokens[self.pos][0] if self.pos < len(self.tokens) else None
+
+    def _take(self, kind):
+        if self._peek() != kind:
+            raise ValueError(f"Expected {kind} in query, got {self._peek()}")
+        token = self.tokens[self.pos]
+        self.pos += 1
+        return token
+
+    def parse(self):
+        result = self._expr()
+        if self.pos != len(self.tokens):
+            raise ValueError(f"Unexpected token in query: {self.tokens[self.pos]}")
+        return result
+
+    def _expr(self):
+        result = self._term()
+        while self._peek() == 'OR':
+            self._take('OR')
+            result |= self._term()
+        return result
+
+    def _term(self):
+        result = self._factor()
+        while self._peek() == 'AND':
+            self._take('AND')
+            result &= self._factor()
+        return result
+
+    def _factor(self):
+        kind = self._peek()
+        if kind == 'NOT':
+            self._take('NOT')
+            return self.index.negate(self._factor())
+        if kind == '(':
+            self._take('(')
+            result = self._expr()
+            self._take(')')
+            return result
+        _, (attr_type, value) = self._take('term')
+        if attr_type == 'league':
+            value = value.upper()
+        return self.index.bitmap(attr_type, value)
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Query players by attribute with bitmap set operations")
+    parser.add_argument("query", nargs="?", help="Query expression, e.g. \"team=nba_CHI AND number=23\"")
+    parser.add_argument("--input", default="../ballknower/public/backend/players_new.json", help="Path to merged players JSON")
+    parser.add_argument("--list", action="store_true", help="Print matching players, not just the count")
+    parser.add_argument("--stats", action="store_true", help="Print index build time and bitmap counts")
+    args = parser.parse_args()
+
+    players = load_json(args.input)
+    start_time = time.time()
+    index = PlayerIndex.from_players(players)
+    build_time = time.time() - start_time
+
+    if args.stats or not args.query:
+        print(f"Indexed {len(index.ids)} players in {build_time:.2f}s")
+        for attr_type in ['league'] + list(ATTRIBUTE_FIELDS):
+            print(f"  {attr_type}: {len(index.values(attr_type))} values")
+
+    if args.query:
+        start_time = time.perf_counter()
+        result = index.query(args.query)
+        query_ms = (time.perf_counter() - start_time) * 1000
+        print(f"{index.count(result)} players match ({query_ms:.3f} ms)")
+        if args.list:
+            for pid in index.to_ids(result):
+                print(f"  {pid}: {players[pid].get('name', '')}")
@@ -0,0 +1,184 @@
+"""
+Opt-in CPU and memory profiling for scraper pipeline steps.
+
+When enabled, each step wrapped in profile_step() runs under cProfile and
+tracemalloc. Rate-limit sleeps (see utils.sleep) are excluded: the profiler is
+paused while sleeping and the sleep time is reported separately, so the CPU
+profile shows only parsing, merging and serialization work.
+
+Per step, the run directory gets:
+    <step>.prof          - cProfile stats (open with pstats or snakeviz)
+    <step>.txt           - top functions by cumulative and internal time
+    <step>_alloc.txt     - top allocation sites near the step's memory peak
+and summary.json with wall/sleep/work time, peak traced memory and peak RSS.
+
+Usage:
+    python run_scraper.py --profile
+    python fetch_players.py NFL --profile --profile-dir profiles/
+"""
+
+import cProfile
+import io
+import json
+import pstats
+import sys
+import time
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+TOP_FUNCTIONS = 40
+TOP_ALLOCATIONS = 25
+
+_run_dir = None
+_active_profiler = None
+_sleep_seconds = 0.0
+_summary = {}
+_peak_snapshot = None
+_peak_snapshot_size = 0
+
+def enable_profiling(base_dir='profiles'):
+    """
+    Turn on profiling for this process and create a fresh run directory.
+
+    Args:
+        base_dir: Directory under which a timestamped run directory is created
+
+    Returns:
+        Path of the run directory
+    """
+    global _run_dir
+    _run_dir = Path(base_dir) / datetime.now().strftime('%Y%m%d_%H%M%S')
+    _run_dir.mkdir(parents=True, exist_ok=True)
+    print(f"Profiling enabled. Writing profiles to {_run_dir}")
+    return _run_dir
+
+def is_enabled():
+    return _run_dir is not None
+
+def peak_rss_mb():
+    """Peak resident set size of this process in MB (None if unavailable)."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS reports bytes
+    if sys.platform == 'darwin':
+        return peak / (1024 * 1024)
+    return peak / 1024
+
+@contextmanager
+def paused():
+    """Pause the active step profiler (used around rate-limit sleeps)."""
+    global _sleep_seconds
+    if _active_profiler is None:
+        yield
+        return
+    _active_profiler.disable()
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        _sleep_seconds += time.perf_counter() - start
+        _active_profiler.enable()
+
+def checkpoint():
+    """
+    Record allocation sites if traced memory is near a new high.
+
+    Called from points where the working set is largest (e.g. just before
+    save_json serializes the DB) so the allocation report reflects the
+    step's peak rather than whatever happens to be alive at the end.
+    """
+    global _peak_snapshot, _peak_snapshot_size
+    if _active_profiler is None:
+        return
+    current, _ = tracemalloc.get_traced_memory()
+    if current > _peak_snapshot_size * 1.1:
+        _active_profiler.disable()
+        _peak_snapshot = tracemalloc.take_snapshot()
+        _peak_snapshot_size = current
+        _active_profiler.enable()
+
+@contextmanager
+def profile_step(name):
+    """
+    Profile one pipeline step. A no-op unless enable_profiling() was called.
+
+    Nested steps are not profiled separately; the outermost step owns the
+    profiler so its numbers stay self-consistent.
+    """
+    global _active_profiler, _sleep_seconds, _peak_snapshot, _peak_snapshot_size
+    if _run_dir is None or _active_profiler is not None:
+        yield
+        return
+
+    profiler = cProfile.Profile()
+    tracemalloc.start(10)
+    tracemalloc.reset_peak()
+    _sleep_seconds = 0.0
+    _peak_snapshot = None
+    _peak_snapshot_size = 0
+    _active_profiler = profiler
+    wall_start = time.perf_counter()
+    cpu_start = time.process_time()
+    profiler.enable()
+    try:
+        yield
+    finally:
+        profiler.disable()
+        _active_profiler = None
+        wall = time.perf_counter() - wall_start
+        cpu = time.process_time() - cpu_start
+        current, _ = tracemalloc.get_traced_memory()
+        if _peak_snapshot is None or current > _peak_snapshot_size:
+            _peak_snapshot = tracemalloc.take_snapshot()
+        snapshot = _peak_snapshot
+        _peak_snapshot = None
+        _, traced_peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        _write_step(name, profiler, snapshot, {
+            'wall_seconds': round(wall, 3),
+            'sleep_seconds': round(_sleep_seconds, 3),
+            'work_seconds': round(wall - _sleep_seconds, 3),
+            'cpu_seconds': round(cpu, 3),
+            'traced_peak_mb': round(traced_peak / (1024 * 1024), 2),
+            'peak_rss_mb': _round_or_none(peak_rss_mb()),
+        })
+
+def _round_or_none(value):
+    return round(value, 2) if value is not None else None
+
+def _write_step(name, profiler, snapshot, stats):
+    safe_name = ''.join(c if c.isalnum() or c in '-_' else '_' for c in name)
+    profiler.dump_stats(_run_dir / f"{safe_name}.prof")
+
+    out = io.StringIO()
+    ps = pstats.Stats(profiler, stream=out)
+    ps.sort_stats('cumulative').print_stats(TOP_FUNCTIONS)
+    ps.sort_stats('tottime').print_stats(TOP_FUNCTIONS)
+    (_run_dir / f"{safe_name}.txt").write_text(out.getvalue(), encoding='utf-8')
+
+    lines = [f"Top {TOP_ALLOCATIONS} allocation sites for {name} (largest checkpointed working set)"]
+    for stat in snapshot.statistics('lineno')[:TOP_ALLOCATIONS]:
+        lines.append(str(stat))
+    (_run_dir / f"{safe_name}_alloc.txt").write_text('\n'.join(lines) + '\n', encoding='utf-8')
+
+    _summary[name] = stats
+    with open(_run_dir / 'summary.json', 'w', encoding='utf-8') as f:
+        json.dump(_summary, f, indent=2)
+
+    print(f"[profile] {name}: {stats['work_seconds']}s work, {stats['sleep_seconds']}s sleeping, "
+          f"peak traced {stats['traced_peak_mb']} MB, peak RSS {stats['peak_rss_mb']} MB")
+
+def add_profile_args(parser):
+    """Add the shared --profile/--profile-dir options to a CLI parser."""
+    parser.add_argument("--profile", action="store_true",
+                        help="Profile CPU and memory per step (excludes rate-limit sleeps)")
+    parser.add_argument("--profile-dir", default="profiles",
+                        help="Directory for profile runs (default: profiles/)")
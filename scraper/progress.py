@@ -0,0 +1,247 @@
+"""
+Unified progress tracking and an optional local metrics endpoint.
+
+Every fetch loop reports into one process-wide tracker (TRACKER) instead of
+computing its own ETA. The tracker knows every step of the run, including
+steps planned but not started yet, so it can give a global ETA across all
+steps and leagues. The request counters in utils.REQUEST_STATS supply the
+request rate (compared with the 60 / REQUEST_DELAY per-minute budget), 429s
+and failures.
+
+With --metrics-port, run_scraper.py serves the same numbers over HTTP on
+localhost, so a multi-hour run can be watched without tailing logs:
+
+    /metrics        Prometheus text format
+    /metrics.json   JSON (also served at /)
+
+Usage:
+    python run_scraper.py --metrics-port 9108
+    curl -s localhost:9108/metrics.json
+    python progress.py --port 9108        # one-screen summary of a running crawl
+"""
+
+import argparse
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.request import urlopen
+
+from config import REQUEST_DELAY
+from utils import REQUEST_STATS
+
+def format_eta(seconds):
+    """Format seconds as 'Xm Ys' (the fetchers' long-standing progress format)."""
+    seconds = max(0, int(seconds))
+    return f"{seconds // 60}m {seconds % 60}s"
+
+class StepProgress:
+    """Progress of one step (one page family for one league)."""
+
+    def __init__(self, name, total, tracker):
+        self.name = name
+        self.total = total
+        self.done = 0
+        self.started_at = None
+        self.finished_at = None
+        self.aborted = False
+        self._tracker = tracker
+
+    def start(self, total=None):
+        if total is not None:
+            self.total = total
+        self.done = 0
+        self.started_at = time.time()
+        self.finished_at = None
+        self.aborted = False
+        return self
+
+    def advance(self, n=1):
+        """Record n more pages processed."""
+        with self._tracker.lock:
+            self.done += n
+            if self.done >= self.total:
+                self.finished_at = time.time()
+
+    def finish(self):
+        with self._tracker.lock:
+            self.finished_at = self.finished_at or time.time()
+
+    def abort(self):
+        """Mark the step as stopped early; its remaining pages leave the global ETA."""
+        with self._tracker.lock:
+            self.aborted = not self.finished_at
+            self.finished_at = self.finished_at or time.time()
+
+    def eta_seconds(self):
+        """Remaining time for this step at its own average page rate."""
+        if not self.done or not self.started_at:
+            return None
+        per_page = (time.time() - self.started_at) / self.done
+        return per_page * max(0, self.total - self.done)
+
+    def status_line(self):
+        """'Progress: 12/101 (11.9%) - Est. 4m 36s remaining'."""
+        percent = (self.done / self.total) * 100 if self.total else 100.0
+        return (f"Progress: {self.done}/{self.total} ({percent:.1f}%) - "
+                f"Est. {format_eta(self.eta_seconds() or 0)} remaining")
+
+    def to_dict(self):
+        return {
+            'done': self.done,
+            'total': self.total,
+            'complete': round(self.done / self.total, 4) if self.total else 1.0,
+            'state': ('aborted' if self.aborted else 'done') if self.finished_at else
+                     ('running' if self.started_at else 'planned'),
+            'eta_seconds': round(self.eta_seconds(), 1) if self.eta_seconds() is not None else None,
+        }
+
+class ProgressTracker:
+    """All steps of the current run, in the order they were planned or started."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.steps = {}
+        self.created_at = time.time()
+
+    def plan(self, name, total):
+        """Register a step that will run later, with its expected page count."""
+        with self.lock:
+            if name not in self.steps:
+                self.steps[name] = StepProgress(name, total, self)
+            elif not self.steps[name].started_at:
+                self.steps[name].total = total
+
+    def step(self, name, total):
+        """Start (or restart) a step with its actual page count and return it."""
+        with self.lock:
+            if name not in self.steps:
+                self.steps[name] = StepProgress(name, total, self)
+            return self.steps[name].start(total)
+
+    def abort(self, name):
+        """Mark a planned or running step as stopped early (no-op for unknown steps)."""
+        step = self.steps.get(name)
+        if step is not None:
+            step.abort()
+
+    def snapshot(self):
+        """Current progress and request metrics as a JSON-friendly dict."""
+        with self.lock:
+            steps = {name: step.to_dict() for name, step in self.steps.items()}
+            started = [s for s in self.steps.values() if s.started_at]
+            pages_done = sum(s.done for s in started)
+            pages_left = sum(max(0, s.total - s.done) for s in self.steps.values() if not s.finished_at)
+            busy_since = min((s.started_at for s in started), default=None)
+
+        now = time.time()
+        elapsed = now - busy_since if busy_since else 0
+        pages_per_sec = pages_done / elapsed if elapsed and pages_done else None
+        requests_per_min = REQUEST_STATS['requests'] / elapsed * 60 if elapsed else 0.0
+        return {
+            'uptime_seconds': round(now - self.created_at, 1),
+            'steps': steps,
+            'pages_done': pages_done,
+            'pages_remaining': pages_left,
+            'eta_seconds': round(pages_left / pages_per_sec, 1) if pages_per_sec else None,
+            'requests': {
+                'total': REQUEST_STATS['requests'],
+                'rate_limited': REQUEST_STATS['rate_limited'],
+                'failures': REQUEST_STATS['failures'],
+                'sleep_seconds': round(REQUEST_STATS['sleep_seconds'], 1),
+                'circuit_trips': REQUEST_STATS['circuit_trips'],
+                'deferred': REQUEST_STATS['deferred'],
+                'per_minute': round(requests_per_min, 2),
+                'budget_per_minute': round(60 / REQUEST_DELAY, 2) if REQUEST_DELAY else None,
+            },
+        }
+
+    def prometheus(self):
+        """Current metrics in Prometheus text exposition format."""
+        snap = self.snapshot()
+        requests = snap['requests']
+        lines = []
+
+        def metric(name, kind, help_text, samples):
+            lines.append(f"# HELP scraper_{name} {help_text}")
+            lines.append(f"# TYPE scraper_{name} {kind}")
+            for labels, value in samples:
+                label_text = ','.join(f'{k}="{v}"' for k, v in labels.items())
+                lines.append(f"scraper_{name}{{{label_text}}} {value}" if label_text else f"scraper_{name} {value}")
+
+        steps = snap['steps'].items()
+        metric('step_pages_done', 'gauge', 'Pages processed per step', [({'step': n}, s['done']) for n, s in steps])
+        metric('step_pages_total', 'gauge', 'Pages expected per step', [({'step': n}, s['total']) for n, s in steps])
+        metric('step_complete_ratio', 'gauge', 'Fraction of each step completed',
+               [({'step': n}, s['complete']) for n, s in steps])
+        metric('requests_total', 'counter', 'HTTP requests sent', [({}, requests['total'])])
+        metric('rate_limited_total', 'counter', 'HTTP 429 responses', [({}, requests['rate_limited'])])
+        metric('failures_total', 'counter', 'Failed request attempts (retried or raised)', [({}, requests['failures'])])
+        metric('circuit_trips_total', 'counter', 'Times a page family circuit breaker opened',
+               [({}, requests['circuit_trips'])])
+        metric('deferred_total', 'counter', 'Pages re-queued while their family circuit was open',
+               [({}, requests['deferred'])])
+        metric('sleep_seconds_total', 'counter', 'Seconds spent in rate-limit and backoff sleeps',
+               [({}, requests['sleep_seconds'])])
+        metric('requests_per_minute', 'gauge', 'Average request rate since the first step started',
+               [({}, requests['per_minute'])])
+        if requests['budget_per_minute'] is not None:
+            metric('request_budget_per_minute', 'gauge', 'Request rate allowed by REQUEST_DELAY',
+                   [({}, requests['budget_per_minute'])])
+        metric('pages_remaining', 'gauge', 'Pages left across all planned and running steps',
+               [({}, snap['pages_remaining'])])
+        if snap['eta_seconds'] is not None:
+            metric('eta_seconds', 'gauge', 'Estimated seconds until all steps finish', [({}, snap['eta_seconds'])])
+        return '\n'.join(lines) + '\n'
+
+TRACKER = ProgressTracker()
+
+def _make_handler(tracker):
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path == '/metrics':
+                body, content_type = tracker.prometheus(), 'text/plain; version=0.0.4'
+            elif self.path in ('/', '/metrics.json'):
+                body, content_type = json.dumps(tracker.snapshot(), indent=2), 'application/json'
+            else:
+                self.send_error(404)
+                return
+            encoded = body.encode('utf-8')
+            self.send_response(200)
+            self.send_header('Content-Type', content_type)
+            self.send_header('Content-Length', str(len(encoded)))
+            self.end_headers()
+            self.wfile.write(encoded)
+
+        def log_message(self, *args):
+            pass
+    return MetricsHandler
+
+def serve_metrics(port, tracker=TRACKER, host='127.0.0.1'):
+    """
+    Serve tracker metrics from a background thread (localhost only by default).
+
+    Returns:
+        The running ThreadingHTTPServer (call shutdown() to stop it)
+    """
+    server = ThreadingHTTPServer((host, port), _make_handler(tracker))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    print(f"Serving metrics on http://{host}:{server.server_address[1]}/metrics (JSON: /metrics.json)")
+    return server
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Show the progress of a crawl running with --metrics-port")
+    parser.add_argument("--port", type=int, default=9108)
+    args = parser.parse_args()
+
+    with urlopen(f"http://127.0.0.1:{args.port}/metrics.json") as resp:
+        snap = json.load(resp)
+    for name, step in snap['steps'].items():
+        print(f"  {name:15s} {step['state']:8s} {step['done']:5d}/{step['total']:<5d} ({step['complete']:.0%})")
+    requests = snap['requests']
+    budget = f"{requests['budget_per_minute']}/min" if requests['budget_per_minute'] else "unlimited"
+    print(f"Requests: {requests['total']} ({requests['per_minute']}/min, budget {budget}), "
+          f"{requests['rate_limited']} rate limited, {requests['failures']} failures, "
+          f"{requests.get('circuit_trips', 0)} circuit trips")
+    eta = snap['eta_seconds']
+    print(f"Global ETA: {format_eta(eta) if eta is not None else 'unknown'}")
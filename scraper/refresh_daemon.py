@@ -0,0 +1,254 @@
+"""
+Long-running refresh daemon for the player database.
+
+Keeps both league DBs, the college normalization map, the NFL team list and
+one HTTP session warm in memory, and re-crawls each page family on its own
+cadence (see REFRESH_CADENCES in config.py). After a job changes a league DB,
+the merged + normalized output is rebuilt in memory and republished
+atomically, but only if its content actually changed; everything step 5
+derives from it (daily pool, era datasets, distance oracle, Parquet export)
+is then regenerated, so no published file describes an older output.
+
+Scheduling state (last run per family, digest of the last published output) is
+kept in daemon_state.json so restarts don't re-crawl everything.
+
+SIGINT/SIGTERM stop the running job after its current page: the fetch loop
+saves what it merged and the family stays due, so it runs again on restart. A
+second signal raises KeyboardInterrupt immediately.
+
+Usage:
+    python refresh_daemon.py
+    python refresh_daemon.py --output ../ballknower/public/backend/players_new.json
+    python refresh_daemon.py --once            # run whatever is due, then exit
+    python run_scraper.py --daemon             # same as the first form
+"""
+
+import argparse
+import copy
+import hashlib
+import json
+import signal
+import time
+import traceback
+from datetime import datetime
+from pathlib import Path
+
+import requests
+
+from config import REFRESH_CADENCES, NFL_BASE_URL
+from fetch_players import fetch_players
+from fetch_teams import fetch_teams, get_active_teams_nfl
+from fetch_numbers import fetch_numbers
+from fetch_colleges import fetch_colleges
+from athlete_resolver import resolve_athletes
+from merge_final import merge_players
+from college_normalizer import load_canonical_map, normalize_players
+from era_datasets import DEFAULT_ITEMS_PATH
+from run_scraper import build_derived_outputs
+from progress import TRACKER
+import snapshot_store
+from utils import (
+    CircuitOpenError, LayoutChangeError, clear_stop, load_json, request_stop, save_json, save_json_atomic,
+    stop_requested
+)
+
+SCRAPER_DIR = Path(__file__).parent
+STATE_PATH = SCRAPER_DIR / "daemon_state.json"
+DEFAULT_OUTPUT = "../ballknower/public/backend/players_new.json"
+
+# How often to wake up and check for due jobs when nothing is running
+POLL_SECONDS = 60
+
+# A job that crashed is retried after this long (or its cadence, if shorter)
+FAILED_JOB_RETRY_SECONDS = 3600
+
+def db_digest(data):
+    """Stable content hash of a DB dict (independent of key order)."""
+    encoded = json.dumps(data, sort_keys=True, ensure_ascii=False).encode('utf-8')
+    return hashlib.sha256(encoded).hexdigest()
+
+class RefreshDaemon:
+    """Warm-state scheduler that runs page-family refresh jobs and republishes output."""
+
+    def __init__(self, output_file=DEFAULT_OUTPUT, cadences=None, state_path=STATE_PATH, items_file=DEFAULT_ITEMS_PATH):
+        self.output_file = Path(output_file)
+        self.items_file = Path(items_file)
+        self.cadences = dict(REFRESH_CADENCES if cadences is None else cadences)
+        self.state_path = Path(state_path)
+        self.stopping = False
+
+        self.session = requests.Session()
+        self.session.headers.update({
+            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64)'
+        })
+
+        self.db_paths = {
+            'NFL': SCRAPER_DIR / "players_db_nfl.json",
+            'NBA': SCRAPER_DIR / "players_db_nba.json",
+        }
+        self.dbs = {league: load_json(path) for league, path in self.db_paths.items()}
+        for league, db in self.dbs.items():
+            print(f"Loaded {len(db)} {league} players")
+
+        self.col_map = load_canonical_map() or {}
+        self.state = load_json(self.state_path)
+        self.state.setdefault('last_run', {})
+        self.nfl_teams = self.state.get('nfl_teams')
+
+        # family -> (league, job callable)
+        self.jobs = {
+            'nfl_team_list': ('NFL', self._refresh_nfl_team_list),
+            'nfl_players': ('NFL', lambda: fetch_players('NFL', self.db_paths['NFL'], session=self.session, players=self.dbs['NFL'])),
+            'nba_players': ('NBA', lambda: fetch_players('NBA', self.db_paths['NBA'], session=self.session, players=self.dbs['NBA'])),
+            'nba_teams': ('NBA', lambda: fetch_teams('NBA', self.db_paths['NBA'], session=self.session, players=self.dbs['NBA'])),
+            'nba_numbers': ('NBA', lambda: fetch_numbers('NBA', self.db_paths['NBA'], session=self.session, players=self.dbs['NBA'])),
+            'nfl_uniforms': ('NFL', self._refresh_nfl_uniforms),
+            'nfl_colleges': ('NFL', lambda: fetch_colleges('NFL', self.db_paths['NFL'], session=self.session, players=self.dbs['NFL'])),
+        }
+        unknown = set(self.cadences) - set(self.jobs)
+        if unknown:
+            raise ValueError(f"Unknown page families in cadences: {sorted(unknown)}")
+
+    def _refresh_nfl_team_list(self):
+        teams = get_active_teams_nfl(self.session, NFL_BASE_URL)
+        if teams:
+            self.nfl_teams = [list(t) for t in teams]
+            self.state['nfl_teams'] = self.nfl_teams
+
+    def _refresh_nfl_uniforms(self):
+        if not self.nfl_teams:
+            self._refresh_nfl_team_list()
+        teams = [tuple(t) for t in self.nfl_teams or []]
+        fetch_teams('NFL', self.db_paths['NFL'], session=self.session, players=self.dbs['NFL'], teams=teams)
+
+    def due_jobs(self, now=None):
+        """Return families whose cadence has elapsed, most overdue first."""
+        now = now or time.time()
+        overdue = []
+        for family, hours in self.cadences.items():
+            last = self.state['last_run'].get(family, 0)
+            lateness = now - (last + hours * 3600)
+            if lateness >= 0:
+                overdue.append((lateness, family))
+        overdue.sort(reverse=True)
+        return [family for _, family in overdue]
+
+    def seconds_until_next_job(self, now=None):
+        now = now or time.time()
+        next_times = [
+            self.state['last_run'].get(family, 0) + hours * 3600
+            for family, hours in self.cadences.items()
+        ]
+        return max(0, min(next_times) - now) if next_times else POLL_SECONDS
+
+    def run_job(self, family):
+        """Run one page-family refresh and republish if the DB changed."""
+        league, job = self.jobs[family]
+        db = self.dbs[league]
+        before = db_digest(db)
+
+        print(f"\n[daemon] {datetime.now():%Y-%m-%d %H:%M:%S} Refreshing {family}")
+        start = time.time()
+        try:
+            job()
+        except (LayoutChangeError, CircuitOpenError) as e:
+            # Keep what was merged so far; the family is retried at its next slot
+            print(f"[daemon] {family} stopped early: {e}")
+            TRACKER.abort(family)
+            self.state['last_run'][family] = time.time()
+        except Exception:
+            # Network errors, 404s or parser bugs must not take the daemon down.
+            # Keep what was merged so far and retry the family after a backoff.
+            print(f"[daemon] {family} failed:")
+            traceback.print_exc()
+            cadence = self.cadences[family] * 3600
+            retry_in = min(FAILED_JOB_RETRY_SECONDS, cadence)
+            self.state['last_run'][family] = time.time() - cadence + retry_in
+            print(f"[daemon] Retrying {family} in {retry_in / 60:.0f} min")
+        else:
+            if stop_requested():
+                # Interrupted part way; leave the family due for the next start
+                print(f"[daemon] {family} interrupted; it will run again on restart")
+            else:
+                self.state['last_run'][family] = time.time()
+
+        changed = db_digest(db) != before
+        print(f"[daemon] {family} finished in {time.time() - start:.0f}s ({'changed' if changed else 'no changes'})")
+        if changed:
+            save_json(db, self.db_paths[league])
+            self.publish()
+        save_json(self.state, self.state_path)
+
+    def build_output(self):
+        """Merge and normalize the warm league DBs without touching them."""
+        # Normalization rewrites college lists in place, so work on copies
+        # to keep the warm per-league DBs identical to what the fetchers produce.
+        crossref = resolve_athletes(self.dbs['NFL'], self.dbs['NBA'], self.col_map)
+        merged = merge_players(copy.deepcopy(self.dbs['NFL']), copy.deepcopy(self.dbs['NBA']), crossref)
+        normalize_players(self.col_map, merged)
+        return merged
+
+    def publish(self, force=False):
+        """Republish the merged output atomically if its content changed."""
+        merged = self.build_output()
+        digest = db_digest(merged)
+        if not force and digest == self.state.get('published_digest') and self.output_file.exists():
+            print("[daemon] Output unchanged; skipping publish")
+            return False
+
+        self.output_file.parent.mkdir(parents=True, exist_ok=True)
+        save_json_atomic(merged, self.output_file)
+        self._publish_metadata()
+        build_derived_outputs(self.output_file, SCRAPER_DIR, self.items_file)
+        self.state['published_digest'] = digest
+        snapshot_store.snapshot([self.output_file, *self.db_paths.values()], label="daemon")
+        print(f"[daemon] Published {len(merged)} players")
+        return True
+
+    def _publish_metadata(self):
+        metadata = {"last_updated": datetime.now().strftime("%B %d, %Y")}
+        save_json_atomic(metadata, SCRAPER_DIR / "metadata.json")
+        public_metadata = self.output_file.parent / "metadata.json"
+        if public_metadata.parent.exists():
+            save_json_atomic(metadata, public_metadata)
+
+    def stop(self, *_):
+        print("\n[daemon] Stop requested; saving after the current page (signal again to abort)")
+        self.stopping = True
+        # Fetch loops check this between pages (utils.FetchQueue)
+        request_stop()
+        # A second signal raises KeyboardInterrupt instead of waiting
+        signal.signal(signal.SIGINT, signal.default_int_handler)
+        signal.signal(signal.SIGTERM, signal.default_int_handler)
+
+    def run(self, once=False):
+        """Main loop: run due jobs one at a time (requests share one rate limit)."""
+        clear_stop()
+        signal.signal(signal.SIGINT, self.stop)
+        signal.signal(signal.SIGTERM, self.stop)
+
+        try:
+            while not self.stopping:
+                due = self.due_jobs()
+                if due:
+                    self.run_job(due[0])
+                    continue
+                if once:
+                    break
+                wait = min(POLL_SECONDS, self.seconds_until_next_job())
+                time.sleep(max(wait, 1))
+        finally:
+            # Also on a second signal (KeyboardInterrupt), so schedules survive
+            save_json(self.state, self.state_path)
+        print("[daemon] Stopped")
+
+def run_daemon(output_file=DEFAULT_OUTPUT, once=False):
+    RefreshDaemon(output_file).run(once=once)
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Keep the player DB fresh with scheduled incremental crawls")
+    parser.add_argument("--output", default=DEFAULT_OUTPUT, help=f"Published output path (default: {DEFAULT_OUTPUT})")
+    parser.add_argument("--once", action="store_true", help="Run all currently due jobs, then exit")
+    args = parser.parse_args()
+
+    run_daemon(args.output, once=args.once)
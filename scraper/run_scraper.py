@@ -9,7 +9,11 @@ Pipeline Steps:
     2. Initialize DB: Convert lists to database format (dict by player ID)
     3. Fetch Teams: Get team affiliations (NFL includes numbers via uniform pages)
     4. Fetch Colleges/Numbers: NFL colleges from PFR, NBA numbers from BBR
-    5. Merge & Normalize: Combine leagues and normalize college names
+    5. Merge & Normalize: Combine leagues, normalize college names, bundle
+       popularity tables (if game_analytics.py has been run), regenerate the
+       daily item pool (daily_pool.py), write era subsets (era_datasets.py),
+       landmark distances (distance_oracle.py) and a Parquet copy
+       (columnar_export.py), and snapshot the release (snapshot_store.py)
 
 Usage:
     # Run complete pipeline
@@ -25,6 +29,24 @@ Usage:
     # Custom output location
     python run_scraper.py --output /path/to/output.json
 
+    # Profile CPU and memory per step (written to profiles/<timestamp>/)
+    python run_scraper.py --profile
+
+    # Keep running and refresh each page family on its own schedule
+    python run_scraper.py --daemon
+
+    # Rebuild from stored pages (no network), parsing on all cores
+    python run_scraper.py --offline
+
+    # Refresh only the pages most likely to have changed, within 30 minutes
+    python run_scraper.py --budget 30
+
+    # Crawl without probing known pages first (see canary.py)
+    python run_scraper.py --skip-preflight
+
+    # Serve live progress and request metrics on localhost:9108 (see progress.py)
+    python run_scraper.py --metrics-port 9108
+
 Rate Limiting:
     All requests enforce a 3.1-second delay (20 requests/minute) to comply with
     Sports Reference terms of service.
@@ -50,10 +72,23 @@ from fetch_numbers import fetch_numbers
 from fetch_colleges import fetch_colleges
 from merge_final import merge_final
 from college_normalizer import run_normalization
+from game_analytics import bundle_popularity
+from era_datasets import build_eras, DEFAULT_ITEMS_PATH
+from distance_oracle import build_oracle
+from columnar_export import export_players
+from daily_pool import build_pool
+from offline_rebuild import offline_rebuild
+from budget_crawl import budget_crawl
+from canary import preflight
+from config import NFL_LETTERS, NBA_LETTERS, NBA_TEAMS, NUMS
+from progress import TRACKER, serve_metrics
+from utils import LayoutChangeError, load_json
+import snapshot_store
+from profiling import add_profile_args, enable_profiling, profile_step
 
-def update_metadata():
+def update_metadata(data_dir=SCRAPER_DIR, public_dir=Path("../ballknower/public/backend")):
     """Update the metadata.json file with the current date."""
-    metadata_path = SCRAPER_DIR / "metadata.json"
+    metadata_path = Path(data_dir) / "metadata.json"
     current_date = datetime.now().strftime("%B %d, %Y")
     
     try:
@@ -62,7 +97,7 @@ def update_metadata():
         print(f"Updated metadata with date: {current_date}")
         
         # Also copy/write to the public backend folder if possible
-        public_metadata = Path("../ballknower/public/backend/metadata.json")
+        public_metadata = Path(public_dir) / "metadata.json"
         if public_metadata.parent.exists():
              with open(public_metadata, 'w', encoding='utf-8') as f:
                 json.dump({"last_updated": current_date}, f, indent=2)
@@ -71,7 +106,86 @@ def update_metadata():
     except Exception as e:
         print(f"Error updating metadata: {e}")
 
-def run_pipeline(leagues, steps, output_file):
+# Crawl steps; --offline and --budget replace all of them at once
+CRAWL_STEPS = {1, 3, 4}
+
+def partial_crawl_steps(steps):
+    """Crawl steps that are selected, if only some of them are (else None)."""
+    selected = CRAWL_STEPS & set(steps)
+    return sorted(selected) if selected and selected != CRAWL_STEPS else None
+
+# Active NFL franchises, for sizing the uniform step before the team list is fetched
+NFL_TEAM_COUNT = 32
+
+def progress_steps(league):
+    """Progress tracker step name per crawl step number for a league."""
+    if league == 'NFL':
+        return {1: "nfl_players", 3: "nfl_uniforms", 4: "nfl_colleges"}
+    return {1: "nba_players", 3: "nba_teams", 4: "nba_numbers"}
+
+def plan_steps(leagues, steps, data_dir=SCRAPER_DIR, blocked=None):
+    """
+    Register the crawl steps that will run with the progress tracker, for the global ETA.
+
+    Steps in blocked[league] (failed preflight) are left out, since they never run.
+    """
+    blocked = blocked or {}
+    for league in leagues:
+        names = progress_steps(league)
+        run = [step for step in (1, 3, 4) if step in steps and step not in blocked.get(league, set())]
+        if 1 in run:
+            TRACKER.plan(names[1], len(NFL_LETTERS if league == 'NFL' else NBA_LETTERS))
+        if league == 'NFL':
+            if 3 in run:
+                TRACKER.plan(names[3], NFL_TEAM_COUNT * len(NUMS))
+            if 4 in run:
+                # The college crawl is incremental; the last snapshot gives an upper bound
+                schools = load_json(Path(data_dir) / "players_db_nfl_school_snapshot.json")
+                if schools:
+                    TRACKER.plan(names[4], len(schools))
+        else:
+            if 3 in run:
+                TRACKER.plan(names[3], len(NBA_TEAMS))
+            if 4 in run:
+                TRACKER.plan(names[4], len(NUMS))
+
+def build_derived_outputs(output_file, data_dir=SCRAPER_DIR, items_file=DEFAULT_ITEMS_PATH):
+    """
+    Regenerate every file derived from the merged output.
+
+    Run by step 5 and by each refresh daemon publish, so none of these files
+    describes an older players_new.json than the one published.
+    
+    Args:
+        output_file: Merged and normalized player data (players_new.json)
+        data_dir: Directory holding popularity.json, distance_oracle.json and players_dataset/
+        items_file: Daily challenge pool to regenerate (daily_pool.py)
+    """
+    # Ship popularity tables from game_analytics.py alongside the player data
+    bundle_popularity(output_file, Path(data_dir) / "popularity.json")
+
+    # Regenerate the daily challenge pool from graph centrality (daily_pool.py)
+    print(f"\n--- Ranking Daily Challenge Items ---")
+    with profile_step("step5_daily_pool"):
+        build_pool(output_file, items_file)
+
+    # Smaller era-restricted datasets for modern-only game modes (era_datasets.py)
+    print(f"\n--- Building Era Datasets ---")
+    with profile_step("step5_eras"):
+        build_eras(output_file, items_path=items_file)
+
+    # Landmark distances for daily par, hints and result pages (distance_oracle.py)
+    print(f"\n--- Building Distance Oracle ---")
+    with profile_step("step5_distance_oracle"):
+        build_oracle(output_file, Path(data_dir) / "distance_oracle.json", items_path=items_file,
+                     popularity_path=Path(data_dir) / "popularity.json")
+
+    # Partitioned Parquet copy for analysis and batch jobs (columnar_export.py, needs pyarrow)
+    with profile_step("step5_columnar_export"):
+        export_players(output_file, Path(data_dir) / "players_dataset")
+
+def run_pipeline(leagues, steps, output_file, offline=False, workers=None, data_dir=SCRAPER_DIR, budget=None,
+                 check_layout=True, items_file=DEFAULT_ITEMS_PATH):
     """
     Execute the scraping pipeline for specified leagues and steps.
     
@@ -79,31 +193,90 @@ def run_pipeline(leagues, steps, output_file):
         leagues: List of league strings ('NFL', 'NBA')
         steps: List of step numbers to execute (1-5)
         output_file: Path for final merged output
+        offline: Rebuild steps 1-4 from the stored page corpus instead of crawling
+            (a full rebuild, so steps must include all of 1, 3 and 4 or none)
+        workers: Worker processes for the offline rebuild (default: all cores)
+        data_dir: Directory for the intermediate league DBs and metadata
+        budget: If set, replace steps 1-4 with a crawl of the most valuable
+            pages that fits in this many minutes (see budget_crawl.py); like
+            offline, it covers every page family, so it needs all of 1, 3 and 4
+        check_layout: Probe known pages per family before crawling and skip
+            steps whose pages no longer parse (see canary.py)
+        items_file: Daily challenge pool regenerated in step 5 (daily_pool.py)
         
     Steps:
         1. Fetch Players & Init DB - Scrape A-Z player index and convert to DB format
         3. Fetch Teams - Get team affiliations (NFL also gets numbers)
         4. Fetch Colleges/Numbers - NFL colleges, NBA numbers
         5. Merge & Normalize - Combine leagues and normalize college names
+    
+    Raises:
+        ValueError: offline or budget with only some of steps 1, 3 and 4
     """
     
+    partial = partial_crawl_steps(steps)
+    if partial and (offline or budget is not None):
+        mode = "--offline" if offline else "--budget"
+        raise ValueError(f"{mode} replaces steps 1, 3 and 4 together; "
+                         f"it cannot run only step(s) {', '.join(map(str, partial))}")
+    
+    if offline and CRAWL_STEPS & set(steps):
+        print(f"\n{'='*60}")
+        print(f"Steps 1-4: Offline Rebuild from Page Corpus")
+        print(f"{'='*60}\n")
+        with profile_step("offline_rebuild"):
+            offline_rebuild(leagues, workers, data_dir)
+        leagues = []
+    elif budget is not None and CRAWL_STEPS & set(steps):
+        print(f"\n{'='*60}")
+        print(f"Steps 1-4: Budgeted Crawl ({budget:g} minutes)")
+        print(f"{'='*60}\n")
+        with profile_step("budget_crawl"):
+            budget_crawl(budget, leagues, data_dir)
+        leagues = []
+    
+    blocked = {}
+    if check_layout and leagues and CRAWL_STEPS & set(steps):
+        with profile_step("preflight"):
+            blocked, results = preflight(leagues, steps)
+        if results and not any(ok for _, _, ok, _ in results):
+            print("\nPreflight failed for every page family; aborting before crawling.")
+            return
+    
+    plan_steps(leagues, steps, data_dir, blocked)
+    
+    def abort_steps(league, *numbers):
+        # Steps that stopped early or will not run must leave the global ETA
+        for number in numbers:
+            TRACKER.abort(progress_steps(league)[number])
+    
     for league in leagues:
         league_lower = league.lower()
-        db_file = SCRAPER_DIR / f"players_db_{league_lower}.json"
+        skip = blocked.get(league, set())
+        db_file = Path(data_dir) / f"players_db_{league_lower}.json"
         
         print(f"\n{'='*60}")
         print(f"Processing {league}")
         print(f"{'='*60}\n")
         
-        if 1 in steps:
+        if skip:
+            print(f"Preflight: skipping {league} step(s) {sorted(skip)} (layout check failed)")
+        
+        if 1 in steps and 1 not in skip:
             print(f"--- Step 1: Fetch Players List & Init DB ---")
-            fetch_players(league, db_file)
+            try:
+                with profile_step(f"{league_lower}_step1_fetch_players"):
+                    fetch_players(league, db_file)
+            except LayoutChangeError as e:
+                print(f"Stopping {league}: {e}")
+                abort_steps(league, 1, 3, 4)
+                continue
             
         if 2 in steps:
             print(f"\n--- Step 2: Deprecated (Merged into Step 1) ---")
             print("Skipping... (Logic now handled in Step 1)")
             
-        if 3 in steps:
+        if 3 in steps and 3 not in skip:
             print(f"\n--- Step 3: Fetch Teams & Numbers ---")
             if league == 'NFL':
                 print("(NFL: Teams and Numbers scraped via uniform pages)")
@@ -112,46 +285,73 @@ def run_pipeline(leagues, steps, output_file):
             
             if not Path(db_file).exists():
                 print(f"Error: {db_file} not found. Run Step 2 first.")
+                abort_steps(league, 3, 4)
                 continue
-            fetch_teams(league, db_file)
+            try:
+                with profile_step(f"{league_lower}_step3_fetch_teams"):
+                    fetch_teams(league, db_file)
+            except LayoutChangeError as e:
+                print(f"Stopping step 3 for {league}: {e}")
+                abort_steps(league, 3)
             
-        if 4 in steps:
+        if 4 in steps and 4 not in skip:
             if league == 'NFL':
                 print(f"\n--- Step 4: Fetch Colleges (NFL) ---")
                 if not Path(db_file).exists():
                     print(f"Error: {db_file} not found. Run Step 2 first.")
+                    abort_steps(league, 4)
                     continue
-                fetch_colleges(league, db_file)
+                try:
+                    with profile_step(f"{league_lower}_step4_fetch_colleges"):
+                        fetch_colleges(league, db_file)
+                except LayoutChangeError as e:
+                    print(f"Stopping step 4 for {league}: {e}")
+                    abort_steps(league, 4)
             else:
                 print(f"\n--- Step 4: Fetch Numbers (NBA) ---")
                 if not Path(db_file).exists():
                     print(f"Error: {db_file} not found. Run Step 2 first.")
+                    abort_steps(league, 4)
                     continue
-                fetch_numbers(league, db_file)
+                try:
+                    with profile_step(f"{league_lower}_step4_fetch_numbers"):
+                        fetch_numbers(league, db_file)
+                except LayoutChangeError as e:
+                    print(f"Stopping step 4 for {league}: {e}")
+                    abort_steps(league, 4)
 
     if 5 in steps:
         print(f"\n{'='*60}")
         print(f"Step 5: Merge & Normalize")
         print(f"{'='*60}\n")
         
-        nfl_db = SCRAPER_DIR / "players_db_nfl.json"
-        nba_db = SCRAPER_DIR / "players_db_nba.json"
+        nfl_db = Path(data_dir) / "players_db_nfl.json"
+        nba_db = Path(data_dir) / "players_db_nba.json"
         
         if not Path(nfl_db).exists():
             print(f"Warning: {nfl_db} missing. Merging only available data.")
         if not Path(nba_db).exists():
             print(f"Warning: {nba_db} missing. Merging only available data.")
             
-        merge_final(nfl_db, nba_db, output_file)
+        with profile_step("step5_merge"):
+            merge_final(nfl_db, nba_db, output_file, Path(data_dir) / "two_sport_athletes.json")
         
         print(f"\n--- Normalizing College Names ---")
         if Path(output_file).exists():
-            run_normalization(output_file)
+            with profile_step("step5_normalize"):
+                run_normalization(output_file)
         else:
             print(f"Error: Output file {output_file} not found. Cannot normalize.")
+
+        if Path(output_file).exists():
+            build_derived_outputs(output_file, data_dir, items_file)
         
         # Update metadata after successful completion
-        update_metadata()
+        update_metadata(data_dir, Path(output_file).parent)
+
+        # Keep this release so a bad crawl can be rolled back (snapshot_store.py)
+        with profile_step("step5_snapshot"):
+            snapshot_store.snapshot([output_file, nfl_db, nba_db], label="pipeline")
         
         print(f"\n{'='*60}")
         print(f"Pipeline Complete!")
@@ -168,13 +368,19 @@ Examples:
   python run_scraper.py --leagues NFL            # NFL only
   python run_scraper.py --steps 1 2 3            # First 3 steps
   python run_scraper.py --output custom.json     # Custom output path
+  python run_scraper.py --profile                # Per-step CPU/memory profiles
+  python run_scraper.py --daemon                 # Scheduled warm-state refreshes
+  python run_scraper.py --offline                # Rebuild from stored pages
+  python run_scraper.py --budget 30              # Freshest pages first, 30 min
+  python run_scraper.py --skip-preflight         # Don't probe page layouts first
+  python run_scraper.py --metrics-port 9108      # Live metrics on localhost
 
 Steps:
   1. Fetch Players      - Scrape player lists (names, years, NBA colleges)
   2. Initialize DB      - Convert to database format
   3. Fetch Teams        - Get team affiliations (NFL also gets numbers)
   4. Fetch Data         - NFL colleges OR NBA numbers
-  5. Merge & Normalize  - Combine and normalize college names
+  5. Merge & Normalize  - Combine, normalize college names, write era subsets
         """
     )
     
@@ -201,9 +407,69 @@ Steps:
         help="Output file path (default: ../ballknower/public/backend/players_new.json)"
     )
     
+    parser.add_argument(
+        "--offline",
+        action="store_true",
+        help="Rebuild steps 1-4 from the stored page corpus (no network requests)"
+    )
+    
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help="Worker processes for --offline (default: all cores)"
+    )
+    
+    parser.add_argument(
+        "--budget",
+        type=float,
+        default=None,
+        metavar="MINUTES",
+        help="Replace steps 1-4 with a freshness-first crawl limited to MINUTES"
+    )
+    
+    parser.add_argument(
+        "--skip-preflight",
+        action="store_true",
+        help="Crawl without first probing known pages for layout changes"
+    )
+    
+    parser.add_argument(
+        "--metrics-port",
+        type=int,
+        default=None,
+        help="Serve progress and request metrics on this localhost port (Prometheus /metrics, JSON /metrics.json)"
+    )
+    
+    parser.add_argument(
+        "--daemon",
+        action="store_true",
+        help="Run as a long-lived refresh daemon (see refresh_daemon.py)"
+    )
+    
+    add_profile_args(parser)
+    
     args = parser.parse_args()
     
-    run_pipeline(args.leagues, args.steps, args.output)
+    partial = partial_crawl_steps(args.steps)
+    if partial and (args.offline or args.budget is not None):
+        parser.error(f"{'--offline' if args.offline else '--budget'} replaces steps 1, 3 and 4 together; "
+                     f"it cannot run only step(s) {', '.join(map(str, partial))}")
+    
+    if args.profile:
+        enable_profiling(args.profile_dir)
+    
+    if args.metrics_port is not None:
+        serve_metrics(args.metrics_port)
+    
+    if args.daemon:
+        # Imported here because refresh_daemon builds on the same fetch modules
+        from refresh_daemon import run_daemon
+        run_daemon(args.output)
+        return
+    
+    run_pipeline(args.leagues, args.steps, args.output, offline=args.offline, workers=args.workers,
+                 budget=args.budget, check_layout=not args.skip_preflight)
 
 if __name__ == '__main__':
     main()
@@ -0,0 +1,296 @@
+"""
+Multi-core game simulator for rule and balance analysis.
+
+Plays large numbers of simulated online games against the merged player data
+with the rules of calculateSubmitAnswerUpdate / calculateResolveChallengeUpdate
+in gameUtils.js:
+
+    - A opens by naming any player; sides then alternate attribute / player
+    - a player must be unused and share the last attribute; an attribute must
+      belong to the last player and may not repeat the last attribute
+    - a side that cannot find a move challenges the previous move; the
+      challenged side must back it up (an unused player with the attribute,
+      or an attribute of the player) or lose, and wins if it can
+    - the move that reaches TURN_LIMIT moves loses
+
+Simulated players only "recall" each valid answer with probability
+`knowledge`, so dead ends and challenges happen the way they do for humans.
+Policies: 'random' plays any recalled move; 'greedy' plays the recalled player
+with the fewest attributes and the attribute with the fewest unused players
+left (but at least one).
+
+The data is compacted to integer IDs and tuples once per worker; games are
+sharded across a process pool with per-shard seeds, so results are
+reproducible for a given --seed and --workers.
+
+Usage:
+    python simulate_games.py --games 100000
+    python simulate_games.py --games 1000000 --policy-a greedy --policy-b random --knowledge 0.3
+    python simulate_games.py --games 200000 --turn-limit 20 --report sim.json
+"""
+
+import argparse
+import json
+import os
+import random
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from player_index import ATTRIBUTE_FIELDS
+from utils import load_json
+
+DEFAULT_PLAYERS_PATH = Path("../ballknower/public/backend/players_new.json")
+TURN_LIMIT = 30
+POLICIES = ('random', 'greedy')
+
+# Candidates a simulated player considers before giving up on recall
+MAX_RECALL_TRIES = 64
+
+class CompactGameData:
+    """
+    Integer-indexed view of the player data.
+
+    Attributes:
+        player_ids: Player ID by index
+        attr_keys: (type, lowercased value) by index
+        player_attrs: Tuple of attribute indexes per player
+        attr_players: Tuple of player indexes per attribute (in shuffled order)
+    """
+
+    def __init__(self, players):
+        self.player_ids = sorted(players)
+        attr_index = {}
+        player_attrs = []
+        for pid in self.player_ids:
+            attrs = []
+            for attr_type, field in ATTRIBUTE_FIELDS.items():
+                for value in players[pid].get(field) or []:
+                    key = (attr_type, str(value).lower())
+                    idx = attr_index.setdefault(key, len(attr_index))
+                    if idx not in attrs:
+                        attrs.append(idx)
+            player_attrs.append(tuple(attrs))
+        self.attr_keys = list(attr_index)
+        members = [[] for _ in self.attr_keys]
+        for pos, attrs in enumerate(player_attrs):
+            for idx in attrs:
+                members[idx].append(pos)
+        # Shuffle once so candidate walks are not in player ID (alphabetical) order
+        shuffle_rng = random.Random(0)
+        for m in members:
+            shuffle_rng.shuffle(m)
+        self.player_attrs = tuple(player_attrs)
+        self.attr_players = tuple(tuple(m) for m in members)
+
+class Simulator:
+    """Plays games on CompactGameData and accumulates statistics."""
+
+    def __init__(self, data, policies=('random', 'random'), knowledge=0.5, turn_limit=TURN_LIMIT, seed=0):
+        self.data = data
+        self.policies = policies
+        self.knowledge = knowledge
+        self.turn_limit = turn_limit
+        self.rng = random.Random(seed)
+        self.stats = {
+            'games': 0,
+            'wins': Counter(),
+            'end_reasons': Counter(),
+            'chain_lengths': Counter(),
+            'attr_played': Counter(),
+            'attr_dead_ends': Counter(),
+        }
+
+    def recall_player(self, attr, used, policy):
+        """A recalled unused player with the attribute, or None."""
+        candidates = self.data.attr_players[attr]
+        rng = self.rng
+        n = len(candidates)
+        # Walk the (pre-shuffled) candidates from a random offset; much cheaper
+        # than rng.sample and just as unbiased for this purpose
+        offset = rng.randrange(n) if n else 0
+        recalled = []
+        for i in range(min(n, MAX_RECALL_TRIES)):
+            p = candidates[(offset + i) % n]
+            if p not in used and rng.random() < self.knowledge:
+                if policy != 'greedy':
+                    return p
+                recalled.append(p)
+        if not recalled:
+            return None
+        return min(recalled, key=lambda p: len(self.data.player_attrs[p]))
+
+    def recall_attribute(self, player, last_attr, used, policy):
+        """A recalled attribute of the player other than last_attr, or None."""
+        rng = self.rng
+        recalled = [a for a in self.data.player_attrs[player] if a != last_attr and rng.random() < self.knowledge]
+        if not recalled:
+            return None
+        if policy == 'greedy':
+            attr_players, player_attrs = self.data.attr_players, self.data.player_attrs
+            # Count used players per attribute from the (short) used set
+            remaining = [(len(attr_players[a]) - sum(1 for p in used if a in player_attrs[p]), a) for a in recalled]
+            live = [item for item in remaining if item[0] > 0]
+            return min(live or remaining)[1]
+        return rng.choice(recalled)
+
+    def play(self):
+        """Play one game; returns (winner, reason, chain length)."""
+        data = self.data
+        side = 0  # 0 = A, 1 = B
+        first = self.rng.randrange(len(data.player_ids))
+        used = {first}
+        player, attr = first, None
+        moves = 1
+        expecting = 'attribute'
+
+        while True:
+            side ^= 1
+            policy = self.policies[side]
+            if moves >= self.turn_limit:
+                # The previous side made the move that reached the limit
+                return side, 'turn_limit', moves
+
+            if expecting == 'attribute':
+                choice = self.recall_attribute(player, attr, used, policy)
+                if choice is None:
+                    # Challenge the player move: the other side must name one of its attributes
+                    backed = self.recall_attribute(player, None, used, self.policies[side ^ 1])
+                    return (side ^ 1, 'challenge_upheld', moves) if backed is not None else (side, 'challenge_won', moves)
+                attr = choice
+                self.stats['attr_played'][attr] += 1
+                expecting = 'player'
+            else:
+                choice = self.recall_player(attr, used, policy)
+                if choice is None:
+                    self.stats['attr_dead_ends'][attr] += 1
+                    backed = self.recall_player(attr, used, self.policies[side ^ 1])
+                    return (side ^ 1, 'challenge_upheld', moves) if backed is not None else (side, 'challenge_won', moves)
+                player = choice
+                used.add(player)
+                expecting = 'attribute'
+            moves += 1
+
+    def run(self, games):
+        stats = self.stats
+        for _ in range(games):
+            winner, reason, length = self.play()
+            stats['games'] += 1
+            stats['wins']['AB'[winner]] += 1
+            stats['end_reasons'][reason] += 1
+            stats['chain_lengths'][length] += 1
+        return stats
+
+# Worker state, built once per process by the pool initializer
+_worker_data = None
+
+def _init_worker(data):
+    global _worker_data
+    _worker_data = data
+
+def _run_shard(job):
+    games, policies, knowledge, turn_limit, seed = job
+    return Simulator(_worker_data, policies, knowledge, turn_limit, seed).run(games)
+
+def _merge(total, shard):
+    total['games'] += shard['games']
+    for key in ('wins', 'end_reasons', 'chain_lengths', 'attr_played', 'attr_dead_ends'):
+        total[key].update(shard[key])
+
+def simulate(players, games, policies=('random', 'random'), knowledge=0.5, turn_limit=TURN_LIMIT,
+             workers=None, seed=0, shard_size=10000):
+    """
+    Simulate games across a process pool and summarize the results.
+
+    Args:
+        players: Merged player DB dict
+        games: Number of games to play
+        policies: (policy for A, policy for B)
+        knowledge: Probability that a simulated player recalls any given valid answer
+        turn_limit: Moves after which the mover loses
+        workers: Worker processes (default: all cores)
+        seed: Base seed; shard i uses seed * 1_000_003 + i
+        shard_size: Games per shard
+
+    Returns:
+        Report dict
+    """
+    data = CompactGameData(players)
+    workers = workers or os.cpu_count() or 1
+    shards = [min(shard_size, games - start) for start in range(0, games, shard_size)]
+    jobs = [(n, tuple(policies), knowledge, turn_limit, seed * 1_000_003 + i) for i, n in enumerate(shards)]
+
+    total = {'games': 0, 'wins': Counter(), 'end_reasons': Counter(), 'chain_lengths': Counter(),
+             'attr_played': Counter(), 'attr_dead_ends': Counter()}
+    start = time.perf_counter()
+    if workers > 1 and len(jobs) > 1:
+        with ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(data,)) as pool:
+            for shard in pool.map(_run_shard, jobs):
+                _merge(total, shard)
+    else:
+        _init_worker(data)
+        for job in jobs:
+            _merge(total, _run_shard(job))
+    elapsed = time.perf_counter() - start
+
+    return summarize(total, data, elapsed, workers, policies, knowledge, turn_limit)
+
+def summarize(total, data, elapsed, workers, policies, knowledge, turn_limit, top=25):
+    games = total['games'] or 1
+    lengths = total['chain_lengths']
+    ordered = sorted(lengths.elements())
+    dead_end_rates = [
+        (count / total['attr_played'][attr], count, attr)
+        for attr, count in total['attr_dead_ends'].items()
+        if total['attr_played'][attr] >= 20
+    ]
+    dead_end_rates.sort(reverse=True)
+    return {
+        'games': total['games'],
+        'elapsed_seconds': round(elapsed, 2),
+        'games_per_sec': round(total['games'] / elapsed) if elapsed else None,
+        'workers': workers,
+        'policies': {'A': policies[0], 'B': policies[1]},
+        'knowledge': knowledge,
+        'turn_limit': turn_limit,
+        'first_mover_win_rate': round(total['wins']['A'] / games, 4),
+        'end_reasons': {k: round(v / games, 4) for k, v in total['end_reasons'].most_common()},
+        'chain_length': {
+            'mean': round(sum(ordered) / len(ordered), 2) if ordered else None,
+            'median': ordered[len(ordered) // 2] if ordered else None,
+            'p90': ordered[int(len(ordered) * 0.9)] if ordered else None,
+            'distribution': {str(k): v for k, v in sorted(lengths.items())},
+        },
+        'dead_end_attributes': [
+            {'type': data.attr_keys[attr][0], 'value': data.attr_keys[attr][1],
+             'dead_end_rate': round(rate, 3), 'dead_ends': count, 'played': total['attr_played'][attr]}
+            for rate, count, attr in dead_end_rates[:top]
+        ],
+    }
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Simulate games for rule and balance analysis")
+    parser.add_argument("--input", default=str(DEFAULT_PLAYERS_PATH), help="Merged players JSON file")
+    parser.add_argument("--games", type=int, default=100000, help="Games to simulate")
+    parser.add_argument("--policy-a", choices=POLICIES, default='random', help="Policy for the first mover")
+    parser.add_argument("--policy-b", choices=POLICIES, default='random', help="Policy for the second mover")
+    parser.add_argument("--knowledge", type=float, default=0.5, help="Chance of recalling any valid answer (0-1)")
+    parser.add_argument("--turn-limit", type=int, default=TURN_LIMIT, help="Moves after which the mover loses")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: all cores)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--report", help="Write the full report as JSON to this path")
+    args = parser.parse_args()
+
+    report = simulate(load_json(args.input), args.games, (args.policy_a, args.policy_b), args.knowledge,
+                      args.turn_limit, args.workers, args.seed)
+    summary = {k: v for k, v in report.items() if k not in ('chain_length', 'dead_end_attributes')}
+    summary['chain_length'] = {k: v for k, v in report['chain_length'].items() if k != 'distribution'}
+    print(json.dumps(summary, indent=2))
+    if report['dead_end_attributes']:
+        print("Top dead-end attributes:")
+        for entry in report['dead_end_attributes'][:10]:
+            print(f"  {entry['type']}={entry['value']}: {entry['dead_end_rate']:.1%} of {entry['played']} plays")
+    if args.report:
+        with open(args.report, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
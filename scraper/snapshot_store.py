@@ -0,0 +1,298 @@
+"""
+Content-addressed release history for the published datasets.
+
+Every pipeline run overwrites players_new.json and players_db_*.json in place,
+so a bad crawl (e.g. a layout change that empties every college list) used to
+be recoverable only by re-crawling. This store keeps every release instead.
+
+Each dataset file is split into one chunk per player record. Chunks are
+stored once, zlib-compressed, under the SHA-256 of their JSON. A file's
+manifest (player ID -> chunk hash, in file order) is itself split into pages
+of MANIFEST_PAGE_SIZE entries stored the same way, so a release that changes
+50 records adds at most 50 record chunks, 50 manifest pages and a short list
+of page hashes. Restoring a release rebuilds each file byte-for-byte.
+
+Layout:
+    snapshots/store.sqlite   (chunks, releases, release_files)
+
+Usage:
+    python snapshot_store.py list
+    python snapshot_store.py snapshot ../ballknower/public/backend/players_new.json --label "pre-fix"
+    python snapshot_store.py diff 20261019T080000 latest --file players_new.json
+    python snapshot_store.py restore 20261019T080000 --file players_db_nfl.json
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import sqlite3
+import zlib
+from datetime import datetime, timezone
+from pathlib import Path
+
+from utils import load_json, save_json_atomic
+
+SNAPSHOT_DIR = Path(__file__).parent / "snapshots"
+
+# Manifest entries per content-addressed manifest page
+MANIFEST_PAGE_SIZE = 256
+
+_conn = None
+_conn_pid = None
+
+def _connection():
+    global _conn, _conn_pid
+    if _conn is None or _conn_pid != os.getpid():
+        SNAPSHOT_DIR.mkdir(parents=True, exist_ok=True)
+        _conn = sqlite3.connect(SNAPSHOT_DIR / "store.sqlite", timeout=30)
+        _conn.execute("PRAGMA journal_mode=WAL")
+        _conn.executescript("""
+            CREATE TABLE IF NOT EXISTS chunks (
+                hash TEXT PRIMARY KEY,
+                data BLOB NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS releases (
+                id TEXT PRIMARY KEY,
+                created_at TEXT NOT NULL,
+                label TEXT
+            );
+            CREATE TABLE IF NOT EXISTS release_files (
+                release_id TEXT NOT NULL,
+                name TEXT NOT NULL,
+                path TEXT NOT NULL,
+                records INTEGER NOT NULL,
+                manifest_hash TEXT NOT NULL,
+                manifest BLOB NOT NULL,
+                PRIMARY KEY (release_id, name)
+            );
+        """)
+        _conn_pid = os.getpid()
+    return _conn
+
+def _encode_record(record):
+    return json.dumps(record, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+def _put_chunk(conn, value):
+    """Store a JSON value content-addressed; returns (hash, 1 if newly stored else 0)."""
+    encoded = _encode_record(value)
+    digest = hashlib.sha256(encoded).hexdigest()
+    cursor = conn.execute("INSERT OR IGNORE INTO chunks VALUES (?, ?)", (digest, zlib.compress(encoded)))
+    return digest, cursor.rowcount
+
+def _load_manifest(blob):
+    """Expand a stored list of manifest page hashes into [[player ID, chunk hash], ...]."""
+    page_hashes = json.loads(zlib.decompress(blob))
+    pages = _load_chunks(page_hashes)
+    return [entry for digest in page_hashes for entry in pages[digest]]
+
+def snapshot(paths, label=None):
+    """
+    Record the current contents of dataset files as a new release.
+
+    Args:
+        paths: Dataset JSON files (dicts keyed by player ID); missing files are skipped
+        label: Optional free-text label
+
+    Returns:
+        Release ID, or None if nothing changed since the latest release
+    """
+    conn = _connection()
+    files = []
+    new_chunks = 0
+    with conn:
+        for path in paths:
+            path = Path(path)
+            if not path.exists():
+                continue
+            data = load_json(path)
+            manifest = []
+            for pid, record in data.items():
+                digest, added = _put_chunk(conn, record)
+                new_chunks += added
+                manifest.append([pid, digest])
+            page_hashes = []
+            for i in range(0, len(manifest), MANIFEST_PAGE_SIZE):
+                digest, added = _put_chunk(conn, manifest[i:i + MANIFEST_PAGE_SIZE])
+                new_chunks += added
+                page_hashes.append(digest)
+            manifest_hash = hashlib.sha256(''.join(page_hashes).encode('ascii')).hexdigest()
+            files.append((path.name, str(path.resolve()), len(manifest), manifest_hash, page_hashes))
+
+        if not files:
+            print("No dataset files found; nothing to snapshot.")
+            return None
+
+        latest = latest_release()
+        if latest is not None:
+            previous = {row[0]: row[1] for row in conn.execute(
+                "SELECT name, manifest_hash FROM release_files WHERE release_id = ?", (latest,)
+            )}
+            if all(previous.get(name) == manifest_hash for name, _, _, manifest_hash, _ in files):
+                print(f"Datasets unchanged since release {latest}; no snapshot taken.")
+                return None
+
+        release_id = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S")
+        suffix = 1
+        while conn.execute("SELECT 1 FROM releases WHERE id = ?", (release_id,)).fetchone():
+            suffix += 1
+            release_id = f"{release_id.split('.')[0]}.{suffix}"
+        conn.execute(
+            "INSERT INTO releases VALUES (?, ?, ?)",
+            (release_id, datetime.now(timezone.utc).isoformat(timespec='seconds'), label)
+        )
+        for name, path, records, manifest_hash, page_hashes in files:
+            conn.execute(
+                "INSERT INTO release_files VALUES (?, ?, ?, ?, ?, ?)",
+                (release_id, name, path, records, manifest_hash,
+                 zlib.compress(json.dumps(page_hashes).encode('ascii')))
+            )
+
+    print(f"Snapshot {release_id}: {len(files)} file(s), {new_chunks} new chunks stored")
+    return release_id
+
+def list_releases():
+    """Return releases, oldest first, as dicts with their files and record counts."""
+    conn = _connection()
+    releases = []
+    for release_id, created_at, label in conn.execute("SELECT * FROM releases ORDER BY id"):
+        files = {name: records for name, records in conn.execute(
+            "SELECT name, records FROM release_files WHERE release_id = ? ORDER BY name", (release_id,)
+        )}
+        releases.append({'id': release_id, 'created_at': created_at, 'label': label, 'files': files})
+    return releases
+
+def latest_release():
+    row = _connection().execute("SELECT id FROM releases ORDER BY id DESC LIMIT 1").fetchone()
+    return row[0] if row else None
+
+def resolve_release(ref):
+    """
+    Resolve a release reference to an ID.
+
+    Accepts a full ID, a unique ID prefix, 'latest', or 'latest~N' (N releases back).
+    """
+    conn = _connection()
+    if ref.startswith('latest'):
+        back = int(ref.split('~', 1)[1]) if '~' in ref else 0
+        row = conn.execute("SELECT id FROM releases ORDER BY id DESC LIMIT 1 OFFSET ?", (back,)).fetchone()
+        if row is None:
+            raise ValueError(f"No release {ref}")
+        return row[0]
+    matches = [row[0] for row in conn.execute("SELECT id FROM releases WHERE id LIKE ?", (ref + '%',))]
+    if len(matches) != 1:
+        raise ValueError(f"Release {ref!r} matches {len(matches)} releases")
+    return matches[0]
+
+def _release_file(release_id, name):
+    row = _connection().execute(
+        "SELECT path, manifest FROM release_files WHERE release_id = ? AND name = ?", (release_id, name)
+    ).fetchone()
+    if row is None:
+        raise ValueError(f"Release {release_id} has no file {name}")
+    return row[0], _load_manifest(row[1])
+
+def _load_chunks(hashes):
+    conn = _connection()
+    chunks = {}
+    hashes = list(set(hashes))
+    # Stay under SQLite's bound-parameter limit
+    for i in range(0, len(hashes), 500):
+        batch = hashes[i:i + 500]
+        placeholders = ','.join('?' * len(batch))
+        for digest, data in conn.execute(f"SELECT hash, data FROM chunks WHERE hash IN ({placeholders})", batch):
+            chunks[digest] = json.loads(zlib.decompress(data))
+    return chunks
+
+def load_release(release_id, name):
+    """Rebuild one dataset dict from a release."""
+    _, manifest = _release_file(release_id, name)
+    chunks = _load_chunks(digest for _, digest in manifest)
+    return {pid: chunks[digest] for pid, digest in manifest}
+
+def diff_releases(old_id, new_id, name):
+    """
+    Compare one file between two releases.
+
+    Returns:
+        Dict with 'added' and 'removed' player IDs, and 'changed' as
+        {player ID: [changed field names]}
+    """
+    old = dict(_release_file(old_id, name)[1])
+    new = dict(_release_file(new_id, name)[1])
+    changed_ids = [pid for pid in new if pid in old and old[pid] != new[pid]]
+    chunks = _load_chunks([old[pid] for pid in changed_ids] + [new[pid] for pid in changed_ids])
+
+    changed = {}
+    for pid in changed_ids:
+        before, after = chunks[old[pid]], chunks[new[pid]]
+        changed[pid] = sorted(k for k in set(before) | set(after) if before.get(k) != after.get(k))
+    return {
+        'added': sorted(pid for pid in new if pid not in old),
+        'removed': sorted(pid for pid in old if pid not in new),
+        'changed': changed,
+    }
+
+def restore(release_id, names=None, output_dir=None):
+    """
+    Write files from a release back to disk (atomically).
+
+    Args:
+        release_id: Release to restore
+        names: File names to restore (default: every file in the release)
+        output_dir: Write here instead of each file's original location
+
+    Returns:
+        List of paths written
+    """
+    conn = _connection()
+    if names is None:
+        names = [row[0] for row in conn.execute(
+            "SELECT name FROM release_files WHERE release_id = ? ORDER BY name", (release_id,)
+        )]
+    written = []
+    for name in names:
+        path, _ = _release_file(release_id, name)
+        target = Path(output_dir) / name if output_dir else Path(path)
+        target.parent.mkdir(parents=True, exist_ok=True)
+        save_json_atomic(load_release(release_id, name), target)
+        written.append(target)
+    return written
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Dataset release history")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    subparsers.add_parser("list", help="List releases")
+
+    snap = subparsers.add_parser("snapshot", help="Record dataset files as a new release")
+    snap.add_argument("paths", nargs="+")
+    snap.add_argument("--label")
+
+    diff = subparsers.add_parser("diff", help="Compare a file between two releases")
+    diff.add_argument("old")
+    diff.add_argument("new", nargs="?", default="latest")
+    diff.add_argument("--file", default="players_new.json")
+    diff.add_argument("--limit", type=int, default=20, help="Changed players to show")
+
+    rest = subparsers.add_parser("restore", help="Restore files from a release")
+    rest.add_argument("release")
+    rest.add_argument("--file", action="append", help="File name to restore (repeatable; default: all)")
+    rest.add_argument("--output-dir", help="Restore here instead of the original locations")
+
+    args = parser.parse_args()
+
+    if args.command == 'list':
+        for release in list_releases():
+            files = ', '.join(f"{name} ({count})" for name, count in release['files'].items())
+            label = f" [{release['label']}]" if release['label'] else ''
+            print(f"{release['id']}{label}  {files}")
+    elif args.command == 'snapshot':
+        snapshot(args.paths, args.label)
+    elif args.command == 'diff':
+        result = diff_releases(resolve_release(args.old), resolve_release(args.new), args.file)
+        print(f"{len(result['added'])} added, {len(result['removed'])} removed, {len(result['changed'])} changed")
+        for pid, fields in list(result['changed'].items())[:args.limit]:
+            print(f"  {pid}: {', '.join(fields)}")
+    else:
+        restore(resolve_release(args.release), args.file, args.output_dir)
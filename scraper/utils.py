@@ -5,9 +5,76 @@ Provides common functionality for HTTP requests, JSON I/O, and rate limiting.
 """
 
 import json
+import os
+import random
+import re
 import time
 import requests
+from collections import deque
+from email.utils import parsedate_to_datetime
 from pathlib import Path
+from urllib.parse import urlsplit
+import page_store
+import profiling
+from config import REQUEST_DELAY, RETRY_POLICY
+
+# Process-wide request counters (read by benchmarks and progress reporting)
+REQUEST_STATS = {
+    'requests': 0,
+    'rate_limited': 0,
+    'failures': 0,
+    'sleep_seconds': 0.0,
+    'circuit_trips': 0,
+    'deferred': 0,
+}
+
+# Set by request_stop() (e.g. from a signal handler); FetchQueue loops end early
+_stop_requested = False
+
+def request_stop():
+    """Ask running fetch loops to stop after the current page."""
+    global _stop_requested
+    _stop_requested = True
+
+def clear_stop():
+    global _stop_requested
+    _stop_requested = False
+
+def stop_requested():
+    return _stop_requested
+
+# Consecutive zero-row pages after which a family's layout is presumed broken.
+# Uniform pages are legitimately empty for many team/number pairs.
+ZERO_YIELD_LIMITS = {
+    'players_index': 3,
+    'nfl_uniform': 60,
+    'nba_franchise': 3,
+    'nba_numbers': 10,
+    'nfl_school': 5,
+}
+
+class LayoutChangeError(RuntimeError):
+    """Raised when a page family stops yielding rows, suggesting a site layout change."""
+
+class ZeroYieldWatchdog:
+    """Tracks consecutive zero-row pages for one page family."""
+
+    def __init__(self, family, limit=None):
+        self.family = family
+        self.limit = limit or ZERO_YIELD_LIMITS[family]
+        self.streak = 0
+
+    def observe(self, rows, url):
+        """Record one successfully fetched page's rows; raises LayoutChangeError on a long streak."""
+        if rows:
+            self.streak = 0
+            return
+        self.streak += 1
+        if self.streak >= self.limit:
+            raise LayoutChangeError(
+                f"{self.family}: {self.streak} consecutive pages yielded no rows "
+                f"(last: {url}); the page layout may have changed"
+            )
 
 def load_json(path):
     """
@@ -34,59 +101,414 @@ def save_json(data, path):
         path: Output path (string or Path object)
     """
     path = Path(path)
+    profiling.checkpoint()
     with path.open('w', encoding='utf-8') as f:
         json.dump(data, f, indent=2, ensure_ascii=False)
     print(f"Saved data to {path}")
 
-def fetch_with_retry(url, session, max_retries=5):
+def save_json_atomic(data, path, compact=False):
+    """
+    Save data to JSON so readers never see a partially written file.
+
+    Writes to a temporary file next to the target and renames it into place
+    (os.replace is atomic on POSIX and Windows when on the same filesystem).
+    
+    Args:
+        data: Data to serialize (dict or list)
+        path: Output path (string or Path object)
+        compact: Write without whitespace (for files shipped to the web app)
+    """
+    path = Path(path)
+    tmp_path = path.with_name(path.name + '.tmp')
+    with tmp_path.open('w', encoding='utf-8') as f:
+        if compact:
+            json.dump(data, f, separators=(',', ':'), ensure_ascii=False)
+        else:
+            json.dump(data, f, indent=2, ensure_ascii=False)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+    print(f"Published data to {path}")
+
+def iter_json_records(path, chunk_size=1 << 16):
     """
-    Fetch URL with automatic retry on failure and rate limiting.
+    Stream records from a JSON export without loading the whole file.
+
+    Supports NDJSON/JSON Lines (.ndjson, .jsonl), a top-level JSON array of
+    records, and a top-level object keyed by document ID (Firestore-style
+    exports). For keyed objects, the key is added as 'id' if the record
+    has none.
+    
+    Args:
+        path: Export file path (string or Path object)
+        chunk_size: Characters to read per chunk
+        
+    Yields:
+        One decoded record (usually a dict) at a time
+    """
+    path = Path(path)
+    if path.suffix in ('.ndjson', '.jsonl'):
+        with path.open('r', encoding='utf-8') as f:
+            for line in f:
+                line = line.strip()
+                if line:
+                    yield json.loads(line)
+        return
+
+    decoder = json.JSONDecoder()
+    with path.open('r', encoding='utf-8') as f:
+        buf = ''
+        pos = 0
+        eof = False
+
+        def fill():
+            nonlocal buf, pos, eof
+            chunk = f.read(chunk_size)
+            if not chunk:
+                eof = True
+            buf = buf[pos:] + chunk
+            pos = 0
+
+        def skip(chars):
+            # Advance past whitespace/separators, reading more as needed
+            nonlocal pos
+            while True:
+                while pos < len(buf) and buf[pos] in chars:
+                    pos += 1
+                if pos < len(buf) or eof:
+                    return
+                fill()
+
+        def decode():
+            nonlocal pos
+            while True:
+                try:
+                    value, end = decoder.raw_decode(buf, pos)
+                    # A number at the buffer edge may be truncated; make sure
+                    # something follows it before trusting the parse.
+                    if end == len(buf) and not eof:
+                        raise ValueError("need more data")
+                    pos = end
+                    return value
+                except ValueError:
+                    if eof:
+                        raise
+                    fill()
+
+        skip(' \t\r\n')
+        if pos >= len(buf):
+            return
+        opener = buf[pos]
+        pos += 1
+        if opener == '[':
+            while True:
+                skip(' \t\r\n,')
+                if pos >= len(buf) or buf[pos] == ']':
+                    return
+                yield decode()
+        elif opener == '{':
+            while True:
+                skip(' \t\r\n,')
+                if pos >= len(buf) or buf[pos] == '}':
+                    return
+                key = decode()
+                skip(' \t\r\n:')
+                record = decode()
+                if isinstance(record, dict):
+                    record.setdefault('id', key)
+                yield record
+        else:
+            raise ValueError(f"Unsupported export format in {path}: expected '[' or '{{'")
+
+def sleep(seconds):
+    """
+    Sleep for rate limiting or backoff.
+
+    Pauses the step profiler (if profiling is enabled) so waiting time
+    does not show up as work in CPU profiles.
+    """
+    with profiling.paused():
+        time.sleep(seconds)
+    REQUEST_STATS['sleep_seconds'] += seconds
+
+# Page family of a URL path (the extractor family names), first match wins
+URL_FAMILIES = [
+    ('nfl_uniform', re.compile(r'^/players/uniform\.cgi')),
+    ('players_index', re.compile(r'^/players/[^/]+/?$')),
+    ('nba_franchise', re.compile(r'^/teams/[^/]+/players\.html')),
+    ('nfl_team_list', re.compile(r'^/teams/?$')),
+    ('nba_numbers', re.compile(r'^/friv/numbers\.fcgi')),
+    ('nfl_schools', re.compile(r'^/schools/?$')),
+    ('nfl_school', re.compile(r'^/schools/[^/]+')),
+]
+
+def url_family(url):
+    """Page family of a URL (e.g. 'nfl_uniform'), or its first path segment if unknown."""
+    path = urlsplit(url).path
+    for family, pattern in URL_FAMILIES:
+        if pattern.match(path):
+            return family
+    return path.strip('/').split('/', 1)[0] or '/'
+
+def jittered_backoff(attempt, policy=RETRY_POLICY):
+    """Exponential backoff with jitter: uniform between half and all of base * 2^(attempt-1), capped."""
+    ceiling = min(policy['backoff_cap'], policy['backoff_base'] * 2 ** (attempt - 1))
+    return ceiling / 2 + random.uniform(0, ceiling / 2)
+
+def _retry_after(resp):
+    """Seconds from a Retry-After header (delta-seconds or HTTP date), or None."""
+    value = resp.headers.get('Retry-After')
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+class CircuitOpenError(Exception):
+    """Raised instead of sending a request while a page family's circuit is open."""
+
+    def __init__(self, key, retry_at):
+        self.key = key
+        self.retry_at = retry_at
+        host, family = key
+        super().__init__(f"circuit open for {family} on {host} "
+                         f"(retry in {max(0, retry_at - time.time()):.0f}s)")
+
+class CircuitBreaker:
+    """
+    Circuit breaker for one (host, page family).
+
+    Closed: requests go through. Once RETRY_POLICY['breaker_rate_limited']
+    different URLs have been answered with 429 since the last success, or after
+    ['breaker_failures'] consecutive failed URLs, it opens
+    for a jittered cooldown (at least the server's Retry-After), during which
+    check() raises CircuitOpenError without sending anything. The first request
+    after the cooldown is a trial (half-open): success closes the circuit, a
+    429 or failure reopens it with a doubled cooldown.
+    """
+
+    def __init__(self, key, policy=RETRY_POLICY):
+        self.key = key
+        self.policy = policy
+        self.rate_limited_urls = set()
+        self.failures = 0
+        self.trips = 0
+        self.open_until = 0.0
+
+    @property
+    def state(self):
+        if not self.open_until:
+            return 'closed'
+        return 'open' if time.time() < self.open_until else 'half_open'
+
+    def check(self):
+        if self.state == 'open':
+            raise CircuitOpenError(self.key, self.open_until)
+
+    def record_success(self):
+        if self.open_until:
+            print(f"Circuit closed for {self.key[1]} on {self.key[0]}")
+        self.rate_limited_urls.clear()
+        self.failures = self.trips = 0
+        self.open_until = 0.0
+
+    def record_rate_limited(self, url, retry_after=None):
+        """
+        Count a 429; returns True if it opened the circuit.
+
+        Repeated 429s for the same URL count once here (they are limited per
+        URL by RETRY_POLICY['max_rate_limited']), so one slow page does not
+        pause its whole family.
+        """
+        self.rate_limited_urls.add(url)
+        if self.state == 'half_open' or len(self.rate_limited_urls) >= self.policy['breaker_rate_limited']:
+            self._trip(retry_after)
+            return True
+        return False
+
+    def record_failure(self):
+        """Count a URL that failed all its retries; returns True if it opened the circuit."""
+        self.failures += 1
+        if self.state == 'half_open' or self.failures >= self.policy['breaker_failures']:
+            self._trip()
+            return True
+        return False
+
+    def _trip(self, min_cooldown=None):
+        ceiling = min(self.policy['breaker_cooldown_cap'], self.policy['breaker_cooldown'] * 2 ** self.trips)
+        cooldown = max(ceiling / 2 + random.uniform(0, ceiling / 2), min_cooldown or 0)
+        self.trips += 1
+        self.rate_limited_urls.clear()
+        self.failures = 0
+        self.open_until = time.time() + cooldown
+        REQUEST_STATS['circuit_trips'] += 1
+        print(f"Circuit open for {self.key[1]} on {self.key[0]}: deferring the family for {cooldown:.0f}s")
+
+# (host, page family) -> CircuitBreaker, shared by every fetch in the process
+BREAKERS = {}
+
+def breaker_for(url, policy=RETRY_POLICY):
+    key = (urlsplit(url).netloc, url_family(url))
+    if key not in BREAKERS:
+        BREAKERS[key] = CircuitBreaker(key, policy)
+    return BREAKERS[key]
+
+class FetchQueue:
+    """
+    Work list for a fetch loop that re-queues items whose family's circuit is open.
+
+    Iterating yields the items in order. When a fetch raises CircuitOpenError,
+    the loop calls defer(error) and moves on; deferred items come back after
+    the pending ones, and if only deferred items are left the queue sleeps
+    until the earliest circuit can be retried. An item deferred more than
+    RETRY_POLICY['max_deferrals'] times is given up.
+
+    Iteration also ends early once should_stop() returns true (by default,
+    after request_stop()); `stopped` then tells the loop to save and return.
+
+    Example:
+        queue = FetchQueue(NUMS, progress)
+        for num in queue:
+            try:
+                resp = fetch_with_retry(number_url(base_url, num), session)
+            except CircuitOpenError as e:
+                queue.defer(e)
+                continue
+    """
+
+    def __init__(self, items, progress=None, max_deferrals=None, should_stop=stop_requested):
+        self.pending = deque((item, 0) for item in items)
+        self.deferred = []
+        self.progress = progress
+        self.max_deferrals = RETRY_POLICY['max_deferrals'] if max_deferrals is None else max_deferrals
+        self.should_stop = should_stop
+        self.stopped = False
+        self.given_up = []
+        self._current = None
+
+    def __iter__(self):
+        while self.pending or self.deferred:
+            if not self.pending:
+                wait = min(retry_at for _, _, retry_at in self.deferred) - time.time()
+                if wait > 0:
+                    print(f"{len(self.deferred)} deferred page(s) waiting for an open circuit; pausing {wait:.0f}s...")
+                    # In short slices so a stop request doesn't wait out the cooldown
+                    while wait > 0 and not self.should_stop():
+                        sleep(min(wait, 1.0))
+                        wait = min(retry_at for _, _, retry_at in self.deferred) - time.time()
+                self.pending.extend((item, count) for item, count, _ in self.deferred)
+                self.deferred = []
+            if self.should_stop():
+                remaining = len(self.pending)
+                print(f"Stop requested; leaving {remaining} page(s) for the next run")
+                self.stopped = True
+                return
+            self._current = self.pending.popleft()
+            yield self._current[0]
+
+    def defer(self, error):
+        """Re-queue the current item; returns False if it has been deferred too often."""
+        item, count = self._current
+        if count >= self.max_deferrals:
+            print(f"Giving up on {item} after {count} deferrals: {error}")
+            self.given_up.append(item)
+            return False
+        self.deferred.append((item, count + 1, error.retry_at))
+        REQUEST_STATS['deferred'] += 1
+        if self.progress is not None:
+            # The item will be processed once more
+            self.progress.total += 1
+        return True
+
+def fetch_with_retry(url, session, max_retries=None, policy=RETRY_POLICY):
+    """
+    Fetch URL with rate limiting, jittered retries and a per-family circuit breaker.
     
     Enforces 3.1-second delay before each request to maintain 20 req/min limit.
-    Handles HTTP 429 (rate limit) responses with exponential backoff.
     
     Args:
         url: URL to fetch
         session: requests.Session object
-        max_retries: Maximum number of retry attempts (default: 5)
+        max_retries: Attempts for network errors and 5xx responses
+            (default: RETRY_POLICY['max_retries'])
+        policy: Retry policy dict (default: config.RETRY_POLICY)
         
     Returns:
         requests.Response object
         
     Raises:
-        Exception: If all retry attempts fail
+        CircuitOpenError: If the URL's page family is paused (no request sent)
+            or this URL's 429s or failures opened the circuit; callers using
+            FetchQueue re-queue the URL in both cases
+        requests.exceptions.RequestException: If the URL fails for good
         
     Rate Limiting:
         - Waits 3.1 seconds before each request (20 requests/minute)
-        - Honors Retry-After header on 429 responses
-        - Uses exponential backoff on other failures
+        - 429s honor Retry-After and count against max_rate_limited, not
+          max_retries; 429s for breaker_rate_limited different URLs of a
+          family open its circuit
+        - Network errors and 5xx use jittered exponential backoff; other 4xx
+          (e.g. 404) are not retried
     """
+    max_retries = max_retries or policy['max_retries']
+    breaker = breaker_for(url, policy)
+    breaker.check()
+
     # Rate limiting: 20 requests per minute = 1 request every 3 seconds.
-    # Use 3.1 seconds to be safe.
-    time.sleep(3.1)
+    # Use 3.1 seconds to be safe (config.REQUEST_DELAY).
+    sleep(REQUEST_DELAY)
     
-    for attempt in range(1, max_retries + 1):
+    attempt = rate_limited = 0
+    while True:
         try:
             # Print every request for transparency
             print(f"Requesting: {url}")
             
             resp = session.get(url)
-            
+            REQUEST_STATS['requests'] += 1
+        except requests.exceptions.RequestException as e:
+            error = e
+        else:
             # Handle rate limiting
             if resp.status_code == 429:
-                retry = resp.headers.get('Retry-After')
-                wait = int(retry) if retry else 2 ** attempt
-                print(f"Rate limited. Waiting for {wait} seconds...")
-                time.sleep(wait)
+                REQUEST_STATS['rate_limited'] += 1
+                rate_limited += 1
+                retry_after = _retry_after(resp)
+                if breaker.record_rate_limited(url, retry_after):
+                    raise CircuitOpenError(breaker.key, breaker.open_until)
+                if rate_limited >= policy['max_rate_limited']:
+                    raise requests.exceptions.HTTPError(f"429 Too Many Requests {rate_limited} times for {url}",
+                                                        response=resp)
+                wait = retry_after if retry_after is not None else jittered_backoff(rate_limited, policy)
+                print(f"Rate limited. Waiting for {wait:.1f} seconds...")
+                sleep(wait)
                 continue
-                
-            resp.raise_for_status()
-            return resp
-            
-        except requests.exceptions.RequestException as e:
-            print(f"Request failed: {e}")
-            if attempt == max_retries:
-                raise
-            time.sleep(2 ** attempt)
-            
-    raise Exception(f"Failed to fetch {url} after {max_retries} retries")
+
+            try:
+                resp.raise_for_status()
+            except requests.exceptions.HTTPError as e:
+                if resp.status_code < 500 and resp.status_code != 408:
+                    # Missing or forbidden pages don't get better with retries
+                    REQUEST_STATS['failures'] += 1
+                    print(f"Request failed: {e}")
+                    raise
+                error = e
+            else:
+                breaker.record_success()
+                # Keep a copy for offline rebuilds (see page_store.py)
+                page_store.record(url, resp.text)
+                return resp
+
+        REQUEST_STATS['failures'] += 1
+        attempt += 1
+        print(f"Request failed: {error}")
+        if attempt >= max_retries:
+            if breaker.record_failure():
+                raise CircuitOpenError(breaker.key, breaker.open_until) from error
+            raise error
+        sleep(jittered_backoff(attempt, policy))